@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+
+# --- CONFIGURATION ---
+EXCHANGE_TZ = 'America/New_York'
+MARKET_CLOSE = pd.Timedelta(hours=16)  # Daily bars are only final at the close
+HOUR_NS = 3600 * 10**9
+DAY_NS = 24 * HOUR_NS
+INTERVALS = {'1m': '1min', '2m': '2min', '5m': '5min', '15m': '15min', '30m': '30min', '60m': '60min',
+             '90m': '90min', '1h': '1h', '1d': '1D'}
+
+# Point-in-time alignment: a sentiment bucket is known once its last post
+# could have arrived (bucket end), and a bar is known once it has closed.
+# Each bucket is joined to the latest bar of its ticker that was already
+# closed at the bucket's end, so no feature row ever sees a later price.
+# All times are compared in UTC; sentiment dates/hours are UTC (posts are
+# bucketed on created_utc) and bars come from the price store in UTC.
+
+
+def _bucket_end_ns(buckets):
+    end = pd.to_datetime(buckets['date']).dt.as_unit('ns').array.asi8
+    if 'hour' in buckets:
+        return end + (buckets['hour'].to_numpy(np.int64) + 1) * HOUR_NS
+    return end + DAY_NS
+
+
+def bucket_end(buckets):
+    """UTC time at which each (date[, hour]) sentiment bucket is complete."""
+    return pd.Series(pd.DatetimeIndex(_bucket_end_ns(buckets).view('datetime64[ns]')).tz_localize('UTC'), index=buckets.index)
+
+
+def bar_available_at(bars, interval):
+    """UTC time at which each bar (timestamped at its start, as yfinance does) has closed."""
+    if interval not in INTERVALS:
+        raise ValueError(f'Unsupported interval {interval!r} (expected one of {sorted(INTERVALS)})')
+    timestamps = bars['timestamp']
+    if interval == '1d':
+        session = timestamps.dt.tz_convert(EXCHANGE_TZ).dt.normalize()
+        return (session + MARKET_CLOSE).dt.tz_convert('UTC')
+    return timestamps.dt.tz_convert('UTC') + pd.Timedelta(INTERVALS[interval])
+
+
+def _codes(values, categories):
+    # Hash each column once, then look up only its distinct values
+    codes, uniques = pd.factorize(values)
+    return pd.Index(categories).get_indexer(uniques)[codes]
+
+
+def asof_join(buckets, bars, interval, by='tickers', tolerance=None):
+    """
+    Left-join each bucket to the latest `bars` row (same `by` value) available
+    at the bucket's end. Bar columns are added as-is plus `bar_timestamp`;
+    buckets with no earlier bar (or none within `tolerance`) get NaN.
+    Returns rows in the order and with the index of `buckets`.
+
+    Neither side has to be sorted: bars are ordered by (ticker, time) once and
+    every bucket finds its bar with one vectorized binary search on a packed
+    int64 key (ticker code in the high bits, epoch seconds in the low 32).
+    """
+    # Whole seconds: round bar availability up and bucket ends down, so
+    # the loss of precision can only make a bar look later, never earlier
+    bar_seconds = -(-bar_available_at(bars, interval).dt.as_unit('ns').array.asi8 // 10**9)
+    bucket_seconds = _bucket_end_ns(buckets) // 10**9
+    bar_codes, tickers = pd.factorize(bars[by])
+    bucket_codes = _codes(buckets[by], tickers)
+    never = np.iinfo(np.int64).max
+    origin = min(bar_seconds.min(initial=never), bucket_seconds.min(initial=never))
+
+    order = np.lexsort((bar_seconds, bar_codes))
+    bar_keys = (bar_codes[order].astype(np.int64) << 32) + (bar_seconds[order] - origin)
+    bucket_keys = (bucket_codes.astype(np.int64) << 32) + (bucket_seconds - origin)
+    pos = np.searchsorted(bar_keys, bucket_keys, side='right') - 1
+    safe = np.maximum(pos, 0)
+    matched = (bucket_codes >= 0) & (pos >= 0) & (bar_codes[order][safe] == bucket_codes)
+    if tolerance is not None:
+        matched &= bucket_seconds - bar_seconds[order][safe] <= pd.Timedelta(tolerance).total_seconds()
+    rows = np.where(matched, order[safe], -1)
+
+    merged = buckets.copy()
+    for column in bars.columns.drop(by):
+        name = 'bar_timestamp' if column == 'timestamp' else column
+        merged[name] = pd.api.extensions.take(bars[column].array, rows, allow_fill=True)
+    return merged
+
+
+def grouped_ffill(frame, columns, by='tickers'):
+    """Forward-fill columns within each `by` group in one vectorized pass (frame sorted by group, time)."""
+    frame[columns] = frame.groupby(by, sort=False)[columns].ffill()
+    return frame
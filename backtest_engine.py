@@ -0,0 +1,153 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# --- CONFIGURATION ---
+INITIAL_CASH = 10000
+POSITION_SIZE = 1  # Number of shares per buy
+TRANSACTION_COST = 0.0  # Fraction of the traded value paid on every buy and sell
+RISK_FREE_RATE = 0.0  # Per bar, subtracted from the mean return
+PERIODS_PER_YEAR = 252  # Sharpe annualization
+SELL, HOLD, BUY = -1, 0, 1
+ACTION_NAMES = np.array(['sell', 'hold', 'buy'])  # ACTION_NAMES[code + 1]
+KEYS = ['tickers', 'date', 'hour']
+
+# Bars of all tickers are laid out as (bar, ticker) panels: one column per
+# ticker, padded with NaN prices and HOLD signals past its last bar. The
+# cash/position state machine then advances every ticker one bar per step
+# over contiguous rows, and the metrics are column reductions.
+
+Panel = namedtuple('Panel', ['tickers', 'lengths', 'row', 'column'])
+Simulation = namedtuple('Simulation', ['equity', 'executed', 'wins', 'trades'])
+BacktestResult = namedtuple('BacktestResult', ['portfolio_value', 'executed', 'returns', 'metrics'])
+
+
+# --- SIGNALS ---
+def threshold_signals(values, buy_above, sell_below):
+    """BUY where values > buy_above, SELL where values < sell_below, else HOLD (NaN holds)."""
+    values = np.asarray(values)
+    if values.dtype.kind != 'f':
+        values = values.astype(float)
+    # float64 thresholds: NEP 50 would otherwise round them to a float32
+    # column's precision. The values themselves are compared as given, so
+    # pass the source column, not a float32 copy of it
+    buy_above, sell_below = np.float64(buy_above), np.float64(sell_below)
+    return np.select([values > buy_above, values < sell_below], [BUY, SELL], HOLD).astype(np.int8)
+
+
+def action_signals(actions):
+    """Signal codes from model actions (1 buy, -1 sell, anything else or NaN hold)."""
+    actions = np.asarray(actions, dtype=float)
+    return np.select([actions == 1, actions == -1], [BUY, SELL], HOLD).astype(np.int8)
+
+
+# --- LAYOUT ---
+def sort_bars(df):
+    keys = [k for k in KEYS if k in df]
+    return df.sort_values(keys, kind='stable').reset_index(drop=True)
+
+
+def make_panel(tickers):
+    """Panel layout for a tickers column whose rows are grouped by ticker (see sort_bars)."""
+    column, names = pd.factorize(tickers)
+    lengths = np.bincount(column, minlength=len(names))
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    return Panel(names, lengths, np.arange(len(column)) - starts[column], column)
+
+
+def to_panel(panel, values, fill):
+    values = np.asarray(values)
+    out = np.full((panel.lengths.max(initial=0), len(panel.lengths)), fill, dtype=values.dtype)
+    out[panel.row, panel.column] = values
+    return out
+
+
+# --- ENGINE ---
+def simulate(prices, signals, initial_cash=INITIAL_CASH, position_size=POSITION_SIZE,
+             transaction_cost=TRANSACTION_COST):
+    """
+    Run the state machine on (bars, tickers) panels of prices and signals.
+    A BUY adds position_size shares if cash covers them and the cost; a SELL
+    closes the whole position and counts a win if the price beats the last buy.
+    """
+    n_bars, n_tickers = prices.shape
+    cash = np.full(n_tickers, float(initial_cash))
+    position = np.zeros(n_tickers)
+    last_buy = np.full(n_tickers, np.nan)
+    wins = np.zeros(n_tickers, np.int64)
+    trades = np.zeros(n_tickers, np.int64)
+    equity = np.empty((n_bars, n_tickers))
+    executed = np.zeros((n_bars, n_tickers), np.int8)
+    with np.errstate(invalid='ignore'):
+        for t in range(n_bars):
+            price = prices[t]
+            signal = signals[t]
+            # Exclusive per bar: a sell signal never buys and vice versa
+            cost = price * position_size * (1 + transaction_cost)
+            buy = (signal == BUY) & (cash >= cost)
+            sell = (signal == SELL) & (position > 0)
+            cash -= np.where(buy, cost, 0.0)
+            cash += np.where(sell, price * position * (1 - transaction_cost), 0.0)
+            wins += sell & (price > last_buy)
+            position += buy * position_size
+            position[sell] = 0
+            last_buy[buy] = price[buy]
+            last_buy[sell] = np.nan
+            trades += buy | sell
+            executed[t] = buy.view(np.int8) - sell.view(np.int8)
+            np.add(cash, position * price, out=equity[t])
+    return Simulation(equity, executed, wins, trades)
+
+
+def panel_returns(equity, lengths):
+    """Bar-over-bar returns; the first bar and NaN values count as 0, padding is 0."""
+    returns = np.zeros_like(equity)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns[1:] = equity[1:] / equity[:-1] - 1
+    returns[np.isnan(returns)] = 0
+    returns[np.arange(len(equity))[:, None] >= lengths] = 0
+    return returns
+
+
+def metrics(equity, returns, lengths, wins, trades, initial_cash=INITIAL_CASH,
+            risk_free_rate=RISK_FREE_RATE, periods_per_year=PERIODS_PER_YEAR):
+    """Per-ticker total return, Sharpe, max drawdown and win rate from the panels."""
+    valid = np.arange(len(equity))[:, None] < lengths
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = returns.sum(axis=0) / lengths
+        std = np.sqrt(np.where(valid, (returns - mean) ** 2, 0).sum(axis=0) / (lengths - 1))
+        sharpe = np.where(std > 0, (mean - risk_free_rate) / (std + 1e-9) * np.sqrt(periods_per_year), 0.0)
+        running_max = np.fmax.accumulate(equity, axis=0)
+        drawdown = np.where(valid, (equity - running_max) / running_max, np.nan)
+        win_rate = np.where(trades > 0, wins / trades, 0.0)
+    final = equity[np.maximum(lengths - 1, 0), np.arange(equity.shape[1])]
+    return {
+        'total_return': (final - initial_cash) / initial_cash,
+        'sharpe': sharpe,
+        'max_drawdown': np.fmin.reduce(drawdown, axis=0),
+        'win_rate': win_rate,
+        'trades': trades,
+    }
+
+
+def run_backtest(df, signals, initial_cash=INITIAL_CASH, position_size=POSITION_SIZE,
+                 risk_free_rate=RISK_FREE_RATE, periods_per_year=PERIODS_PER_YEAR,
+                 transaction_cost=TRANSACTION_COST):
+    """
+    Backtest every ticker in df (sorted with sort_bars) on one signal code
+    per row. Per-row arrays come back in df's row order; metrics has one
+    row per ticker.
+    """
+    panel = make_panel(df['tickers'])
+    prices = to_panel(panel, df['Close'].to_numpy(dtype=float), np.nan)
+    sim = simulate(prices, to_panel(panel, np.asarray(signals, dtype=np.int8), HOLD), initial_cash, position_size,
+                   transaction_cost)
+    returns = panel_returns(sim.equity, panel.lengths)
+    table = metrics(sim.equity, returns, panel.lengths, sim.wins, sim.trades, initial_cash, risk_free_rate, periods_per_year)
+    return BacktestResult(
+        sim.equity[panel.row, panel.column],
+        sim.executed[panel.row, panel.column],
+        returns[panel.row, panel.column],
+        pd.DataFrame({'tickers': panel.tickers, **table}),
+    )
@@ -1,12 +1,15 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
+# Trading parameters are defined once, in the engine, so backtests and
+# backtest_sweep share the same defaults
+from backtest_engine import (ACTION_NAMES, BUY, HOLD, INITIAL_CASH, POSITION_SIZE, RISK_FREE_RATE, SELL,
+                             TRANSACTION_COST, action_signals, run_backtest, sort_bars, threshold_signals)
+from dataset_io import read_dataset
 
-INPUT_CSV = 'merged_features.csv'
+INPUT_DATASET = 'merged_features_daily'
 ML_PREDICTIONS_CSV = 'ml_predictions.csv'
-INITIAL_CASH = 10000
-POSITION_SIZE = 1  # Number of shares per trade
-RISK_FREE_RATE = 0.0  # For Sharpe ratio
+RESULTS_CSVS = {'Rule': 'backtest_results_rule.csv', 'ML': 'backtest_results_ml.csv'}
+METRICS_CSV = 'backtest_metrics.csv'
 
 # --- STRATEGY FUNCTION TEMPLATE ---
 def rule_based_strategy(row):
@@ -31,108 +34,105 @@ def ml_strategy(row):
         return 'hold'
 
 
+# --- VECTORIZED STRATEGIES ---
+# Each row-wise strategy above has a twin that returns signal codes for a
+# whole frame at once; backtest() uses the twin when there is one.
+def rule_based_signals(df):
+    return threshold_signals(df['avg_sentiment'], 0.2, -0.2)
+
+
+def ml_signals(df):
+    if 'ml_action' not in df:
+        return np.full(len(df), HOLD, np.int8)
+    return action_signals(df['ml_action'])
+
+
+VECTORIZED_STRATEGIES = {rule_based_strategy: rule_based_signals, ml_strategy: ml_signals}
+
+
+def strategy_signals(df, strategy_func):
+    vectorized = VECTORIZED_STRATEGIES.get(strategy_func)
+    if vectorized is not None:
+        return vectorized(df)
+    actions = df.apply(strategy_func, axis=1) if len(df) else pd.Series(dtype=object)
+    return np.select([actions == 'buy', actions == 'sell'], [BUY, SELL], HOLD).astype(np.int8)
+
+
 # --- BACKTEST ENGINE ---
+def run_strategy(df, strategy_func, label='Strategy'):
+    """
+    Headless backtest: returns (df with the per-bar result columns, metrics
+    with one row per ticker). Nothing is printed or plotted; charts and
+    summaries are rendered afterwards by backtest_reports.
+    """
+    df = sort_bars(df)
+    signals = strategy_signals(df, strategy_func)
+    result = run_backtest(df, signals, INITIAL_CASH, POSITION_SIZE, RISK_FREE_RATE,
+                          transaction_cost=TRANSACTION_COST)
+    traded = result.executed != HOLD
+    df[f'portfolio_value_{label}'] = result.portfolio_value
+    df[f'action_{label}'] = ACTION_NAMES[signals + 1]
+    df[f'trade_marker_{label}'] = traded
+    df[f'trade_price_{label}'] = np.where(traded, df['Close'], np.nan)
+    df['returns'] = result.returns
+    metrics = result.metrics
+    metrics.insert(0, 'strategy', label)
+    return df, metrics
+
+
 def backtest(df, strategy_func, label='Strategy'):
-    df = df.sort_values(['tickers', 'date']).reset_index(drop=True)
-    results = []
-    for ticker in df['tickers'].unique():
-        tdf = df[df['tickers'] == ticker].reset_index(drop=True)
-        cash = INITIAL_CASH
-        position = 0
-        portfolio_values = []
-        actions = []
-        trade_dates = []
-        trade_prices = []
-        wins = 0
-        trades = 0
-        last_buy_price = None
-        for i, row in tdf.iterrows():
-            price = row['Close']
-            action = strategy_func(row)
-            if action == 'buy' and cash >= price:
-                position += POSITION_SIZE
-                cash -= price * POSITION_SIZE
-                trade_dates.append(row['date'])
-                trade_prices.append(price)
-                last_buy_price = price
-                trades += 1
-            elif action == 'sell' and position > 0:
-                cash += price * position
-                if last_buy_price is not None and price > last_buy_price:
-                    wins += 1
-                position = 0
-                trade_dates.append(row['date'])
-                trade_prices.append(price)
-                trades += 1
-                last_buy_price = None
-            portfolio_value = cash + position * price
-            portfolio_values.append(portfolio_value)
-            actions.append(action)
-        tdf[f'portfolio_value_{label}'] = portfolio_values
-        tdf[f'action_{label}'] = actions
-        tdf[f'trade_marker_{label}'] = [d in trade_dates for d in tdf['date']]
-        tdf[f'trade_price_{label}'] = [p if d in trade_dates else np.nan for d, p in zip(tdf['date'], tdf['Close'])]
-        tdf['returns'] = pd.Series(portfolio_values).pct_change().fillna(0)
-        total_return = (portfolio_values[-1] - INITIAL_CASH) / INITIAL_CASH
-        sharpe = (tdf['returns'].mean() - RISK_FREE_RATE) / (tdf['returns'].std() + 1e-9) * np.sqrt(252) if tdf['returns'].std() > 0 else 0
-        running_max = pd.Series(portfolio_values).cummax()
-        drawdown = (pd.Series(portfolio_values) - running_max) / running_max
-        max_drawdown = drawdown.min()
-        win_rate = wins / trades if trades > 0 else 0
-        print(f"\n[{label}] Ticker: {ticker}")
-        print(f"  Total Return: {total_return:.2%}")
-        print(f"  Sharpe Ratio: {sharpe:.2f}")
-        print(f"  Max Drawdown: {max_drawdown:.2%}")
-        print(f"  Win Rate: {win_rate:.2%}")
-        # Plot
-        plt.figure(figsize=(10, 4))
-        plt.plot(tdf['date'], tdf[f'portfolio_value_{label}'], label=f'Equity Curve ({label})')
-        plt.scatter([d for d in trade_dates], [p for p in trade_prices], marker='o', color='red', label='Trade')
-        plt.title(f"Backtest: {ticker} ({label})")
-        plt.xlabel('Date')
-        plt.ylabel('Portfolio Value')
-        plt.legend()
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        plt.show()
-        results.append(tdf)
-    return pd.concat(results)
+    return run_strategy(df, strategy_func, label)[0]
+
+
+def print_summary(metrics):
+    """Mean metrics across tickers for each strategy."""
+    columns = ['total_return', 'sharpe', 'max_drawdown', 'win_rate', 'trades']
+    summary = metrics.groupby('strategy', sort=False)[columns].mean()
+    summary.insert(0, 'tickers', metrics.groupby('strategy', sort=False).size())
+    print(summary.to_string(float_format=lambda x: f'{x:.4f}'))
 
 
 # --- ML PREDICTION GENERATION ---
 def generate_ml_predictions(df):
-    from sklearn.ensemble import RandomForestClassifier
-    features = ['avg_sentiment', 'sentiment_volatility', 'post_volume', 'sentiment_change']
-    # Use only rows with non-null label
-    df = df.copy()
-    df['label'] = df.groupby('tickers')['Close'].transform(lambda x: (x.shift(-1) - x).apply(lambda y: 1 if y > 0.5 else (-1 if y < -0.5 else 0)))
-    df = df.dropna(subset=['label'])
-    df['label'] = df['label'].astype(int)
-    X = df[features]
-    y = df['label']
-    # Train/test split (time-based)
-    split_idx = int(len(df) * 0.8)
-    X_train = X.iloc[:split_idx]
-    y_train = y.iloc[:split_idx]
-    rf = RandomForestClassifier(n_estimators=100, random_state=42)
-    rf.fit(X_train, y_train)
-    y_pred = rf.predict(X)
-    df['ml_action'] = y_pred
+    # Out-of-sample RandomForest actions from walk-forward folds; bars before
+    # the first fold have no prediction and hold
+    from walk_forward import walk_forward
+    keys = [k for k in ['tickers', 'date', 'hour'] if k in df]
+    predictions = walk_forward(df, models=['rf'], save=False)
+    actions = predictions[keys + ['rf_pred']].rename(columns={'rf_pred': 'ml_action'})
+    df = df.merge(actions, on=keys, how='left')
     df.to_csv(ML_PREDICTIONS_CSV, index=False)
     print(f"ML predictions saved to {ML_PREDICTIONS_CSV}")
     return df
 
 
-# --- MAIN ---
-if __name__ == '__main__':
-    df = pd.read_csv(INPUT_CSV)
+# --- RUN ---
+def run_backtests(df, predictions=None, save=True):
+    """
+    Rule-based and ML backtests over df. ``predictions`` (ml_baseline or
+    walk_forward output) supplies out-of-sample ``rf_pred`` as the ML action;
+    without it walk-forward RandomForest predictions are made here.
+    """
     # Rule-based backtest
-    print("\n=== Rule-Based Strategy ===")
-    rule_results = backtest(df, rule_based_strategy, label='Rule')
+    rule_results, rule_metrics = run_strategy(df, rule_based_strategy, label='Rule')
     # ML-based backtest
-    print("\n=== ML-Based Strategy ===")
-    ml_df = generate_ml_predictions(df)
-    ml_results = backtest(ml_df, ml_strategy, label='ML')
+    if predictions is None:
+        ml_df = generate_ml_predictions(df)
+    else:
+        keys = [k for k in ['tickers', 'date', 'hour'] if k in df and k in predictions]
+        actions = predictions[keys + ['rf_pred']].rename(columns={'rf_pred': 'ml_action'})
+        ml_df = df.merge(actions, on=keys, how='left')
+    ml_results, ml_metrics = run_strategy(ml_df, ml_strategy, label='ML')
+    metrics = pd.concat([rule_metrics, ml_metrics], ignore_index=True)
+    print_summary(metrics)
     # Save results
-    rule_results.to_csv('backtest_results_rule.csv', index=False)
-    ml_results.to_csv('backtest_results_ml.csv', index=False)
+    if save:
+        rule_results.to_csv(RESULTS_CSVS['Rule'], index=False)
+        ml_results.to_csv(RESULTS_CSVS['ML'], index=False)
+        metrics.to_csv(METRICS_CSV, index=False)
+    return {'rule': rule_results, 'ml': ml_results, 'metrics': metrics}
+
+
+# --- MAIN ---
+if __name__ == '__main__':
+    run_backtests(read_dataset(INPUT_DATASET))
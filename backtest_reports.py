@@ -0,0 +1,171 @@
+import argparse
+import html
+import json
+import multiprocessing
+import os
+import time
+from collections import namedtuple
+from datetime import datetime
+
+import pandas as pd
+from backtest_framework import METRICS_CSV, RESULTS_CSVS
+
+# --- CONFIGURATION ---
+REPORT_DIR = 'backtest_report'
+CHART_DPI = 80
+CHART_MARGINS = {'left': 0.08, 'right': 0.98, 'top': 0.9, 'bottom': 0.26}
+CHARTS_PER_TASK = 20  # Tickers rendered per worker task
+METRIC_COLUMNS = ['total_return', 'sharpe', 'max_drawdown', 'win_rate', 'trades']
+
+# Backtests only produce results (backtest_framework.run_strategy); this
+# module renders them afterwards. The summary (JSON + HTML table) needs only
+# the metrics table and takes milliseconds. Charts are optional: each is
+# drawn on its own matplotlib Figure (no pyplot, no GUI backend) by a pool
+# of worker processes that receive just the arrays they plot.
+
+ChartJob = namedtuple('ChartJob', ['path', 'ticker', 'label', 'dates', 'equity', 'trade_dates', 'trade_values'])
+
+
+# --- CHARTS ---
+def chart_path(out_dir, label, ticker):
+    safe = ''.join(c if c.isalnum() or c in '-_.' else '_' for c in str(ticker))
+    return os.path.join(out_dir, 'charts', f'{label}_{safe}.png')
+
+
+def chart_jobs(results, label, out_dir):
+    """One ChartJob per ticker of a run_strategy result frame."""
+    jobs = []
+    for ticker, tdf in results.groupby('tickers', sort=False, observed=True):
+        traded = tdf[f'trade_marker_{label}'].to_numpy(dtype=bool)
+        dates = tdf['date'].to_numpy()
+        equity = tdf[f'portfolio_value_{label}'].to_numpy(dtype=float)
+        # Trades are marked on the equity curve (the old plots put the share
+        # price on the portfolio value axis)
+        jobs.append(ChartJob(chart_path(out_dir, label, ticker), ticker, label, dates, equity, dates[traded], equity[traded]))
+    return jobs
+
+
+def render_charts(jobs):
+    """Draw and save equity curves. Returns the number of charts written."""
+    from matplotlib.figure import Figure
+    for job in jobs:
+        fig = Figure(figsize=(10, 4))
+        ax = fig.add_subplot()
+        ax.plot(job.dates, job.equity, label=f'Equity Curve ({job.label})')
+        ax.scatter(job.trade_dates, job.trade_values, marker='o', color='red', label='Trade')
+        ax.set_title(f"Backtest: {job.ticker} ({job.label})")
+        ax.set_xlabel('Date')
+        ax.set_ylabel('Portfolio Value')
+        ax.legend(loc='upper left')  # 'best' searches the data for a free spot on every draw
+        ax.tick_params(axis='x', labelrotation=45)
+        # Fixed margins: tight_layout costs an extra full draw per chart
+        fig.subplots_adjust(**CHART_MARGINS)
+        fig.savefig(job.path, dpi=CHART_DPI)
+    return len(jobs)
+
+
+def render_all(jobs, workers=None):
+    """Render jobs across a process pool, CHARTS_PER_TASK at a time."""
+    if jobs:
+        os.makedirs(os.path.dirname(jobs[0].path), exist_ok=True)
+    tasks = [jobs[i:i + CHARTS_PER_TASK] for i in range(0, len(jobs), CHARTS_PER_TASK)]
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    if workers <= 1:
+        return sum(render_charts(task) for task in tasks)
+    # spawn: workers don't inherit the parent's results frames or matplotlib state
+    with multiprocessing.get_context('spawn').Pool(workers) as pool:
+        return sum(pool.imap_unordered(render_charts, tasks))
+
+
+# --- SUMMARY ---
+def summarize(metrics):
+    """Mean metrics per strategy plus the per-ticker rows, as plain JSON-able data."""
+    strategies = {}
+    for label, group in metrics.groupby('strategy', sort=False):
+        means = group[METRIC_COLUMNS].mean()
+        strategies[label] = {'tickers': len(group), **{k: float(v) for k, v in means.items()}}
+    rows = metrics[['strategy', 'tickers', *METRIC_COLUMNS]].astype({'tickers': str})
+    return {
+        'generated_at': datetime.utcnow().isoformat(timespec='seconds'),
+        'strategies': strategies,
+        'tickers': json.loads(rows.to_json(orient='records')),
+    }
+
+
+def _html_table(frame):
+    head = ''.join(f'<th>{html.escape(str(c))}</th>' for c in frame.columns)
+    body = ''.join(
+        '<tr>' + ''.join(f'<td>{cell}</td>' for cell in row) + '</tr>'
+        for row in frame.itertuples(index=False)
+    )
+    return f'<table><tr>{head}</tr>{body}</table>'
+
+
+def summary_html(summary, charts=False):
+    """One self-contained page: strategy means, then one row per strategy and ticker."""
+    def fmt(value, column):
+        if column in ('total_return', 'max_drawdown', 'win_rate'):
+            return f'{value:.2%}'
+        return f'{value:.2f}' if column == 'sharpe' else str(value)
+
+    means = pd.DataFrame([
+        {'strategy': html.escape(label), **{c: fmt(m[c], c) for c in ['tickers', *METRIC_COLUMNS]}}
+        for label, m in summary['strategies'].items()
+    ])
+    rows = []
+    for r in summary['tickers']:
+        ticker = html.escape(r['tickers'])
+        if charts:
+            path = os.path.relpath(chart_path('.', r['strategy'], r['tickers']))
+            ticker = f'<a href="{html.escape(path)}">{ticker}</a>'
+        rows.append({'strategy': html.escape(r['strategy']), 'tickers': ticker,
+                     **{c: fmt(r[c], c) for c in METRIC_COLUMNS}})
+    return (
+        '<!DOCTYPE html><html><head><meta charset="utf-8"><title>Backtest report</title>'
+        '<style>body{font-family:sans-serif}table{border-collapse:collapse;margin-bottom:2em}'
+        'td,th{border:1px solid #ccc;padding:2px 8px;text-align:right}</style></head><body>'
+        f'<h1>Backtest report</h1><p>Generated {summary["generated_at"]} UTC</p>'
+        f'{_html_table(means)}{_html_table(pd.DataFrame(rows))}</body></html>'
+    )
+
+
+# --- REPORT ---
+def write_report(results, metrics, out_dir=REPORT_DIR, charts=False, workers=None):
+    """
+    Write summary.json and index.html for a backtest run, and with charts=True
+    one equity-curve PNG per strategy and ticker. results maps strategy label
+    to its run_strategy frame (only needed for charts). Returns the summary.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    if charts:
+        jobs = [job for label, frame in results.items() for job in chart_jobs(frame, label, out_dir)]
+        start = time.perf_counter()
+        count = render_all(jobs, workers)
+        print(f"Rendered {count} charts in {time.perf_counter() - start:.1f}s")
+    summary = summarize(metrics)
+    with open(os.path.join(out_dir, 'summary.json'), 'w') as f:
+        json.dump(summary, f, indent=1)
+    with open(os.path.join(out_dir, 'index.html'), 'w') as f:
+        f.write(summary_html(summary, charts))
+    print(f"Backtest report written to {os.path.join(out_dir, 'index.html')}")
+    return summary
+
+
+def report_backtests(output, out_dir=REPORT_DIR, charts=False, workers=None):
+    """write_report for the dict backtest_framework.run_backtests returns."""
+    results = {'Rule': output['rule'], 'ML': output['ml']}
+    return write_report(results, output['metrics'], out_dir, charts, workers)
+
+
+# --- MAIN ---
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Render the last backtest run (backtest_framework.py) as a report.')
+    parser.add_argument('--charts', action='store_true', help='Also save an equity-curve chart per strategy and ticker')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Chart rendering processes')
+    parser.add_argument('--out', default=REPORT_DIR)
+    args = parser.parse_args()
+    metrics = pd.read_csv(METRICS_CSV, dtype={'tickers': str})
+    results = {}
+    if args.charts:
+        results = {label: pd.read_csv(path, parse_dates=['date'], dtype={'tickers': str}) for label, path in RESULTS_CSVS.items()}
+    write_report(results, metrics, args.out, args.charts, args.workers)
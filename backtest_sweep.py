@@ -0,0 +1,166 @@
+import argparse
+import itertools
+import multiprocessing
+import os
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+from backtest_engine import (HOLD, INITIAL_CASH, POSITION_SIZE, RISK_FREE_RATE, TRANSACTION_COST, make_panel,
+                             metrics, panel_returns, simulate, sort_bars, threshold_signals, to_panel)
+from dataset_io import read_dataset
+
+# --- CONFIGURATION ---
+INPUT_DATASET = 'merged_features_daily'
+OUTPUT_CSV = 'backtest_sweep_results.csv'
+FEATURE_COLUMNS = ['avg_sentiment']
+# Grid keys the engine takes; every other key is passed to the strategy
+ENGINE_PARAMS = {
+    'initial_cash': INITIAL_CASH,
+    'position_size': POSITION_SIZE,
+    'transaction_cost': TRANSACTION_COST,
+    'risk_free_rate': RISK_FREE_RATE,
+}
+
+# The parent lays out prices and each feature column as (bar, ticker) panels
+# once and copies them into shared memory blocks. Workers attach to the
+# blocks when they start, so a task is only its parameter dict, and each
+# worker backtests one combination for all tickers per task.
+
+
+# --- STRATEGIES ---
+# A sweep strategy maps the feature panels (column -> (bar, ticker) array)
+# and its grid parameters to a panel of signal codes. It must be defined at
+# module level so worker processes can import it.
+def threshold_strategy(features, buy_above=0.2, sell_below=-0.2, column='avg_sentiment'):
+    """rule_based_strategy with its thresholds as parameters."""
+    return threshold_signals(features[column], buy_above, sell_below)
+
+
+def expand_grid(grid):
+    """Every combination of a {name: [values]} grid, as a list of dicts."""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+# --- SHARED PANELS ---
+def share_arrays(arrays):
+    """Copy arrays into new shared memory blocks. Returns (blocks, specs); specs are what attach() takes."""
+    blocks, specs = [], {}
+    for name, array in arrays.items():
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, array.dtype, buffer=block.buf)[...] = array
+        blocks.append(block)
+        specs[name] = (block.name, array.shape, array.dtype.str)
+    return blocks, specs
+
+
+def attach(specs):
+    """
+    Read-only views of blocks made by share_arrays. Returns (blocks, arrays);
+    keep blocks open while in use. Pool workers share the parent's resource
+    tracker, so attaching does not take ownership: the parent unlinks.
+    """
+    blocks, arrays = [], {}
+    for name, (block_name, shape, dtype) in specs.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        view = np.ndarray(shape, dtype, buffer=block.buf)
+        view.flags.writeable = False
+        blocks.append(block)
+        arrays[name] = view
+    return blocks, arrays
+
+
+# --- WORKERS ---
+_shared = {}
+
+
+def _init_worker(specs, lengths, strategy):
+    _shared['blocks'], arrays = attach(specs)
+    _shared['prices'] = arrays.pop('Close')
+    _shared['features'] = arrays
+    _shared['lengths'] = lengths
+    _shared['strategy'] = strategy
+
+
+def _run_combination(job):
+    index, params = job
+    return index, backtest_panel(_shared['prices'], _shared['features'], _shared['lengths'], _shared['strategy'], params)
+
+
+def backtest_panel(prices, features, lengths, strategy, params):
+    """Metrics per ticker (dict of arrays) for one parameter combination on shared panels."""
+    engine = {**ENGINE_PARAMS, **{k: v for k, v in params.items() if k in ENGINE_PARAMS}}
+    signals = np.asarray(strategy(features, **{k: v for k, v in params.items() if k not in ENGINE_PARAMS}), np.int8)
+    signals = np.where(np.arange(len(prices))[:, None] < lengths, signals, HOLD)  # Padding never trades
+    sim = simulate(prices, signals, engine['initial_cash'], engine['position_size'], engine['transaction_cost'])
+    returns = panel_returns(sim.equity, lengths)
+    return metrics(sim.equity, returns, lengths, sim.wins, sim.trades, engine['initial_cash'], engine['risk_free_rate'])
+
+
+# --- SWEEP ---
+def sweep(df, grid, strategy=threshold_strategy, columns=FEATURE_COLUMNS, workers=None):
+    """
+    Backtest strategy for every combination in grid across a process pool.
+    Returns one row per combination and ticker: the parameters, the ticker
+    and its total_return, sharpe, max_drawdown, win_rate and trades.
+    """
+    combinations = expand_grid(grid)
+    df = sort_bars(df)
+    panel = make_panel(df['tickers'])
+    arrays = {'Close': to_panel(panel, df['Close'].to_numpy(dtype=float), np.nan)}
+    for column in columns:
+        arrays[column] = to_panel(panel, df[column].to_numpy(dtype=float), np.nan)
+    workers = min(workers or os.cpu_count() or 1, len(combinations))
+    results = [None] * len(combinations)
+    if workers <= 1:
+        prices = arrays.pop('Close')
+        for index, params in enumerate(combinations):
+            results[index] = backtest_panel(prices, arrays, panel.lengths, strategy, params)
+    else:
+        blocks, specs = share_arrays(arrays)
+        del arrays
+        try:
+            # spawn: workers start clean and only see the panels through shared memory
+            with multiprocessing.get_context('spawn').Pool(
+                    workers, _init_worker, (specs, panel.lengths, strategy)) as pool:
+                for index, table in pool.imap_unordered(_run_combination, enumerate(combinations)):
+                    results[index] = table
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+    frames = [
+        pd.DataFrame({**params, 'tickers': panel.tickers, **table})
+        for params, table in zip(combinations, results)
+    ]
+    return pd.concat(frames, ignore_index=True)
+
+
+# --- MAIN ---
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Backtest the rule-based strategy over a grid of parameters.')
+    parser.add_argument('--buy-above', type=float, nargs='+', default=[0.1, 0.2, 0.3])
+    parser.add_argument('--sell-below', type=float, nargs='+', default=[-0.1, -0.2, -0.3])
+    parser.add_argument('--position-size', type=int, nargs='+', default=[POSITION_SIZE])
+    parser.add_argument('--transaction-cost', type=float, nargs='+', default=[TRANSACTION_COST])
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--input', default=INPUT_DATASET)
+    parser.add_argument('--output', default=OUTPUT_CSV)
+    args = parser.parse_args()
+    grid = {
+        'buy_above': args.buy_above,
+        'sell_below': args.sell_below,
+        'position_size': args.position_size,
+        'transaction_cost': args.transaction_cost,
+    }
+    df = read_dataset(args.input, columns=['tickers', 'date', 'Close', *FEATURE_COLUMNS])
+    start = time.perf_counter()
+    results = sweep(df, grid, workers=args.workers)
+    elapsed = time.perf_counter() - start
+    results.to_csv(args.output, index=False)
+    summary = results.groupby(list(grid))[['total_return', 'sharpe', 'max_drawdown', 'win_rate']].mean()
+    print(summary.sort_values('sharpe', ascending=False).head(10).to_string())
+    print(f"{len(expand_grid(grid))} combinations x {results['tickers'].nunique()} tickers in {elapsed:.1f}s; "
+          f"results saved to {args.output}")
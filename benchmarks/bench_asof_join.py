@@ -0,0 +1,62 @@
+"""Hourly sentiment/price alignment: exact-key merge + groupby.apply(ffill) vs asof_join.
+
+    python -m benchmarks.bench_asof_join --tickers 100 --years 3
+Sentiment has a bucket for every UTC hour; bars are regular-session hourly bars.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from asof_join import EXCHANGE_TZ, asof_join, grouped_ffill
+
+
+def make_data(n_tickers, years):
+    rng = np.random.default_rng(0)
+    tickers = [f'T{i:04d}' for i in range(n_tickers)]
+    hours = pd.date_range('2021-01-01', periods=years * 365 * 24, freq='h')
+    buckets = pd.MultiIndex.from_product([tickers, hours], names=['tickers', 'start']).to_frame(index=False)
+    buckets['date'] = buckets['start'].dt.normalize()
+    buckets['hour'] = buckets['start'].dt.hour
+    buckets['avg_sentiment'] = rng.uniform(-1, 1, len(buckets))
+    buckets = buckets.drop(columns='start')
+    sessions = pd.bdate_range('2021-01-01', periods=years * 252)
+    local = (sessions.repeat(7) + pd.to_timedelta(np.tile(np.arange(7) + 9.5, len(sessions)), unit='h')).tz_localize(EXCHANGE_TZ)
+    bars = pd.MultiIndex.from_product([tickers, local.tz_convert('UTC')], names=['tickers', 'timestamp']).to_frame(index=False)
+    bars['Close'] = rng.uniform(10, 100, len(bars))
+    return buckets, bars
+
+
+def legacy_merge(buckets, bars):
+    # market_data_merge.py before the as-of join
+    local = bars['timestamp'].dt.tz_convert(EXCHANGE_TZ)
+    price_df = bars.drop(columns='timestamp').assign(date=local.dt.tz_localize(None).dt.normalize(), hour=local.dt.hour)
+    merged = pd.merge(buckets, price_df, how='left', on=['tickers', 'date', 'hour'])
+    merged = merged.sort_values(['tickers', 'date', 'hour'])
+    return merged.groupby('tickers').apply(lambda g: g.ffill()).reset_index(drop=True)
+
+
+def new_merge(buckets, bars):
+    merged = asof_join(buckets, bars, '1h')
+    return grouped_ffill(merged, [c for c in merged.columns if c not in ('tickers', 'date', 'hour')])
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    out = fn(*args)
+    return time.perf_counter() - start, out
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tickers', type=int, default=100)
+    parser.add_argument('--years', type=int, default=3)
+    args = parser.parse_args()
+    buckets, bars = make_data(args.tickers, args.years)
+    print(f"{len(buckets):,} hourly buckets, {len(bars):,} bars ({args.tickers} tickers x {args.years} years)")
+    legacy_s, legacy = timed(legacy_merge, buckets, bars)
+    new_s, new = timed(new_merge, buckets, bars)
+    print(f"{'exact merge + apply(ffill)':<30}{legacy_s:>8.2f}s  rows with a price: {legacy['Close'].notna().sum():,}")
+    print(f"{'asof_join + grouped ffill':<30}{new_s:>8.2f}s  rows with a price: {new['Close'].notna().sum():,}")
+    print(f"speedup: {legacy_s / new_s:.1f}x")
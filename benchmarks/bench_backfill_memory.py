@@ -0,0 +1,75 @@
+"""Peak RSS of loading the unscored backlog: list(find()) vs streamed chunks.
+
+Needs a local mongod. Seeds a separate database with synthetic unscored posts:
+    python -m benchmarks.bench_backfill_memory --posts 1000000
+Each mode runs in a fresh interpreter so peak RSS is not shared.
+"""
+import argparse
+import random
+import subprocess
+import sys
+
+import pymongo
+
+import sentiment_analysis as sa
+import storage
+
+BENCH_DB_NAME = 'reddit_sentiment_bench'
+MEASURE = '''
+import resource, sys, storage, sentiment_analysis as sa
+storage.DB_NAME = {db!r}
+seen = 0
+if {mode!r} == 'list':
+    posts = list(sa.collection.find(sa.UNSCORED_QUERY))
+    seen = len(posts)
+else:
+    for chunk in sa.iter_unscored_chunks({chunk_size}):
+        seen += len(chunk)
+# ru_maxrss is in bytes on macOS and KiB on Linux
+print(seen, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (2**20 if sys.platform == 'darwin' else 1024))
+'''
+
+
+def seed(n_posts):
+    collection = pymongo.MongoClient(storage.MONGO_URI)[BENCH_DB_NAME][storage.COLLECTION_NAME]
+    if collection.count_documents({}) == n_posts:
+        storage.setup(collection)
+        return
+    collection.drop()
+    rng = random.Random(0)
+    words = 'calls puts earnings moon dip squeeze guidance revenue bullish bearish'.split()
+    batch = []
+    for i in range(n_posts):
+        batch.append({
+            'id': f'p{i}', 'subreddit': 'wallstreetbets', 'tickers': ['GME'],
+            'title': ' '.join(rng.choices(words, k=12)),
+            'selftext': ' '.join(rng.choices(words, k=rng.randint(0, 300))),
+            'score': i, 'num_comments': 0, 'permalink': f'/r/wsb/{i}', 'url': f'https://example.com/{i}',
+            storage.PENDING_FIELD: True,
+        })
+        if len(batch) == 10_000:
+            collection.insert_many(batch)
+            batch = []
+    if batch:
+        collection.insert_many(batch)
+    storage.setup(collection)
+
+
+def peak_rss(mode, chunk_size):
+    code = MEASURE.format(db=BENCH_DB_NAME, mode=mode, chunk_size=chunk_size)
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    seen, peak_mb = out.stdout.split()
+    return int(seen), float(peak_mb)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--posts', type=int, default=1_000_000)
+    parser.add_argument('--chunk-size', type=int, default=sa.BACKFILL_CHUNK_SIZE)
+    args = parser.parse_args()
+    seed(args.posts)
+    print(f"{'mode':<24}{'posts':>10}{'peak RSS (MB)':>16}")
+    for mode in ('list', 'stream'):
+        seen, rss = peak_rss(mode, args.chunk_size)
+        label = 'list(find())' if mode == 'list' else f'chunks of {args.chunk_size}'
+        print(f"{label:<24}{seen:>10}{rss:>16.0f}")
@@ -0,0 +1,69 @@
+"""Backtest with inline plotting (the old backtest()) vs headless + deferred reports.
+
+    python -m benchmarks.bench_backtest_reports --tickers 500 --bars 252
+The inline mode draws a pyplot figure per ticker inside the backtest as
+before (Agg backend, so plt.show() doesn't block). The headless mode only
+simulates and writes the JSON/HTML summary; charts are then timed
+separately with one worker and with every core.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import matplotlib
+
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+import backtest_framework as bf
+import backtest_reports as br
+from benchmarks.bench_backtest_engine import make_bars
+
+
+def inline_plots(df, label='Rule'):
+    results, _ = bf.run_strategy(df, bf.rule_based_strategy, label)
+    for ticker, tdf in results.groupby('tickers', sort=False):
+        trades = tdf[tdf[f'trade_marker_{label}']]
+        plt.figure(figsize=(10, 4))
+        plt.plot(tdf['date'], tdf[f'portfolio_value_{label}'], label=f'Equity Curve ({label})')
+        plt.scatter(trades['date'], trades['Close'], marker='o', color='red', label='Trade')
+        plt.title(f"Backtest: {ticker} ({label})")
+        plt.xlabel('Date')
+        plt.ylabel('Portfolio Value')
+        plt.legend()
+        plt.xticks(rotation=45)
+        plt.tight_layout()
+        plt.show()
+        plt.close()  # The old loop never closed them; closing only flatters it
+    return results
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tickers', type=int, default=500)
+    parser.add_argument('--bars', type=int, default=252)
+    args = parser.parse_args()
+    df = make_bars(args.tickers, args.bars)
+    out = tempfile.mkdtemp()
+    cores = os.cpu_count() or 1
+
+    inline_s = timed(lambda: inline_plots(df))
+    results, metrics = bf.run_strategy(df, bf.rule_based_strategy, 'Rule')
+    headless_s = timed(lambda: br.write_report({'Rule': bf.run_strategy(df, bf.rule_based_strategy, 'Rule')[0]},
+                                               metrics, out))
+    charts_1_s = timed(lambda: br.write_report({'Rule': results}, metrics, out, charts=True, workers=1))
+    charts_n_s = timed(lambda: br.write_report({'Rule': results}, metrics, out, charts=True, workers=cores)) if cores > 1 else None
+
+    print(f'{args.tickers} tickers x {args.bars} bars, {cores} cores')
+    print(f"{'inline plots (old backtest)':<34}{inline_s:>8.2f}s")
+    print(f"{'headless + summary report':<34}{headless_s:>8.2f}s  ({inline_s / headless_s:.0f}x)")
+    print(f"{'charts, 1 worker':<34}{charts_1_s:>8.2f}s")
+    if charts_n_s:
+        print(f"{f'charts, {cores} workers':<34}{charts_n_s:>8.2f}s  ({charts_1_s / charts_n_s:.1f}x)")
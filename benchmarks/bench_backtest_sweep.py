@@ -0,0 +1,46 @@
+"""Parameter sweep: wall time and scaling with the number of worker processes.
+
+    python -m benchmarks.bench_backtest_sweep --tickers 1000 --bars 2520 --combinations 64
+Runs the same threshold grid with 1, 2, 4, ... workers (up to the core count)
+and reports speedup and parallel efficiency against one worker. The panels
+are shared, so per-task pickling is just a parameter dict whatever the data size.
+"""
+import argparse
+import os
+import pickle
+import time
+
+import numpy as np
+
+from backtest_sweep import sweep
+from benchmarks.bench_backtest_engine import make_bars
+
+
+def make_grid(n):
+    side = max(int(np.sqrt(n)), 1)
+    return {'buy_above': list(np.linspace(0.05, 0.4, side)), 'sell_below': list(np.linspace(-0.4, -0.05, n // side))}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tickers', type=int, default=1000)
+    parser.add_argument('--bars', type=int, default=2520)
+    parser.add_argument('--combinations', type=int, default=64)
+    parser.add_argument('--workers', type=int, nargs='+')
+    args = parser.parse_args()
+    cores = os.cpu_count() or 1
+    workers = args.workers or [w for w in (1, 2, 4, 8, 16, 32) if w <= cores]
+    bars = make_bars(args.tickers, args.bars)
+    grid = make_grid(args.combinations)
+    n = len(grid['buy_above']) * len(grid['sell_below'])
+    panel_mb = 2 * args.tickers * args.bars * 8 / 1e6
+    print(f'{n} combinations x {args.tickers} tickers x {args.bars} bars on {cores} cores; '
+          f'{panel_mb:.0f} MB of panels shared, {len(pickle.dumps({"buy_above": 0.1, "sell_below": -0.1}))} bytes per task')
+    baseline = None
+    for count in workers:
+        start = time.perf_counter()
+        sweep(bars, grid, workers=count)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        speedup = baseline / elapsed
+        print(f'{count:>3} workers {elapsed:>8.1f}s  speedup {speedup:5.1f}x  efficiency {speedup / count:4.0%}')
@@ -0,0 +1,76 @@
+"""Load time and size of the hourly merged features: CSV vs the Parquet dataset layer.
+
+    python -m benchmarks.bench_dataset_io --tickers 200 --days 730
+Writes into a temporary directory; each read is timed on a warm page cache.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import dataset_io
+from dataset_io import read_dataset, write_dataset
+
+NAME = 'merged_features_hourly'
+PROJECTION = ['tickers', 'date', 'hour', 'avg_sentiment', 'Close']
+
+
+def make_frame(n_tickers, n_days):
+    rng = np.random.default_rng(0)
+    index = pd.MultiIndex.from_product(
+        [[f'T{i:04d}' for i in range(n_tickers)], pd.date_range('2023-01-01', periods=n_days), range(7, 20)],
+        names=['tickers', 'date', 'hour'])
+    frame = index.to_frame(index=False)
+    n = len(frame)
+    for col in ['avg_sentiment', 'sentiment_volatility', 'sentiment_change', 'rolling_avg_sentiment', 'momentum_3h',
+                'Open', 'High', 'Low', 'Close']:
+        frame[col] = rng.normal(size=n)
+    frame['post_volume'] = rng.integers(1, 500, n)
+    frame['Volume'] = rng.integers(1_000, 10_000_000, n)
+    return frame
+
+
+def du(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+
+
+def timed(fn):
+    fn()  # warm the page cache
+    start = time.perf_counter()
+    rows = len(fn())
+    return time.perf_counter() - start, rows
+
+
+def read_csv(path, usecols=None, ticker=None):
+    frame = pd.read_csv(path, usecols=usecols, parse_dates=['date'])
+    return frame[frame['tickers'] == ticker] if ticker else frame
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tickers', type=int, default=200)
+    parser.add_argument('--days', type=int, default=730)
+    args = parser.parse_args()
+    frame = make_frame(args.tickers, args.days)
+    with tempfile.TemporaryDirectory() as tmp:
+        dataset_io.DATA_DIR = tmp
+        csv_path = os.path.join(tmp, 'bench.csv')
+        frame.to_csv(csv_path, index=False)
+        parquet_path = write_dataset(frame, NAME)
+        print(f"{len(frame):,} rows; CSV {du(csv_path) / 2**20:.0f} MB, Parquet {du(parquet_path) / 2**20:.0f} MB")
+        cases = [
+            ('full table', lambda: read_csv(csv_path), lambda: read_dataset(NAME)),
+            ('5 columns', lambda: read_csv(csv_path, PROJECTION), lambda: read_dataset(NAME, columns=PROJECTION)),
+            ('one ticker', lambda: read_csv(csv_path, ticker='T0000'), lambda: read_dataset(NAME, tickers=['T0000'])),
+        ]
+        print(f"{'read':<14}{'rows':>12}{'CSV (s)':>10}{'Parquet (s)':>13}{'speedup':>9}")
+        for label, csv_fn, parquet_fn in cases:
+            csv_s, rows = timed(csv_fn)
+            parquet_s, parquet_rows = timed(parquet_fn)
+            assert rows == parquet_rows
+            print(f"{label:<14}{rows:>12,}{csv_s:>10.2f}{parquet_s:>13.2f}{csv_s / parquet_s:>8.1f}x")
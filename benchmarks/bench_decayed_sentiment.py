@@ -0,0 +1,62 @@
+"""Decayed sentiment: replaying all history each run vs resuming from the saved state.
+
+    python -m benchmarks.bench_decayed_sentiment --posts 1000000 --new 20000
+Streams --posts historical posts once, then times a run that adds --new posts
+both ways. Resuming only touches the new posts, whatever the history length.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from decayed_sentiment import DecayedSentiment
+from feature_engineering import GRANULARITIES, decayed_features
+
+
+def make_posts(n, start, seed, n_tickers=300):
+    rng = np.random.default_rng(seed)
+    seconds = np.sort(rng.integers(0, max(n // 50, 1) * 60, n))
+    posts = pd.DataFrame({
+        'id': [f'p{seed}_{i}' for i in range(n)],
+        'tickers': rng.choice([f'T{i:03d}' for i in range(n_tickers)], n),
+        'datetime': pd.Timestamp(start) + pd.to_timedelta(seconds, unit='s'),
+        'compound': rng.uniform(-1, 1, n),
+        'score': rng.integers(0, 1000, n),
+        'num_comments': rng.integers(0, 200, n),
+    })
+    posts['date'] = posts['datetime'].dt.normalize()
+    posts['hour'] = posts['datetime'].dt.hour
+    return posts
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--posts', type=int, default=1_000_000)
+    parser.add_argument('--new', type=int, default=20_000)
+    args = parser.parse_args()
+    history = make_posts(args.posts, '2023-01-01', seed=0)
+    new = make_posts(args.new, history['datetime'].max() + pd.Timedelta(minutes=1), seed=1)
+    granularities = list(GRANULARITIES)
+
+    start = time.perf_counter()
+    aggregator = DecayedSentiment()
+    decayed_features(history, aggregator, granularities)
+    history_s = time.perf_counter() - start
+    path = os.path.join(tempfile.mkdtemp(), 'state.json')
+    aggregator.save(path)
+
+    start = time.perf_counter()
+    decayed_features(pd.concat([history, new]), DecayedSentiment(), granularities)
+    replay_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    resumed, _ = DecayedSentiment.load(path)
+    decayed_features(new, resumed, granularities)
+    resume_s = time.perf_counter() - start
+
+    print(f'{args.posts:,} historical posts streamed in {history_s:.2f}s ({args.posts / history_s:,.0f} posts/s)')
+    print(f'Run with {args.new:,} new posts: replay {replay_s:.2f}s, resume from state {resume_s:.3f}s '
+          f'({replay_s / resume_s:.0f}x)')
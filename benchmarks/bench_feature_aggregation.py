@@ -0,0 +1,67 @@
+"""Daily + hourly feature aggregation: pandas (fetch every post) vs MongoDB pipelines.
+
+Needs a local mongod. Seeds a separate database with synthetic scored posts:
+    python -m benchmarks.bench_feature_aggregation --posts 1000000
+Both backends must produce the same frames; the script fails if they differ.
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+import pandas.testing as pdt
+import pymongo
+
+import feature_engineering as fe
+import storage
+
+BENCH_DB_NAME = 'reddit_sentiment_bench_features'
+TICKERS = ['TSLA', 'AAPL', 'GME', 'AMC', 'NVDA', 'MSFT', 'AMZN', 'META', 'GOOG', 'PLTR']
+
+
+def seed(collection, n_posts):
+    if collection.count_documents({}) == n_posts:
+        return
+    collection.drop()
+    rng = random.Random(0)
+    words = 'calls puts earnings moon dip squeeze guidance revenue bullish bearish'.split()
+    start = datetime(2024, 1, 1)
+    batch = []
+    for i in range(n_posts):
+        neg, neu = rng.random() / 2, rng.random() / 2
+        batch.append({
+            'id': f'p{i}', 'subreddit': 'wallstreetbets', 'tickers': rng.sample(TICKERS, rng.randint(1, 3)),
+            'title': ' '.join(rng.choices(words, k=12)),
+            'selftext': ' '.join(rng.choices(words, k=rng.randint(0, 300))),
+            'created_utc': start + timedelta(seconds=rng.randrange(365 * 86400)),
+            'score': i, 'num_comments': 0,
+            'sentiment': {'neg': 0.1, 'neu': 0.8, 'pos': 0.1, 'compound': rng.uniform(-1, 1)},
+            'finbert_sentiment': {'finbert_negative': neg, 'finbert_neutral': neu, 'finbert_positive': 1 - neg - neu},
+        })
+        if len(batch) == 10_000:
+            collection.insert_many(batch)
+            batch = []
+    if batch:
+        collection.insert_many(batch)
+
+
+def timed(backend):
+    start = time.perf_counter()
+    frames = fe.aggregate_buckets(tuple(fe.GRANULARITIES), backend=backend)
+    return time.perf_counter() - start, frames
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--posts', type=int, default=1_000_000)
+    args = parser.parse_args()
+    fe.collection = pymongo.MongoClient(storage.MONGO_URI)[BENCH_DB_NAME][storage.COLLECTION_NAME]
+    seed(fe.collection, args.posts)
+    storage.setup(fe.collection)
+    results = {backend: timed(backend) for backend in fe.BACKENDS}
+    for granularity in fe.GRANULARITIES:
+        pdt.assert_frame_equal(results['mongo'][1][granularity], results['pandas'][1][granularity], check_dtype=False)
+    print(f"{'backend':<10}{'posts':>10}{'daily rows':>12}{'hourly rows':>13}{'seconds':>10}")
+    for backend, (elapsed, frames) in results.items():
+        print(f"{backend:<10}{args.posts:>10}{len(frames['daily']):>12}{len(frames['hourly']):>13}{elapsed:>10.2f}")
+    print(f"speedup: {results['pandas'][0] / results['mongo'][0]:.1f}x")
@@ -0,0 +1,46 @@
+"""Throughput of per-post vs batched FinBERT scoring.
+
+Run from the repository root:
+    python -m benchmarks.bench_finbert_batching --posts 512
+"""
+import argparse
+import random
+import time
+
+from sentiment_analysis import FINBERT_BATCH_SIZE, clean_text, finbert_score, finbert_score_batch
+
+WORDS = ['calls', 'puts', 'earnings', 'beat', 'miss', 'guidance', 'moon', 'dip', 'buy', 'sell',
+         'revenue', 'margin', 'short', 'squeeze', 'bullish', 'bearish', 'dividend', 'debt']
+
+
+# --- SYNTHETIC POSTS ---
+def make_posts(n, seed=0):
+    # Mix of short titles and long selftext bodies, like a real WSB day
+    rng = random.Random(seed)
+    posts = []
+    for _ in range(n):
+        length = rng.choice([8, 12, 20, 60, 200, 400])
+        posts.append(clean_text(' '.join(rng.choice(WORDS) for _ in range(length))))
+    return posts
+
+
+def posts_per_sec(fn, texts):
+    start = time.perf_counter()
+    fn(texts)
+    return len(texts) / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--posts', type=int, default=512)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[8, 16, FINBERT_BATCH_SIZE, 64])
+    args = parser.parse_args()
+
+    texts = make_posts(args.posts)
+    finbert_score_batch(texts[:8], batch_size=8)  # warm-up
+    baseline = posts_per_sec(lambda t: [finbert_score(x) for x in t], texts)
+    print(f"{'mode':<16}{'posts/sec':>12}{'speedup':>10}")
+    print(f"{'per-post':<16}{baseline:>12.1f}{1.0:>10.2f}")
+    for size in args.batch_sizes:
+        rate = posts_per_sec(lambda t: finbert_score_batch(t, batch_size=size), texts)
+        print(f"{f'batch={size}':<16}{rate:>12.1f}{rate / baseline:>10.2f}")
@@ -0,0 +1,61 @@
+"""Cold-start cost of importing sentiment_analysis.
+
+Each measurement runs in a fresh interpreter. Compare against an older
+revision of the module with --baseline-rev:
+    python -m benchmarks.bench_import_time --baseline-rev 1ff4e0b
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+MODULES = ['sentiment_analysis.py', 'sentiment_cache.py', 'lazy_resource.py']
+IMPORT_SNIPPET = (
+    "import time; t = time.perf_counter(); import sentiment_analysis; "
+    "print(time.perf_counter() - t)"
+)
+FIRST_USE_SNIPPET = (
+    "import time; t = time.perf_counter(); import sentiment_analysis; "
+    "sentiment_analysis.clean_text('warm up the stopwords'); print(time.perf_counter() - t)"
+)
+
+
+def time_snippet(snippet, cwd, repeats):
+    timings = []
+    for _ in range(repeats):
+        out = subprocess.run([sys.executable, '-c', snippet], cwd=cwd, capture_output=True, text=True)
+        if out.returncode != 0:
+            return None
+        timings.append(float(out.stdout.strip().splitlines()[-1]))
+    return min(timings)
+
+
+def checkout_revision(rev, dest):
+    # Materialise just the sentiment modules from an older commit
+    for name in MODULES:
+        out = subprocess.run(['git', 'show', f'{rev}:{name}'], capture_output=True, text=True)
+        if out.returncode == 0:
+            with open(os.path.join(dest, name), 'w') as f:
+                f.write(out.stdout)
+
+
+def report(label, cwd, repeats):
+    cold = time_snippet(IMPORT_SNIPPET, cwd, repeats)
+    first = time_snippet(FIRST_USE_SNIPPET, cwd, repeats)
+    fmt = lambda v: 'failed' if v is None else f'{v:.3f}s'
+    print(f"{label:<20}{fmt(cold):>14}{fmt(first):>22}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--baseline-rev', help='git revision to compare against (e.g. the commit before lazy loading)')
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'version':<20}{'cold import':>14}{'import + clean_text':>22}")
+    if args.baseline_rev:
+        with tempfile.TemporaryDirectory() as tmp:
+            checkout_revision(args.baseline_rev, tmp)
+            report(args.baseline_rev, tmp, args.repeats)
+    report('working tree', os.getcwd(), args.repeats)
@@ -0,0 +1,86 @@
+"""Training-set preparation: apply() labels + per-model df[features] copies vs ml_dataset.build_dataset.
+
+    python -m benchmarks.bench_ml_dataset --rows 10000000
+'legacy' labels with the old groupby/apply lambda and converts df[features]
+once for RandomForest and once for XGBoost (as each fit() does with a
+DataFrame); its rule-based scorer (a row-wise apply) is timed on --rule-rows
+rows and extrapolated. 'dataset' builds the labels and one float32 matrix
+and scores the rule from its source column. Memory is what tracemalloc sees
+(NumPy and pandas buffers) from the input frame onwards: what the build
+keeps, and its peak, measured in a second run since tracing slows
+everything down. Each run is a fresh interpreter.
+"""
+import argparse
+import subprocess
+import sys
+
+MEASURE = '''
+import time, tracemalloc
+import numpy as np
+import pandas as pd
+import ml_baseline as mlb
+from ml_dataset import FEATURES, build_dataset, rule_scores
+
+rows, n_tickers = {rows}, 1000
+rng = np.random.default_rng(0)
+per_ticker = rows // n_tickers
+df = pd.DataFrame({{
+    'tickers': np.repeat([f'T{{i:04d}}' for i in range(n_tickers)], per_ticker),
+    'date': np.tile(pd.date_range('2000-01-01', periods=per_ticker, freq='D'), n_tickers),
+    'Close': 50 + np.cumsum(rng.normal(0, 1, n_tickers * per_ticker)),
+    **{{c: rng.normal(0, 1, n_tickers * per_ticker) for c in FEATURES}},
+}})
+if {trace}:
+    tracemalloc.start()  # NumPy and pandas buffers are traced (and everything is slower)
+start = time.perf_counter()
+if {mode!r} == 'legacy':
+    labelled = df.sort_values(['tickers', 'date']).copy()
+    labelled['label'] = labelled.groupby('tickers')['Close'].transform(
+        lambda x: (x.shift(-1) - x).apply(lambda y: 1 if y > 0.5 else (-1 if y < -0.5 else 0)))
+    X_rf = np.asarray(labelled[FEATURES], dtype=np.float32)  # RandomForest's check_array
+    X_xgb = labelled[FEATURES].to_numpy()  # XGBoost's DataFrame conversion
+    y = labelled['label'].to_numpy()
+    rule_start = time.perf_counter()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    subset = labelled.iloc[:{rule_rows}]
+    subset.apply(mlb.rule_based_strategy, axis=1)
+    rule_s = (time.perf_counter() - rule_start) * len(labelled) / len(subset)
+else:
+    data = build_dataset(df)
+    rule_start = time.perf_counter()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rule_scores(data)
+    rule_s = time.perf_counter() - rule_start
+build_s = rule_start - start
+print(len(df), build_s, rule_s, retained / 2**20, peak / 2**20)
+'''
+
+
+def measure(mode, rows, rule_rows, trace):
+    """(rows, build s, rule s, retained MB, peak MB during the build), or None if killed (out of memory)."""
+    out = subprocess.run([sys.executable, '-c', MEASURE.format(mode=mode, rows=rows, rule_rows=rule_rows, trace=trace)],
+                         capture_output=True, text=True)
+    if out.returncode < 0:
+        return None
+    out.check_returncode()
+    n, build_s, rule_s, retained_mb, peak_mb = out.stdout.split()
+    return int(n), float(build_s), float(rule_s), float(retained_mb), float(peak_mb)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    parser.add_argument('--rule-rows', type=int, default=200_000)
+    args = parser.parse_args()
+    print(f"{'mode':<10}{'rows':>12}{'build (s)':>11}{'rule (s)':>11}{'retained (MB)':>15}{'peak (MB)':>11}")
+    for mode in ('legacy', 'dataset'):
+        result, traced = measure(mode, args.rows, args.rule_rows, False), measure(mode, args.rows, args.rule_rows, True)
+        if result is None or traced is None:
+            print(f'{mode:<10}{"killed (out of memory)":>46}')
+            continue
+        n, build_s, rule_s, _, _ = result
+        _, _, _, retained_mb, peak_mb = traced
+        rule = f'~{rule_s:.0f}' if mode == 'legacy' else f'{rule_s:.2f}'
+        print(f'{mode:<10}{n:>12,}{build_s:>11.1f}{rule:>11}{retained_mb:>15.0f}{peak_mb:>11.0f}')
@@ -0,0 +1,82 @@
+"""Peak RSS of building the exploded post frame: full documents vs projected, compact columns.
+
+    python -m benchmarks.bench_post_frame_memory --posts 1000000
+'full' is the old loader: list(find()) of whole documents, json_normalize and
+explode, which copies every text column once per ticker. 'compact' is
+feature_engineering.load_posts: MongoDB sends only POST_FIELDS (simulated by
+yielding projected documents) and posts_frame reads them in one pass.
+Each mode runs in a fresh interpreter so peak RSS is not shared.
+"""
+import argparse
+import subprocess
+import sys
+
+MEASURE = '''
+import random, resource, sys
+from datetime import datetime, timedelta
+import pandas as pd
+import feature_engineering as fe
+
+def docs(n, projected):
+    rng = random.Random(0)
+    words = 'calls puts earnings moon dip squeeze guidance revenue bullish bearish'.split()
+    tickers = [f'T{{i:03d}}' for i in range(500)]
+    start = datetime(2023, 1, 1)
+    for i in range(n):
+        doc = {{
+            '_id': object(), 'id': f'p{{i}}', 'subreddit': rng.choice(['wallstreetbets', 'stocks', 'investing']),
+            'tickers': rng.sample(tickers, rng.choice([1, 1, 1, 2, 3])),
+            'created_utc': start + timedelta(seconds=rng.randrange(365 * 86400)),
+            'title': ' '.join(rng.choices(words, k=12)),
+            'selftext': ' '.join(rng.choices(words, k=rng.randint(0, 300))),
+            'permalink': f'/r/wsb/{{i}}', 'url': f'https://example.com/{{i}}',
+            'score': rng.randrange(1000), 'num_comments': rng.randrange(200), 'scored_at': start,
+            'sentiment': {{'neg': 0.1, 'neu': 0.8, 'pos': 0.1, 'compound': rng.uniform(-1, 1)}},
+            'finbert_sentiment': {{'finbert_positive': 0.3, 'finbert_neutral': 0.4, 'finbert_negative': 0.3}},
+        }}
+        if projected:
+            # What MongoDB returns for fe.POST_FIELDS
+            doc = {{key: doc[key] for key in ('id', 'subreddit', 'tickers', 'created_utc', 'score', 'num_comments',
+                                             'finbert_sentiment')}} | {{'sentiment': {{'compound': doc['sentiment']['compound']}}}}
+        yield doc
+
+def full(n):
+    df = pd.DataFrame(list(docs(n, projected=False)))
+    sentiment_df = pd.json_normalize(df['sentiment'])
+    finbert_df = pd.json_normalize([d if isinstance(d, dict) else {{}} for d in df['finbert_sentiment']])
+    df = pd.concat([df, sentiment_df, finbert_df.reindex(columns=fe.FINBERT_FIELDS)], axis=1)
+    df['datetime'] = pd.to_datetime(df['created_utc'])
+    df['date'] = df['datetime'].dt.normalize()
+    df['hour'] = df['datetime'].dt.hour
+    return df.explode('tickers')
+
+df = full({posts}) if {mode!r} == 'full' else fe.posts_frame(docs({posts}, projected=True))
+fe.aggregate(df, fe.GRANULARITIES['hourly']['keys'])
+# ru_maxrss is in bytes on macOS and KiB on Linux
+peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (2**20 if sys.platform == 'darwin' else 1024)
+print(len(df), df.memory_usage(deep=True).sum() / 2**20, peak_mb)
+'''
+
+
+def measure(mode, n_posts):
+    """(rows, frame MB, peak RSS MB), or None if the interpreter was killed (out of memory)."""
+    out = subprocess.run([sys.executable, '-c', MEASURE.format(mode=mode, posts=n_posts)], capture_output=True, text=True)
+    if out.returncode < 0:
+        return None
+    out.check_returncode()
+    rows, frame_mb, peak_mb = out.stdout.split()
+    return int(rows), float(frame_mb), float(peak_mb)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--posts', type=int, default=1_000_000)
+    args = parser.parse_args()
+    print(f"{'mode':<10}{'rows':>12}{'frame (MB)':>14}{'peak RSS (MB)':>16}")
+    for mode in ('full', 'compact'):
+        result = measure(mode, args.posts)
+        if result is None:
+            print(f'{mode:<10}{"killed (out of memory)":>42}')
+            continue
+        rows, frame_mb, peak_mb = result
+        print(f'{mode:<10}{rows:>12,}{frame_mb:>14.0f}{peak_mb:>16.0f}')
@@ -0,0 +1,43 @@
+"""Per-row clean_text + VADER vs the batch preprocessing API.
+
+    python -m benchmarks.bench_preprocessing --rows 50000
+"""
+import argparse
+import random
+import time
+
+import pandas as pd
+
+from sentiment_analysis import clean_text, clean_texts, preprocess_batch, sia
+
+WORDS = ("The market is WILD today! I think we go up after earnings, but guidance looks "
+         "weak; see https://x.com/abc and the dip could get bought by $GME apes").split()
+
+
+def make_texts(n, seed=0):
+    rng = random.Random(seed)
+    return pd.Series([' '.join(rng.choices(WORDS, k=rng.randint(5, 200))) for _ in range(n)])
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=50_000)
+    args = parser.parse_args()
+    texts = make_texts(args.rows)
+    clean_text('warm up'), sia.polarity_scores('warm up')
+
+    row_cleaned, row_clean_s = timed(lambda: [clean_text(t) for t in texts])
+    batch_cleaned, batch_clean_s = timed(lambda: clean_texts(texts))
+    assert row_cleaned == batch_cleaned
+    _, row_all_s = timed(lambda: [sia.polarity_scores(clean_text(t)) for t in texts])
+    _, batch_all_s = timed(lambda: preprocess_batch(texts))
+
+    print(f"{'stage':<22}{'per-row (s)':>12}{'batch (s)':>12}{'speedup':>10}")
+    print(f"{'clean_text':<22}{row_clean_s:>12.2f}{batch_clean_s:>12.2f}{row_clean_s / batch_clean_s:>9.1f}x")
+    print(f"{'clean_text + VADER':<22}{row_all_s:>12.2f}{batch_all_s:>12.2f}{row_all_s / batch_all_s:>9.1f}x")
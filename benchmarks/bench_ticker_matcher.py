@@ -0,0 +1,69 @@
+"""Per-ticker regex search vs the compiled TickerMatcher.
+
+    python -m benchmarks.bench_ticker_matcher --posts 2000
+"""
+import argparse
+import random
+import re
+import string
+import time
+
+from ticker_matcher import TickerMatcher
+
+BASE_TICKERS = ['AAPL', 'TSLA', 'GME', 'AMC', 'NVDA', 'MSFT', 'SPY']
+FILLER = ('the market is wild today i think we go up after earnings but guidance '
+          'looks weak and the dip could get bought by retail').split()
+
+
+def make_universe(size, rng):
+    universe = list(BASE_TICKERS[:size])
+    seen = set(universe)
+    while len(universe) < size:
+        symbol = ''.join(rng.choice(string.ascii_uppercase) for _ in range(rng.randint(3, 5)))
+        if symbol not in seen:
+            seen.add(symbol)
+            universe.append(symbol)
+    return universe
+
+
+def make_posts(universe, n, rng):
+    posts = []
+    for _ in range(n):
+        words = [rng.choice(FILLER) for _ in range(rng.randint(20, 200))]
+        for _ in range(rng.randint(0, 3)):
+            ticker = rng.choice(universe)
+            words.insert(rng.randrange(len(words)), f'${ticker}' if rng.random() < 0.3 else ticker)
+        posts.append(' '.join(words))
+    return posts
+
+
+def regex_loop(posts, universe):
+    # What reddit_scraper.fetch_posts did before the shared matcher
+    return [[t for t in universe if re.search(rf'\b{t}\b', p.upper())] for p in posts]
+
+
+def run(size, n_posts, rng):
+    universe = make_universe(size, rng)
+    posts = make_posts(universe, n_posts, rng)
+    start = time.perf_counter()
+    matcher = TickerMatcher(universe)
+    compile_s = time.perf_counter() - start
+    start = time.perf_counter()
+    new = [matcher.match(p) for p in posts]
+    matcher_s = time.perf_counter() - start
+    start = time.perf_counter()
+    old = regex_loop(posts, universe)
+    regex_s = time.perf_counter() - start
+    assert new == old, 'matcher disagrees with the regex loop'
+    print(f"{size:>8}{n_posts / regex_s:>16.0f}{n_posts / matcher_s:>16.0f}{regex_s / matcher_s:>10.1f}x{compile_s * 1000:>12.1f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--posts', type=int, default=2000)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[7, 500, 5000])
+    args = parser.parse_args()
+    rng = random.Random(0)
+    print(f"{'tickers':>8}{'regex posts/s':>16}{'trie posts/s':>16}{'speedup':>11}{'compile ms':>12}")
+    for size in args.sizes:
+        run(size, args.posts, rng)
@@ -0,0 +1,58 @@
+"""Walk-forward training: cold run, cached rerun, and rerun after new data.
+
+    python -m benchmarks.bench_walk_forward --tickers 200 --days 750 --n-jobs 8
+The cold run fits every fold (in parallel with --n-jobs). Rerunning on the
+same data, as after a strategy tweak, loads every fold from the model
+cache; appending --new-days of bars only fits the folds that include them.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import walk_forward as wf
+
+
+def make_features(n_tickers, n_days, seed=0):
+    rng = np.random.default_rng(seed)
+    n = n_tickers * n_days
+    return pd.DataFrame({
+        'tickers': np.repeat([f'T{i:04d}' for i in range(n_tickers)], n_days),
+        'date': np.tile(pd.date_range('2020-01-01', periods=n_days, freq='D'), n_tickers),
+        'Close': 50 + np.cumsum(rng.normal(0, 1, n)),
+        'avg_sentiment': rng.uniform(-1, 1, n),
+        'sentiment_volatility': rng.uniform(0, 1, n),
+        'post_volume': rng.integers(0, 50, n),
+        'sentiment_change': rng.normal(0, 1, n),
+    })
+
+
+def timed(df, **kwargs):
+    start = time.perf_counter()
+    wf.walk_forward(df, save=False, **kwargs)
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tickers', type=int, default=200)
+    parser.add_argument('--days', type=int, default=750)
+    parser.add_argument('--new-days', type=int, default=5)
+    parser.add_argument('--models', nargs='+', default=['rf'])
+    parser.add_argument('--n-jobs', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    full = make_features(args.tickers, args.days + args.new_days)
+    old = full[full['date'] < full['date'].min() + pd.Timedelta(days=args.days)]
+    new = full
+    kwargs = dict(models=args.models, n_jobs=args.n_jobs, cache_dir=tempfile.mkdtemp())
+
+    cold_s = timed(old, **kwargs)
+    cached_s = timed(old, **kwargs)
+    appended_s = timed(new, **kwargs)
+    print(f"\n{len(old):,} rows ({args.tickers} tickers x {args.days} days), models {args.models}, n_jobs {args.n_jobs}")
+    print(f"{'cold (fit every fold)':<32}{cold_s:>8.1f}s")
+    print(f"{'rerun, same data':<32}{cached_s:>8.1f}s  ({cold_s / cached_s:.0f}x)")
+    print(f"{f'rerun, +{args.new_days} days':<32}{appended_s:>8.1f}s  ({cold_s / appended_s:.0f}x)")
@@ -0,0 +1,102 @@
+"""Accuracy parity and speed of int8 FinBERT against the fp32 reference.
+
+Scores a fixed sample with both inference modes and reports per-class
+probability drift, label agreement, single-post latency and batched
+throughput:
+    python -m benchmarks.finbert_quantization_report --num-threads 4
+    python -m benchmarks.finbert_quantization_report --mongo-sample 2000 --json report.json
+"""
+import argparse
+import json
+import statistics
+import time
+
+import sentiment_analysis as sa
+
+CLASSES = ['finbert_negative', 'finbert_neutral', 'finbert_positive']
+# Fixed, deterministic sample of short and long financial texts
+SAMPLE = [
+    "Revenue grew 20% year over year and margins expanded.",
+    "The company missed earnings estimates and cut full-year guidance.",
+    "Shares were flat after the annual shareholder meeting.",
+    "Management announced a $10 billion buyback program.",
+    "The stock plunged after the FDA rejected the drug application.",
+    "Analysts expect the Fed to hold rates steady next month.",
+    "GME calls printing, this squeeze is not over yet",
+    "Selling everything, this market is going to crash hard",
+    "Debt levels are rising faster than operating cash flow.",
+    "Dividend maintained at 24 cents per share.",
+    "Tesla deliveries beat expectations but automotive gross margin fell.",
+    "Nvidia guided revenue well above consensus on data center demand.",
+    "The merger was terminated after regulators sued to block it.",
+    "Bought more SPY on the dip, long term bullish",
+    "Inventory write-downs weighed on quarterly results.",
+    "The board appointed a new chief financial officer effective immediately.",
+]
+
+
+def load_sample(mongo_sample):
+    if not mongo_sample:
+        texts = SAMPLE
+    else:
+        posts = sa.collection.find({}, sa.SCORING_PROJECTION).sort('_id', 1).limit(mongo_sample)
+        texts = [sa._post_text(post) for post in posts]
+    return [sa.clean_text(text) for text in texts]
+
+
+def time_mode(texts, model, batch_size):
+    latencies = []
+    for text in texts[:64]:
+        start = time.perf_counter()
+        sa.finbert_score_batch([text], batch_size=1, model=model)
+        latencies.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    results = sa.finbert_score_batch(texts, batch_size=batch_size, model=model)
+    throughput = len(texts) / (time.perf_counter() - start)
+    return results, statistics.median(latencies) * 1000, throughput
+
+
+def compare(reference, candidate):
+    drift = {}
+    for cls in CLASSES:
+        diffs = [abs(r[cls] - c[cls]) for r, c in zip(reference, candidate)]
+        drift[cls] = {'mean_abs': statistics.fmean(diffs), 'max_abs': max(diffs)}
+    label = lambda scores: max(CLASSES, key=scores.__getitem__)
+    agreement = sum(label(r) == label(c) for r, c in zip(reference, candidate)) / len(reference)
+    return drift, agreement
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--mongo-sample', type=int, default=0, help='Use the first N posts from MongoDB instead of the built-in sample')
+    parser.add_argument('--repeat', type=int, default=8, help='Repeat the built-in sample to get stable timings')
+    parser.add_argument('--batch-size', type=int, default=sa.FINBERT_BATCH_SIZE)
+    parser.add_argument('--num-threads', type=int, default=sa.FINBERT_NUM_THREADS)
+    parser.add_argument('--json', help='Also write the report to this path')
+    args = parser.parse_args()
+
+    texts = load_sample(args.mongo_sample)
+    if not args.mongo_sample:
+        texts = texts * args.repeat
+    report = {'sample_size': len(texts), 'num_threads': args.num_threads, 'modes': {}}
+    results = {}
+    for mode in sa.FINBERT_INFERENCE_MODES:
+        model = sa.load_finbert_model(mode, num_threads=args.num_threads)
+        sa.finbert_score_batch(texts[:4], model=model)  # warm-up
+        results[mode], latency_ms, throughput = time_mode(texts, model, args.batch_size)
+        report['modes'][mode] = {'p50_latency_ms': latency_ms, 'posts_per_sec': throughput}
+    drift, agreement = compare(results['fp32'], results['int8'])
+    report['label_agreement'] = agreement
+    report['probability_drift'] = drift
+
+    print(f"Sample: {len(texts)} texts, threads: {args.num_threads or 'default'}")
+    print(f"{'mode':<8}{'p50 latency (ms)':>18}{'posts/sec':>12}")
+    for mode, stats in report['modes'].items():
+        print(f"{mode:<8}{stats['p50_latency_ms']:>18.1f}{stats['posts_per_sec']:>12.1f}")
+    print(f"\nLabel agreement int8 vs fp32: {agreement:.2%}")
+    print(f"{'class':<20}{'mean |drift|':>14}{'max |drift|':>14}")
+    for cls, d in drift.items():
+        print(f"{cls:<20}{d['mean_abs']:>14.4f}{d['max_abs']:>14.4f}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
@@ -3,19 +3,21 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
+from dataset_io import read_dataset
 
 st.set_page_config(page_title='Sentiment Trading Dashboard', layout='wide')
 
 # --- CONFIGURATION ---
 TICKERS = ['AAPL', 'TSLA', 'GME', 'AMC', 'NVDA', 'MSFT', 'SPY']
-SENTIMENT_CSV = 'sentiment_features_daily.csv'
+SENTIMENT_DATASET = 'sentiment_features_daily'
 TRADE_LOG = 'trade_log.txt'
-MERGED_CSV = 'merged_features_daily.csv'
+MERGED_DATASET = 'merged_features_daily'
 
 # --- LOAD DATA ---
+# Only the selected ticker's partition (and date range) is read
 @st.cache_data
-def load_sentiment():
-    return pd.read_csv(SENTIMENT_CSV)
+def load_sentiment(ticker, start_date, end_date):
+    return read_dataset(SENTIMENT_DATASET, tickers=[ticker], start=start_date, end=end_date)
 
 @st.cache_data
 def load_trades():
@@ -27,12 +29,10 @@ def load_trades():
         return pd.DataFrame(columns=['datetime', 'ticker', 'action', 'price', 'position'])
 
 @st.cache_data
-def load_merged():
-    return pd.read_csv(MERGED_CSV)
+def load_merged(ticker):
+    return read_dataset(MERGED_DATASET, columns=['date', 'avg_sentiment', 'Close'], tickers=[ticker])
 
-sentiment_df = load_sentiment()
 trade_df = load_trades()
-merged_df = load_merged()
 
 # --- SIDEBAR ---
 st.sidebar.title('Controls')
@@ -43,9 +43,7 @@ start_date = end_date - timedelta(days=days)
 
 # --- SENTIMENT VISUALIZATION ---
 st.header(f'Sentiment & Price for {ticker}')
-ticker_sent = sentiment_df[sentiment_df['tickers'] == ticker]
-ticker_sent['date'] = pd.to_datetime(ticker_sent['date'])
-ticker_sent = ticker_sent[(ticker_sent['date'] >= pd.to_datetime(start_date)) & (ticker_sent['date'] <= pd.to_datetime(end_date))]
+ticker_sent = load_sentiment(ticker, start_date, end_date)
 
 fig, ax1 = plt.subplots(figsize=(10, 4))
 ax1.plot(ticker_sent['date'], ticker_sent['avg_sentiment'], color='tab:blue', label='Avg Sentiment')
@@ -88,7 +86,7 @@ else:
 
 # --- SENTIMENT VS. PRICE CORRELATION ---
 st.header('Sentiment vs. Price Correlation')
-ticker_merged = merged_df[merged_df['tickers'] == ticker]
+ticker_merged = load_merged(ticker)
 if 'avg_sentiment' in ticker_merged and 'Close' in ticker_merged:
     corr = ticker_merged['avg_sentiment'].corr(ticker_merged['Close'])
     st.write(f'Correlation: {corr:.2f}')
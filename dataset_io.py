@@ -0,0 +1,118 @@
+import os
+import shutil
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# --- CONFIGURATION ---
+DATA_DIR = '.'
+# Tables handed from one stage to the next. Each is a directory of Parquet
+# files, hive-partitioned so readers that want one ticker (or a date range)
+# only open the files that can match. Hourly tables also split by year; finer
+# date partitions (day, month) leave so many small files that full-table
+# reads fall behind CSV (benchmarks/bench_dataset_io.py).
+DATASETS = {
+    'sentiment_features_daily': {'keys': ['tickers', 'date'], 'partitions': ['tickers']},
+    'sentiment_features_hourly': {'keys': ['tickers', 'date', 'hour'], 'partitions': ['tickers', 'year']},
+    'merged_features_daily': {'keys': ['tickers', 'date'], 'partitions': ['tickers']},
+    'merged_features_hourly': {'keys': ['tickers', 'date', 'hour'], 'partitions': ['tickers', 'year']},
+}
+# Derived only to partition on; never returned to callers
+DERIVED_PARTITIONS = {'year': lambda frame: frame['date'].dt.year.astype(str)}
+
+
+def dataset_path(name):
+    return os.path.join(DATA_DIR, f'{name}.parquet')
+
+
+def legacy_csv_path(name):
+    return os.path.join(DATA_DIR, f'{name}.csv')
+
+
+def exists(name):
+    return os.path.isdir(dataset_path(name)) or os.path.exists(legacy_csv_path(name))
+
+
+def _spec(name):
+    if name not in DATASETS:
+        raise KeyError(f'Unknown dataset {name!r} (expected one of {sorted(DATASETS)})')
+    return DATASETS[name]
+
+
+def normalize_dates(frame):
+    """`date` as datetime64 (midnight), whatever the producer used: strings, datetime.date or timestamps."""
+    if 'date' in frame and not pd.api.types.is_datetime64_dtype(frame['date']):
+        frame = frame.assign(date=pd.to_datetime(frame['date']))
+    return frame
+
+
+# --- WRITE ---
+def write_dataset(frame, name):
+    """Replace dataset `name` with frame. The new files are written beside the old ones and swapped in."""
+    spec = _spec(name)
+    frame = normalize_dates(frame)
+    frame = frame.assign(**{p: DERIVED_PARTITIONS[p](frame) for p in spec['partitions'] if p in DERIVED_PARTITIONS})
+    path = dataset_path(name)
+    staging = f'{path}.tmp'
+    shutil.rmtree(staging, ignore_errors=True)
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    pq.write_to_dataset(table, staging, partition_cols=spec['partitions'])
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(staging, path)
+    return path
+
+
+# --- READ ---
+def _filter(tickers, start, end):
+    expr = None
+    clauses = []
+    if tickers is not None:
+        clauses.append(pc.field('tickers').isin(list(tickers)))
+    if start is not None:
+        clauses.append(pc.field('date') >= pd.Timestamp(start))
+    if end is not None:
+        clauses.append(pc.field('date') <= pd.Timestamp(end))
+    for clause in clauses:
+        expr = clause if expr is None else expr & clause
+    return expr
+
+
+def read_dataset(name, columns=None, tickers=None, start=None, end=None, filters=None):
+    """
+    Load dataset `name` as a DataFrame sorted by its keys.
+
+    columns projects the read (only those column chunks are decoded);
+    tickers/start/end (inclusive dates) and any extra pyarrow `filters`
+    expression are pushed down, so non-matching partitions are skipped and
+    row groups are pruned by their statistics. Files are memory-mapped.
+    Falls back to `<name>.csv` for data written before the Parquet layer.
+    """
+    spec = _spec(name)
+    expr = _filter(tickers, start, end)
+    if filters is not None:
+        expr = filters if expr is None else expr & filters
+    path = dataset_path(name)
+    if not os.path.isdir(path) and os.path.exists(legacy_csv_path(name)):
+        return _read_legacy_csv(name, spec, columns, expr)
+    # Partition values are always strings (a ticker such as "1234" must not be inferred as an int)
+    partitioning = ds.partitioning(pa.schema([(p, pa.string()) for p in spec['partitions']]), flavor='hive')
+    frame = pq.read_table(path, columns=columns, filters=expr, memory_map=True, partitioning=partitioning).to_pandas()
+    frame = frame.drop(columns=[p for p in DERIVED_PARTITIONS if p in frame and p not in (columns or ())])
+    return _sorted(frame, spec)
+
+
+def _read_legacy_csv(name, spec, columns, expr):
+    frame = normalize_dates(pd.read_csv(legacy_csv_path(name)))
+    if expr is not None:
+        frame = pa.Table.from_pandas(frame, preserve_index=False).filter(expr).to_pandas()
+    return _sorted(frame[columns] if columns else frame, spec)
+
+
+def _sorted(frame, spec):
+    # Partition columns are read back last; put the keys first again, as in the CSVs
+    keys = [k for k in spec['keys'] if k in frame]
+    frame = frame[keys + [c for c in frame.columns if c not in keys]]
+    return frame.sort_values(keys).reset_index(drop=True) if keys else frame
@@ -0,0 +1,117 @@
+import json
+import math
+import os
+from datetime import datetime, timezone
+
+# --- CONFIGURATION ---
+HALF_LIFE_HOURS = 24.0
+COMMENT_WEIGHT = 2.0  # A comment counts as much engagement as two upvotes
+DECAYED_COLUMNS = ['decayed_sentiment', 'decayed_volatility', 'decayed_weight', 'decayed_volume']
+
+
+def engagement_weight(score, num_comments):
+    """1 for a post nobody engaged with, growing logarithmically with upvotes and comments."""
+    score = max(score or 0, 0)
+    num_comments = max(num_comments or 0, 0)
+    return 1.0 + math.log1p(score + COMMENT_WEIGHT * num_comments)
+
+
+def epoch_seconds(timestamp):
+    """Seconds since the epoch; naive datetimes are UTC, as everywhere in this project."""
+    if isinstance(timestamp, (int, float)):
+        return float(timestamp)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.timestamp()
+
+
+class DecayedSentiment:
+    """
+    Exponentially decayed, engagement-weighted sentiment per ticker.
+
+    Each ticker keeps five numbers: the time of its newest post and the
+    decayed sums of weights, weighted values, weighted squares and posts.
+    A post decays everything by exp(-rate * elapsed) and adds itself, so an
+    update is O(1) no matter how much history the state summarizes. A post
+    older than the state (late scrape or scoring) is decayed to the state's
+    time instead. The state round-trips through to_dict()/save() so a
+    restart resumes without replaying history.
+    """
+
+    def __init__(self, half_life_hours=HALF_LIFE_HOURS):
+        self.half_life_hours = half_life_hours
+        self._rate = math.log(2) / (half_life_hours * 3600)
+        self._state = {}
+
+    def __contains__(self, ticker):
+        return ticker in self._state
+
+    def last_update(self, ticker):
+        return self._state[ticker][0] if ticker in self._state else None
+
+    def update(self, ticker, timestamp, value, weight=1.0):
+        t = epoch_seconds(timestamp)
+        state = self._state.get(ticker)
+        if state is None:
+            self._state[ticker] = [t, weight, weight * value, weight * value * value, 1.0]
+            return
+        if t >= state[0]:
+            decay, late = math.exp(-self._rate * (t - state[0])), 1.0
+            state[0] = t
+        else:
+            decay, late = 1.0, math.exp(-self._rate * (state[0] - t))
+        state[1] = state[1] * decay + late * weight
+        state[2] = state[2] * decay + late * weight * value
+        state[3] = state[3] * decay + late * weight * value * value
+        state[4] = state[4] * decay + late
+
+    def snapshot(self, ticker, at=None):
+        """
+        Decayed mean/std of sentiment, plus decayed engagement and post count,
+        as of `at` (default: the ticker's newest post). None for an unknown
+        ticker or a time before the newest post, which would leak later posts.
+        """
+        state = self._state.get(ticker)
+        if state is None:
+            return None
+        t, weight, total, squares, count = state
+        decay = 1.0
+        if at is not None:
+            at = epoch_seconds(at)
+            if at < t:
+                return None
+            decay = math.exp(-self._rate * (at - t))
+        mean = total / weight
+        # The weighted mean and spread do not change as the state decays; only its mass does
+        variance = max(squares / weight - mean * mean, 0.0)
+        return {
+            'decayed_sentiment': mean,
+            'decayed_volatility': math.sqrt(variance),
+            'decayed_weight': weight * decay,
+            'decayed_volume': count * decay,
+        }
+
+    # --- PERSISTENCE ---
+    def to_dict(self):
+        return {'half_life_hours': self.half_life_hours, 'tickers': self._state}
+
+    @classmethod
+    def from_dict(cls, data):
+        aggregator = cls(data['half_life_hours'])
+        aggregator._state = {ticker: list(state) for ticker, state in data['tickers'].items()}
+        return aggregator
+
+    def save(self, path, extra=None):
+        tmp = f'{path}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({**self.to_dict(), 'saved_at': datetime.utcnow().isoformat(), **(extra or {})}, f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, half_life_hours=HALF_LIFE_HOURS):
+        """Saved state from path (with its extra fields), or a fresh aggregator if there is none."""
+        if not os.path.exists(path):
+            return cls(half_life_hours), {}
+        with open(path) as f:
+            data = json.load(f)
+        return cls.from_dict(data), data
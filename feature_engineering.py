@@ -1,73 +1,357 @@
-import pymongo
+import argparse
+import json
+import os
+import numpy as np
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timedelta
+import storage
+from dataset_io import exists, read_dataset, write_dataset
+from storage import SCORED_QUERY
+from decayed_sentiment import DECAYED_COLUMNS, DecayedSentiment, engagement_weight
+from rolling_features import LEGACY_FEATURES, add_features, column_names, lookback
 
 # --- CONFIGURATION ---
-MONGO_URI = 'mongodb://localhost:27017/'  # Or your MongoDB Atlas URI
-DB_NAME = 'reddit_sentiment'
-COLLECTION_NAME = 'posts'
-OUTPUT_CSV = 'sentiment_features.csv'
+CHECKPOINT_PATH = 'feature_store_checkpoint.json'
+# Re-read posts scored this long before the last checkpoint, to cover clock
+# skew between scoring hosts and writes that landed mid-run
+CHECKPOINT_OVERLAP = timedelta(minutes=10)
+# Rolling/momentum columns added to every granularity; extend with e.g.
+# Feature('sentiment_ewm_{window}{unit}', 'ewm', 12) or Feature('sentiment_z_{window}{unit}', 'zscore', 24)
+FEATURES = LEGACY_FEATURES
+FINBERT_FIELDS = ['finbert_positive', 'finbert_neutral', 'finbert_negative']
+# Bucket statistics: column -> (post field, pandas agg, MongoDB accumulator)
+AGGREGATES = {
+    'avg_sentiment': ('compound', 'mean', '$avg'),
+    'sentiment_volatility': ('compound', 'std', '$stdDevSamp'),  # both use n - 1
+    'post_volume': ('id', 'count', '$sum'),
+    **{f'avg_{field}': (field, 'mean', '$avg') for field in FINBERT_FIELDS},
+}
+# Engagement-weighted, time-decayed sentiment state carried between runs
+DECAYED_STATE_PATH = 'decayed_sentiment_state.json'
+# Posts older than this many half-lives before the newest one weigh < 0.1% and are not streamed again
+DECAY_HORIZON_HALF_LIVES = 10
+# Only what the features read is fetched; titles, bodies and links stay in MongoDB
+POST_FIELDS = {'_id': 0, 'id': 1, 'tickers': 1, 'subreddit': 1, 'created_utc': 1, 'created': 1, 'score': 1,
+               'num_comments': 1, 'sentiment.compound': 1, **{f'finbert_sentiment.{f}': 1 for f in FINBERT_FIELDS}}
+# What the decayed aggregator reads (the mongo backend fetches only these)
+DECAYED_FIELDS = {'_id': 0, 'id': 1, 'tickers': 1, 'created_utc': 1, 'created': 1, 'score': 1, 'num_comments': 1,
+                  'sentiment.compound': 1}
+BACKENDS = ('pandas', 'mongo')
+FEATURE_BACKEND = 'pandas'
+GRANULARITIES = {
+    'daily': {'keys': ['tickers', 'date'], 'dataset': 'sentiment_features_daily', 'unit': 'd'},
+    'hourly': {'keys': ['tickers', 'date', 'hour'], 'dataset': 'sentiment_features_hourly', 'unit': 'h'},
+}
 
 # --- MONGODB SETUP ---
-mongo_client = pymongo.MongoClient(MONGO_URI)
-db = mongo_client[DB_NAME]
-collection = db[COLLECTION_NAME]
+# Windowed aggregations (incremental updates) use storage's (tickers, created_utc)
+# index; dirty-post lookups use its scored_at index
+collection = storage.posts
 
 # --- LOAD DATA ---
-posts = list(collection.find({'sentiment': {'$exists': True}}))
-if not posts:
-    print('No posts with sentiment found.')
-    exit()
-
-# --- PREPARE DATAFRAME ---
-df = pd.DataFrame(posts)
-# Flatten sentiment dict
-sentiment_df = pd.json_normalize(df['sentiment'])
-df = pd.concat([df, sentiment_df], axis=1)
-
-# Convert created_utc to date and hour
-if 'created_utc' in df:
-    df['datetime'] = pd.to_datetime(df['created_utc'])
-else:
-    df['datetime'] = pd.to_datetime(df['created'])
-df['date'] = df['datetime'].dt.date
-df['hour'] = df['datetime'].dt.hour
-
-# Explode tickers (one row per ticker per post)
-df = df.explode('tickers')
-
-# --- AGGREGATE FEATURES (DAILY) ---
-daily_grouped = df.groupby(['tickers', 'date']).agg(
-    avg_sentiment=('compound', 'mean'),
-    sentiment_volatility=('compound', 'std'),
-    post_volume=('id', 'count')
-).reset_index()
-
-daily_grouped = daily_grouped.sort_values(['tickers', 'date'])
-daily_grouped['sentiment_change'] = daily_grouped.groupby('tickers')['avg_sentiment'].diff()
-# Rolling 3-day average and momentum
-for ticker, group in daily_grouped.groupby('tickers'):
-    idx = group.index
-    daily_grouped.loc[idx, 'rolling_avg_sentiment'] = group['avg_sentiment'].rolling(window=3, min_periods=1).mean().values
-    daily_grouped.loc[idx, 'momentum_3d'] = group['avg_sentiment'].diff(periods=3).values
-
-daily_grouped.to_csv('sentiment_features_daily.csv', index=False)
-print('Daily feature CSV saved to sentiment_features_daily.csv')
-
-# --- AGGREGATE FEATURES (HOURLY) ---
-hourly_grouped = df.groupby(['tickers', 'date', 'hour']).agg(
-    avg_sentiment=('compound', 'mean'),
-    sentiment_volatility=('compound', 'std'),
-    post_volume=('id', 'count')
-).reset_index()
-
-hourly_grouped = hourly_grouped.sort_values(['tickers', 'date', 'hour'])
-hourly_grouped['sentiment_change'] = hourly_grouped.groupby('tickers')['avg_sentiment'].diff()
-# Rolling 3-hour average and momentum
-for ticker, group in hourly_grouped.groupby('tickers'):
-    idx = group.index
-    hourly_grouped.loc[idx, 'rolling_avg_sentiment'] = group['avg_sentiment'].rolling(window=3, min_periods=1).mean().values
-    hourly_grouped.loc[idx, 'momentum_3h'] = group['avg_sentiment'].diff(periods=3).values
-
-hourly_grouped.to_csv('sentiment_features_hourly.csv', index=False)
-print('Hourly feature CSV saved to sentiment_features_hourly.csv')
+def posts_frame(docs, finbert_fields=FINBERT_FIELDS):
+    """
+    One row per (post, ticker) from post documents, read in one pass so a
+    cursor's documents are never all held at once. Tickers and subreddits
+    are categoricals and numbers 32-bit, so the per-ticker rows only repeat
+    small values; posts without tickers are dropped.
+    """
+    ids, subreddits, created, scores, comments, counts, tickers = [], [], [], [], [], [], []
+    scores_by_field = {field: [] for field in ['compound', *finbert_fields]}
+    for doc in docs:
+        mentioned = doc.get('tickers') or ()
+        if not mentioned:
+            continue
+        counts.append(len(mentioned))
+        tickers.extend(mentioned)
+        ids.append(doc.get('id'))
+        subreddits.append(doc.get('subreddit'))
+        created.append(doc.get('created_utc') or doc.get('created'))
+        scores.append(doc.get('score') or 0)
+        comments.append(doc.get('num_comments') or 0)
+        scores_by_field['compound'].append((doc.get('sentiment') or {}).get('compound', np.nan))
+        finbert = doc.get('finbert_sentiment') or {}
+        for field in finbert_fields:
+            scores_by_field[field].append(finbert.get(field, np.nan))
+    if not counts:
+        return pd.DataFrame()
+
+    def repeat(values, dtype):
+        return np.repeat(np.asarray(values, dtype=dtype), counts)
+
+    df = pd.DataFrame({
+        'id': repeat(ids, object),
+        'tickers': pd.Categorical(tickers),
+        'subreddit': pd.Categorical(repeat(subreddits, object)),
+        'datetime': repeat(pd.to_datetime(created).to_numpy(), None),
+        'score': repeat(scores, np.int32),
+        'num_comments': repeat(comments, np.int32),
+        **{field: repeat(values, np.float32) for field, values in scores_by_field.items()},
+    })
+    df['date'] = df['datetime'].dt.normalize()
+    df['hour'] = df['datetime'].dt.hour.astype(np.int32)
+    return df
+
+def load_posts(query=None, projection=POST_FIELDS):
+    """Scored posts matching query, one row per (post, ticker) with date and hour columns."""
+    finbert_fields = [f for f in FINBERT_FIELDS if f'finbert_sentiment.{f}' in projection]
+    return posts_frame(collection.find({**SCORED_QUERY, **(query or {})}, projection), finbert_fields)
+
+# --- AGGREGATE FEATURES ---
+def aggregate(df, keys):
+    missing = [field for field in FINBERT_FIELDS if field not in df]
+    if missing:
+        df = df.assign(**dict.fromkeys(missing, np.nan))
+    # observed=True: with categorical tickers pandas 2 would otherwise emit every ticker x bucket
+    grouped = df.groupby(keys, observed=True).agg(
+        **{column: (field, how) for column, (field, how, _) in AGGREGATES.items()}
+    ).reset_index()
+    # Posts are held compactly (categorical tickers, float32 scores); the stored features keep str/float64
+    grouped = grouped.astype({'tickers': str, **{column: 'float64' for column in AGGREGATES if column != 'post_volume'}})
+    return grouped.sort_values(keys).reset_index(drop=True)
+
+def mongo_pipeline(keys, query=None):
+    """$unwind/$group pipeline producing one document per bucket; post bodies never leave the server."""
+    created = {'$ifNull': ['$created_utc', '$created']}
+    bucket = {'tickers': '$tickers', 'date': {'$dateToString': {'format': '%Y-%m-%d', 'date': '$created'}}}
+    if 'hour' in keys:
+        bucket['hour'] = {'$hour': '$created'}
+    fields = {
+        'compound': '$sentiment.compound',
+        **{field: f'$finbert_sentiment.{field}' for field in FINBERT_FIELDS},
+    }
+    accumulators = {
+        column: {'$sum': 1} if op == '$sum' else {op: f'${field}'}
+        for column, (field, _, op) in AGGREGATES.items()
+    }
+    return [
+        {'$match': {**SCORED_QUERY, **(query or {})}},
+        {'$project': {'_id': 0, 'tickers': 1, 'created': created, **fields}},
+        {'$unwind': '$tickers'},
+        {'$group': {'_id': bucket, **accumulators}},
+    ]
+
+def mongo_aggregate(keys, query=None):
+    """Same frame as aggregate(load_posts(query), keys), computed inside MongoDB."""
+    rows = [{**doc.pop('_id'), **doc} for doc in collection.aggregate(mongo_pipeline(keys, query), allowDiskUse=True)]
+    grouped = pd.DataFrame(rows, columns=keys + list(AGGREGATES))
+    grouped['date'] = pd.to_datetime(grouped['date'])
+    # $avg/$stdDevSamp return null for empty or single-value groups, like pandas' NaN
+    grouped = grouped.astype({column: float for column in AGGREGATES if column != 'post_volume'})
+    return grouped.sort_values(keys).reset_index(drop=True)
+
+def aggregate_buckets(granularities, query=None, backend=FEATURE_BACKEND, posts=None):
+    """
+    {granularity: aggregated frame} over scored posts matching query; {}
+    when there are none. The pandas backend aggregates posts if given
+    (already loaded for query) instead of loading them.
+    """
+    if backend == 'mongo':
+        frames = {g: mongo_aggregate(GRANULARITIES[g]['keys'], query) for g in granularities}
+        return {} if any(frame.empty for frame in frames.values()) else frames
+    df = load_posts(query) if posts is None else posts
+    if df.empty:
+        return {}
+    return {g: aggregate(df, GRANULARITIES[g]['keys']) for g in granularities}
+
+def add_rolling_features(grouped, granularity, features=None):
+    """FEATURES columns within each ticker (grouped sorted by keys)."""
+    return add_features(grouped, features or FEATURES, GRANULARITIES[granularity]['unit'])
+
+# --- DECAYED SENTIMENT ---
+def _epoch_seconds(posts):
+    return (posts['datetime'] - pd.Timestamp(0)).dt.total_seconds().to_numpy()
+
+def _post_keys(posts):
+    return (posts['id'].astype(str) + ':' + posts['tickers'].astype(str)).tolist()
+
+def decayed_features(posts, aggregator, granularities):
+    """
+    Stream posts through the aggregator in time order and snapshot each
+    ticker's state at the end of every bucket it posted in. Returns
+    {granularity: keys + DECAYED_COLUMNS}. A bucket ending before the
+    ticker's state (a late post in an incremental run) gets no row, since
+    its snapshot would include later posts.
+    """
+    posts = posts.sort_values('datetime', kind='stable')
+    seconds = _epoch_seconds(posts)
+    ends = {
+        g: seconds // 3600 * 3600 + 3600 if 'hour' in GRANULARITIES[g]['keys'] else seconds // 86400 * 86400 + 86400
+        for g in granularities
+    }
+    engagement = posts.reindex(columns=['score', 'num_comments']).fillna(0)
+    weights = [engagement_weight(s, c) for s, c in zip(engagement['score'], engagement['num_comments'])]
+    rows = {g: [] for g in granularities}
+    snapshots = {g: [] for g in granularities}
+    open_buckets = {g: {} for g in granularities}  # ticker -> (last row, bucket end)
+
+    def close(g, ticker, row, end):
+        snapshot = aggregator.snapshot(ticker, at=end)
+        if snapshot is not None:
+            rows[g].append(row)
+            snapshots[g].append(snapshot)
+
+    for i, (ticker, t, value, weight) in enumerate(zip(posts['tickers'], seconds, posts['compound'], weights)):
+        for g in granularities:
+            current = open_buckets[g].get(ticker)
+            if current is not None and current[1] != ends[g][i]:
+                close(g, ticker, *current)
+            open_buckets[g][ticker] = (i, ends[g][i])
+        aggregator.update(ticker, t, value, weight)
+    for g in granularities:
+        for ticker, (row, end) in open_buckets[g].items():
+            close(g, ticker, row, end)
+
+    frames = {}
+    for g in granularities:
+        keys = GRANULARITIES[g]['keys']
+        values = pd.DataFrame(snapshots[g], columns=DECAYED_COLUMNS, dtype=float)
+        frame = pd.concat([posts.iloc[rows[g]][keys].astype({'tickers': str}).reset_index(drop=True), values], axis=1)
+        frames[g] = frame.sort_values(keys).reset_index(drop=True)
+    return frames
+
+def unfed_posts(posts, saved):
+    """Posts the saved state has not seen yet, within the decay horizon of its newest post."""
+    keep = ~pd.Series(_post_keys(posts), index=posts.index).isin(saved.get('fed', {}))
+    if saved.get('newest') is not None:
+        horizon = DECAY_HORIZON_HALF_LIVES * saved['half_life_hours'] * 3600
+        keep &= _epoch_seconds(posts) >= saved['newest'] - horizon
+    return posts[keep]
+
+def save_decayed_state(aggregator, posts, fed=None):
+    """Save the state plus the ids of posts fed within the horizon, so re-scored posts are not counted twice."""
+    fed = dict(fed or {})
+    if not posts.empty:
+        fed.update(zip(_post_keys(posts), _epoch_seconds(posts).tolist()))
+    newest = max(fed.values(), default=None)
+    if newest is not None:
+        horizon = DECAY_HORIZON_HALF_LIVES * aggregator.half_life_hours * 3600
+        fed = {key: t for key, t in fed.items() if t >= newest - horizon}
+    aggregator.save(DECAYED_STATE_PATH, {'newest': newest, 'fed': fed})
+
+def attach_decayed(fresh, snapshots, store, keys):
+    """Decayed columns for fresh buckets: new snapshots where there are any, else the values already stored."""
+    fresh = fresh.merge(snapshots, on=keys, how='left')
+    previous = fresh[keys].merge(store[keys + DECAYED_COLUMNS], on=keys, how='left')
+    fresh[DECAYED_COLUMNS] = fresh[DECAYED_COLUMNS].fillna(previous[DECAYED_COLUMNS])
+    return fresh
+
+# --- FEATURE STORE ---
+def read_store(granularity):
+    name = GRANULARITIES[granularity]['dataset']
+    return read_dataset(name) if exists(name) else None
+
+def write_store(frame, granularity):
+    path = write_dataset(frame, GRANULARITIES[granularity]['dataset'])
+    print(f'{granularity.capitalize()} features saved to {path}')
+
+def load_checkpoint():
+    if not os.path.exists(CHECKPOINT_PATH):
+        return None
+    with open(CHECKPOINT_PATH) as f:
+        return datetime.fromisoformat(json.load(f)['scored_at'])
+
+def save_checkpoint(scored_at):
+    with open(CHECKPOINT_PATH, 'w') as f:
+        json.dump({'scored_at': scored_at.isoformat()}, f)
+
+# --- FULL BUILD ---
+def build_features(granularities=tuple(GRANULARITIES), backend=FEATURE_BACKEND):
+    """Rebuild every bucket from all scored posts. Returns {granularity: frame}."""
+    started_at = datetime.utcnow()
+    # Posts are read once: pandas aggregates the frame the decayed features
+    # stream; mongo groups on the server and only DECAYED_FIELDS come back
+    posts = load_posts(projection=DECAYED_FIELDS if backend == 'mongo' else POST_FIELDS)
+    aggregated = aggregate_buckets(granularities, backend=backend, posts=posts) if not posts.empty else {}
+    if not aggregated:
+        print('No posts with sentiment found.')
+        return {}
+    aggregator = DecayedSentiment()
+    decayed = decayed_features(posts, aggregator, granularities)
+    features = {}
+    for granularity in granularities:
+        keys = GRANULARITIES[granularity]['keys']
+        grouped = aggregated[granularity].merge(decayed[granularity], on=keys, how='left')
+        features[granularity] = add_rolling_features(grouped, granularity)
+        write_store(features[granularity], granularity)
+    save_decayed_state(aggregator, posts)
+    save_checkpoint(started_at)
+    return features
+
+# --- INCREMENTAL UPDATE ---
+def dirty_posts(since):
+    """Posts scored (or re-scored) after `since`, exploded per ticker."""
+    return load_posts({'scored_at': {'$gt': since - CHECKPOINT_OVERLAP}})
+
+def merge_dirty_buckets(store, fresh, keys, granularity):
+    """Replace the dirty buckets in store with fresh rows and redo the rolling tails they affect."""
+    dirty = fresh[keys].assign(_dirty=True)
+    store = store.merge(dirty, on=keys, how='left')
+    store = store[store['_dirty'].isna()].drop(columns='_dirty')
+    merged = pd.concat([store, fresh], ignore_index=True).sort_values(keys).reset_index(drop=True)
+    # Every row from a ticker's first dirty bucket onward can change; the
+    # lookback rows before it are only read as window context (EWM features
+    # have unbounded memory, so those tickers are recomputed in full)
+    position = merged.groupby('tickers').cumcount()
+    is_dirty = merged[keys].merge(dirty, on=keys, how='left')['_dirty'].notna().to_numpy()
+    first_dirty = position.where(is_dirty).groupby(merged['tickers']).transform('min')
+    tail = position >= first_dirty
+    rows = lookback(FEATURES)
+    context = first_dirty.notna() if rows is None else position >= first_dirty - rows
+    recomputed = add_rolling_features(merged[context].copy(), granularity)
+    derived = column_names(FEATURES, GRANULARITIES[granularity]['unit'])
+    merged.loc[tail, derived] = recomputed.loc[tail[context], derived]
+    return merged
+
+def update_features(granularities=tuple(GRANULARITIES), backend=FEATURE_BACKEND):
+    """
+    Recompute only the (ticker, date[, hour]) buckets that received new or
+    re-scored posts since the last checkpoint, merge them into the stored
+    features and refresh the rolling/momentum columns downstream of them.
+    Falls back to a full build when there is no checkpoint or store yet.
+    """
+    since = load_checkpoint()
+    stores = {g: read_store(g) for g in granularities}
+    if since is None or not os.path.exists(DECAYED_STATE_PATH) or any(store is None for store in stores.values()):
+        return build_features(granularities, backend)
+    started_at = datetime.utcnow()
+    changed = dirty_posts(since)
+    if changed.empty:
+        print('No newly scored posts since the last checkpoint.')
+        save_checkpoint(started_at)
+        return stores
+    # Reload every post in the dirty days so each dirty bucket is recomputed from all of its posts
+    window = {
+        'tickers': {'$in': sorted(changed['tickers'].unique())},
+        'created_utc': {'$gte': changed['date'].min().to_pydatetime(),
+                        '$lt': changed['date'].max().to_pydatetime() + timedelta(days=1)},
+    }
+    candidates = aggregate_buckets(granularities, window, backend)
+    # The decayed state already holds every earlier post; only new ones are streamed into it
+    aggregator, saved = DecayedSentiment.load(DECAYED_STATE_PATH)
+    new_posts = unfed_posts(changed, saved)
+    decayed = decayed_features(new_posts, aggregator, granularities)
+    features = {}
+    for granularity in granularities:
+        keys = GRANULARITIES[granularity]['keys']
+        dirty_keys = changed[keys].astype({'tickers': str}).drop_duplicates()
+        fresh = candidates[granularity].merge(dirty_keys, on=keys, how='inner')
+        fresh = attach_decayed(fresh, decayed[granularity], stores[granularity], keys)
+        features[granularity] = merge_dirty_buckets(stores[granularity], fresh, keys, granularity)
+        print(f'{granularity}: recomputed {len(fresh)} dirty buckets')
+        write_store(features[granularity], granularity)
+    save_decayed_state(aggregator, new_posts, saved.get('fed'))
+    save_checkpoint(started_at)
+    return features
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build daily and hourly sentiment features from scored posts.')
+    parser.add_argument('--incremental', action='store_true', help='Only recompute buckets touched since the last checkpoint')
+    parser.add_argument('--backend', choices=BACKENDS, default=FEATURE_BACKEND,
+                        help='mongo: group inside MongoDB and fetch only the per-bucket results')
+    args = parser.parse_args()
+    storage.setup()
+    if args.incremental:
+        update_features(backend=args.backend)
+    else:
+        build_features(backend=args.backend)
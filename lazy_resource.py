@@ -0,0 +1,59 @@
+import threading
+
+
+class LazyResource:
+    """
+    Thread-safe, load-once accessor for expensive resources (models, corpora,
+    database handles). The loader runs on first use; after that the proxy
+    forwards attribute access, calls and membership tests to the loaded object,
+    so ``sia.polarity_scores(...)`` works whether or not ``sia`` is loaded yet.
+    """
+
+    def __init__(self, loader, name=None):
+        self._loader = loader
+        self._name = name or getattr(loader, '__name__', 'resource')
+        self._value = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def load(self):
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._value = self._loader()
+                    self._loaded = True
+        return self._value
+
+    @property
+    def is_loaded(self):
+        return self._loaded
+
+    def reset(self):
+        with self._lock:
+            self._value = None
+            self._loaded = False
+
+    def __getattr__(self, attr):
+        # Only reached for attributes not defined on LazyResource itself
+        if attr.startswith('__'):
+            raise AttributeError(attr)
+        return getattr(self.load(), attr)
+
+    def __getitem__(self, key):
+        return self.load()[key]
+
+    def __call__(self, *args, **kwargs):
+        return self.load()(*args, **kwargs)
+
+    def __contains__(self, item):
+        return item in self.load()
+
+    def __iter__(self):
+        return iter(self.load())
+
+    def __len__(self):
+        return len(self.load())
+
+    def __repr__(self):
+        state = 'loaded' if self._loaded else 'not loaded'
+        return f'<LazyResource {self._name} ({state})>'
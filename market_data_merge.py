@@ -1,71 +1,67 @@
+import argparse
 import pandas as pd
-import yfinance as yf
-from datetime import datetime
+from dataset_io import read_dataset, write_dataset
+from price_store import PriceStore
+from asof_join import asof_join, grouped_ffill
 
-SENTIMENT_DAILY_CSV = 'sentiment_features_daily.csv'
-SENTIMENT_HOURLY_CSV = 'sentiment_features_hourly.csv'
-OUTPUT_DAILY_CSV = 'merged_features_daily.csv'
-OUTPUT_HOURLY_CSV = 'merged_features_hourly.csv'
+SENTIMENT_DAILY = 'sentiment_features_daily'
+SENTIMENT_HOURLY = 'sentiment_features_hourly'
+OUTPUT_DAILY = 'merged_features_daily'
+OUTPUT_HOURLY = 'merged_features_hourly'
 TICKER_COL = 'tickers'
 DATE_COL = 'date'
 HOUR_COL = 'hour'
+PRICE_LOOKBACK = pd.Timedelta(days=7)  # Start early so the first buckets have an earlier bar to align to
 
 # --- USER SELECTION ---
-USE_HOURLY = False  # Set to True for hourly, False for daily
-
-sentiment_csv = SENTIMENT_HOURLY_CSV if USE_HOURLY else SENTIMENT_DAILY_CSV
-output_csv = OUTPUT_HOURLY_CSV if USE_HOURLY else OUTPUT_DAILY_CSV
+USE_HOURLY = False  # Default for --hourly; set to True for hourly, False for daily
 
 # --- LOAD SENTIMENT DATA ---
-sentiment_df = pd.read_csv(sentiment_csv)
-sentiment_df[DATE_COL] = pd.to_datetime(sentiment_df[DATE_COL])
-if USE_HOURLY and HOUR_COL in sentiment_df:
-    sentiment_df[HOUR_COL] = sentiment_df[HOUR_COL].astype(int)
+def load_sentiment(hourly=USE_HOURLY):
+    sentiment_df = read_dataset(SENTIMENT_HOURLY if hourly else SENTIMENT_DAILY)
+    if hourly and HOUR_COL in sentiment_df:
+        sentiment_df[HOUR_COL] = sentiment_df[HOUR_COL].astype(int)
+    return sentiment_df
 
 # --- FETCH PRICE DATA ---
-all_tickers = sentiment_df[TICKER_COL].unique().tolist()
-
-price_data = []
-for ticker in all_tickers:
-    yf_ticker = yf.Ticker(ticker)
-    start = sentiment_df[DATE_COL].min().strftime('%Y-%m-%d')
-    end = (sentiment_df[DATE_COL].max() + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
-    hist = yf_ticker.history(start=start, end=end, interval='1h' if USE_HOURLY else '1d')
-    if hist.empty:
-        continue
-    hist = hist.reset_index()
-    if USE_HOURLY:
-        hist['date'] = hist['Datetime'].dt.date
-        hist['hour'] = hist['Datetime'].dt.hour
-        cols = ["date", "hour", "tickers", "Open", "High", "Low", "Close", "Volume"]
-        hist['tickers'] = ticker
-        price_data.append(hist[cols])
-    else:
-        hist['date'] = hist['Date'].dt.date
-        hist['tickers'] = ticker
-        cols = ["date", "tickers", "Open", "High", "Low", "Close", "Volume"]
-        price_data.append(hist[cols])
-
-if not price_data:
-    print('No price data found for tickers.')
-    exit()
-
-price_df = pd.concat(price_data, ignore_index=True)
-price_df['date'] = pd.to_datetime(price_df['date'])
-if USE_HOURLY and HOUR_COL in price_df:
-    price_df[HOUR_COL] = price_df[HOUR_COL].astype(int)
+def fetch_prices(sentiment_df, hourly=USE_HOURLY, price_store=None):
+    """Bars covering the sentiment date range. Cached bars are reused; only dates the store has not seen are downloaded."""
+    price_store = price_store or PriceStore()
+    all_tickers = sentiment_df[TICKER_COL].unique().tolist()
+    start = sentiment_df[DATE_COL].min() - PRICE_LOOKBACK
+    end = sentiment_df[DATE_COL].max() + pd.Timedelta(days=1)
+    bars = price_store.get_bars(all_tickers, start, end, interval='1h' if hourly else '1d')
+    print(f'Price data: {price_store.requests} download requests for {len(all_tickers)} tickers')
+    return bars
 
 # --- MERGE DATASETS ---
-if USE_HOURLY:
-    merged = pd.merge(sentiment_df, price_df, how='left', on=['tickers', 'date', 'hour'])
-    # Forward-fill missing price data within each ticker
-    merged = merged.sort_values(['tickers', 'date', 'hour'])
-    merged = merged.groupby('tickers').apply(lambda g: g.ffill()).reset_index(drop=True)
-else:
-    merged = pd.merge(sentiment_df, price_df, how='left', on=['tickers', 'date'])
-    merged = merged.sort_values(['tickers', 'date'])
-    merged = merged.groupby('tickers').apply(lambda g: g.ffill()).reset_index(drop=True)
+def merge_prices(sentiment_df, bars, hourly=USE_HOURLY):
+    """
+    Point-in-time: each bucket gets the latest bar that had closed by the
+    bucket's end (UTC), including buckets outside market hours.
+    """
+    keys = [TICKER_COL, DATE_COL, HOUR_COL] if hourly else [TICKER_COL, DATE_COL]
+    merged = asof_join(sentiment_df.sort_values(keys).reset_index(drop=True), bars, '1h' if hourly else '1d')
+    # Forward-fill any remaining gaps within each ticker, as before
+    return grouped_ffill(merged, [c for c in merged.columns if c not in keys])
+
+def build_merged(sentiment_df=None, hourly=USE_HOURLY, price_store=None, save=True):
+    """Sentiment features joined with prices; None if no price data was found."""
+    if sentiment_df is None:
+        sentiment_df = load_sentiment(hourly)
+    bars = fetch_prices(sentiment_df, hourly, price_store)
+    if bars.empty:
+        print('No price data found for tickers.')
+        return None
+    merged = merge_prices(sentiment_df, bars, hourly)
+    # --- EXPORT ---
+    if save:
+        path = write_dataset(merged, OUTPUT_HOURLY if hourly else OUTPUT_DAILY)
+        print(f'Merged dataset saved to {path}')
+    return merged
 
-# --- EXPORT ---
-merged.to_csv(output_csv, index=False)
-print(f'Merged dataset saved to {output_csv}')
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Join sentiment features with OHLCV bars.')
+    parser.add_argument('--hourly', action='store_true', default=USE_HOURLY, help='Use hourly features and bars')
+    args = parser.parse_args()
+    build_merged(hourly=args.hourly)
@@ -1,48 +1,12 @@
-import pandas as pd
+import math
 import numpy as np
 from sklearn.ensemble import RandomForestClassifier
-from xgboost import XGBClassifier
 from sklearn.metrics import classification_report, accuracy_score
-from sklearn.model_selection import train_test_split
+from dataset_io import read_dataset
+from ml_dataset import FEATURES, build_dataset, rule_scores
 
-INPUT_CSV = 'merged_features.csv'
-
-# --- LOAD DATA ---
-df = pd.read_csv(INPUT_CSV)
-df = df.sort_values(['tickers', 'date'])
-
-# --- CREATE LABEL: Next-day price movement (1=up, -1=down, 0=hold) ---
-def get_label(prices):
-    diff = prices.shift(-1) - prices
-    return diff.apply(lambda x: 1 if x > 0.5 else (-1 if x < -0.5 else 0))
-
-df['label'] = df.groupby('tickers')['Close'].transform(get_label)
-df = df.dropna(subset=['label'])
-df['label'] = df['label'].astype(int)
-
-# --- FEATURES ---
-features = ['avg_sentiment', 'sentiment_volatility', 'post_volume', 'sentiment_change']
-X = df[features]
-y = df['label']
-
-# --- TRAIN/TEST SPLIT ---
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, shuffle=False)
-
-# --- RANDOM FOREST ---
-rf = RandomForestClassifier(n_estimators=100, random_state=42)
-rf.fit(X_train, y_train)
-y_pred_rf = rf.predict(X_test)
-print("\nRandom Forest Results:")
-print(classification_report(y_test, y_pred_rf))
-print("Feature importances:", dict(zip(features, rf.feature_importances_)))
-
-# --- XGBOOST ---
-xgb = XGBClassifier(n_estimators=100, random_state=42, use_label_encoder=False, eval_metric='mlogloss')
-xgb.fit(X_train, y_train)
-y_pred_xgb = xgb.predict(X_test)
-print("\nXGBoost Results:")
-print(classification_report(y_test, y_pred_xgb))
-print("Feature importances:", dict(zip(features, xgb.feature_importances_)))
+INPUT_DATASET = 'merged_features_daily'
+PREDICTIONS_CSV = 'ml_baseline_predictions.csv'
 
 # --- RULE-BASED STRATEGY ---
 def rule_based_strategy(row):
@@ -53,8 +17,6 @@ def rule_based_strategy(row):
     else:
         return 0
 
-df['rule_pred'] = df.apply(rule_based_strategy, axis=1)
-
 # --- BUY-AND-HOLD BENCHMARK ---
 def buy_and_hold_benchmark(df):
     # Always predict 'buy' (1) for the first test period, then hold
@@ -62,20 +24,59 @@ def buy_and_hold_benchmark(df):
     preds[0] = 1
     return preds.astype(int)
 
-df['buyhold_pred'] = buy_and_hold_benchmark(df)
+def train_and_evaluate(df, features=FEATURES, save=True):
+    """Train RF and XGBoost on labelled rows (time-ordered split) and return per-row predictions."""
+    from xgboost import XGBClassifier
+    # One float32 matrix for every model; the splits below are views of it
+    data = build_dataset(df, features)
+    X, y = data.X, data.y
+
+    # --- TRAIN/TEST SPLIT ---
+    # Same rows as train_test_split(test_size=0.2, shuffle=False)
+    split_idx = len(y) - math.ceil(len(y) * 0.2)
+    X_train, X_test, y_train, y_test = X[:split_idx], X[split_idx:], y[:split_idx], y[split_idx:]
+
+    # --- RANDOM FOREST ---
+    rf = RandomForestClassifier(n_estimators=100, random_state=42)
+    rf.fit(X_train, y_train)
+    y_pred_rf = rf.predict(X_test)
+    print("\nRandom Forest Results:")
+    print(classification_report(y_test, y_pred_rf))
+    print("Feature importances:", dict(zip(features, rf.feature_importances_)))
+
+    # --- XGBOOST ---
+    # XGBoost needs classes 0..k-1, so -1/0/1 are encoded and decoded
+    classes, y_train_xgb = np.unique(y_train, return_inverse=True)
+    xgb = XGBClassifier(n_estimators=100, random_state=42, eval_metric='mlogloss')
+    xgb.fit(X_train, y_train_xgb)
+    y_pred_xgb = classes[xgb.predict(X_test)]
+    print("\nXGBoost Results:")
+    print(classification_report(y_test, y_pred_xgb))
+    print("Feature importances:", dict(zip(features, xgb.feature_importances_)))
+
+    rule_pred = rule_scores(data)
+    buyhold_pred = buy_and_hold_benchmark(data.frame)
+
+    # --- OUTPUT PREDICTIONS FOR BACKTESTING ---
+    keys = [k for k in ['tickers', 'date', 'hour'] if k in data.frame]
+    pred_df = data.frame[keys + ['Close', 'label']].astype({'label': int})
+    pred_df['rule_pred'] = rule_pred.astype(int)
+    pred_df['rf_pred'] = np.nan
+    pred_df['xgb_pred'] = np.nan
+    pred_df.iloc[split_idx:, pred_df.columns.get_loc('rf_pred')] = y_pred_rf
+    pred_df.iloc[split_idx:, pred_df.columns.get_loc('xgb_pred')] = y_pred_xgb
+    pred_df['buyhold_pred'] = buyhold_pred
+    if save:
+        pred_df.to_csv(PREDICTIONS_CSV, index=False)
+        print(f'Predictions saved to {PREDICTIONS_CSV}')
 
-# --- OUTPUT PREDICTIONS FOR BACKTESTING ---
-pred_df = df[['tickers', 'date', 'Close', 'label', 'rule_pred']].copy()
-pred_df['rf_pred'] = np.nan
-pred_df['xgb_pred'] = np.nan
-pred_df.loc[X_test.index, 'rf_pred'] = y_pred_rf
-pred_df.loc[X_test.index, 'xgb_pred'] = y_pred_xgb
-pred_df['buyhold_pred'] = df['buyhold_pred']
-pred_df.to_csv('ml_baseline_predictions.csv', index=False)
-print('Predictions saved to ml_baseline_predictions.csv')
+    # --- ACCURACY REPORTS ---
+    print("\nRule-Based Strategy Accuracy:", accuracy_score(y_test, rule_pred[split_idx:]))
+    print("Buy-and-Hold Benchmark Accuracy:", accuracy_score(y_test, buyhold_pred[split_idx:]))
+    print("Random Forest Accuracy:", accuracy_score(y_test, y_pred_rf))
+    print("XGBoost Accuracy:", accuracy_score(y_test, y_pred_xgb))
+    return pred_df
 
-# --- ACCURACY REPORTS ---
-print("\nRule-Based Strategy Accuracy:", accuracy_score(df.loc[X_test.index, 'label'], df.loc[X_test.index, 'rule_pred']))
-print("Buy-and-Hold Benchmark Accuracy:", accuracy_score(df.loc[X_test.index, 'label'], df.loc[X_test.index, 'buyhold_pred']))
-print("Random Forest Accuracy:", accuracy_score(y_test, y_pred_rf))
-print("XGBoost Accuracy:", accuracy_score(y_test, y_pred_xgb))
+if __name__ == '__main__':
+    # build_dataset sorts and labels the rows itself
+    train_and_evaluate(read_dataset(INPUT_DATASET))
@@ -0,0 +1,72 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+from backtest_engine import threshold_signals
+
+# --- CONFIGURATION ---
+KEYS = ['tickers', 'date', 'hour']
+FEATURES = ['avg_sentiment', 'sentiment_volatility', 'post_volume', 'sentiment_change']
+LABEL_THRESHOLD = 0.5  # Next-bar price move that counts as up (1) or down (-1)
+RULE_COLUMN = 'avg_sentiment'
+RULE_BUY_ABOVE = 0.2
+RULE_SELL_BELOW = -0.2
+
+# A Dataset is built once per frame and shared by every model: X is one
+# C-contiguous float32 matrix (what RandomForest converts to anyway, so it
+# fits without a copy), y the int8 labels, and frame the keys, Close,
+# label and RULE_COLUMN of each row in the same (ticker, time) order.
+# Columns of X are read as views with feature(). The rule is scored from
+# frame, not X: rounding to float32 moves values onto its thresholds
+# (0.2 becomes 0.200000003), which would turn HOLDs into BUYs.
+
+Dataset = namedtuple('Dataset', ['frame', 'X', 'y', 'features'])
+
+
+# --- LABELS ---
+def next_bar_labels(close, tickers, threshold=LABEL_THRESHOLD):
+    """
+    1 if the ticker's next bar closes more than threshold higher, -1 if more
+    than threshold lower, else 0. Rows must be grouped by ticker in time
+    order; a ticker's last bar (no next bar) or a NaN price gives 0.
+    """
+    close = np.asarray(close, dtype=float)
+    codes = pd.factorize(tickers)[0]
+    diff = np.full(len(close), np.nan)
+    diff[:-1] = np.where(codes[1:] == codes[:-1], close[1:] - close[:-1], np.nan)
+    with np.errstate(invalid='ignore'):
+        return np.select([diff > threshold, diff < -threshold], [1, -1], 0).astype(np.int8)
+
+
+# --- DATASET ---
+def build_dataset(df, features=FEATURES, threshold=LABEL_THRESHOLD):
+    """Labels and the float32 feature matrix for df, sorted by its keys. df itself is not copied."""
+    keys = [k for k in KEYS if k in df]
+    ticker_codes = pd.factorize(df['tickers'], sort=True)[0]
+    sort_keys = [df[k].to_numpy() for k in reversed(keys[1:])] + [ticker_codes]
+    order = np.lexsort(sort_keys)
+    if (np.diff(order) > 0).all():
+        order = None  # Already sorted (read_dataset output): no gathers at all
+
+    X = np.empty((len(df), len(features)), dtype=np.float32)
+    for j, column in enumerate(features):
+        values = df[column].to_numpy()
+        X[:, j] = values if order is None else values[order]
+    # Keys stay pandas arrays: to_numpy() would turn string tickers into Python objects
+    columns = keys + ['Close'] + ([RULE_COLUMN] if RULE_COLUMN in df else [])
+    frame = pd.DataFrame({
+        k: (df[k] if order is None else df[k].take(order)).array for k in columns
+    })
+    y = next_bar_labels(frame['Close'], ticker_codes if order is None else ticker_codes[order], threshold)
+    frame['label'] = y
+    return Dataset(frame, X, y, list(features))
+
+
+def feature(dataset, name):
+    """Column of X as a view."""
+    return dataset.X[:, dataset.features.index(name)]
+
+
+def rule_scores(dataset):
+    """ml_baseline.rule_based_strategy for every row, from the source precision of RULE_COLUMN."""
+    return threshold_signals(dataset.frame[RULE_COLUMN].to_numpy(), RULE_BUY_ABOVE, RULE_SELL_BELOW)
@@ -0,0 +1,338 @@
+import argparse
+import glob
+import hashlib
+import inspect
+import json
+import os
+import resource
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime
+
+import pandas as pd
+
+# --- CONFIGURATION ---
+CACHE_DIR = 'pipeline_cache'
+RUN_LOG = 'pipeline_runs.jsonl'
+CACHE_VERSIONS_KEPT = 3  # Cached outputs kept per stage (e.g. daily and hourly runs side by side)
+
+# A stage is run(pipeline) -> output. fingerprint(pipeline) returns the
+# values its output depends on (input frames, parameters, code), or None if
+# it reads something the runner cannot see (Reddit, unscored posts) and must
+# always run. load(pipeline) reads the stage's last output from disk when
+# a later stage is run on its own.
+Stage = namedtuple('Stage', ['name', 'run', 'fingerprint', 'load'], defaults=(None, None))
+
+
+# --- FINGERPRINTS ---
+def _digest(value, h):
+    if isinstance(value, pd.DataFrame):
+        h.update(json.dumps([list(map(str, value.columns)), list(map(str, value.dtypes))]).encode())
+        h.update(pd.util.hash_pandas_object(value, index=False).to_numpy().tobytes())
+    elif isinstance(value, dict):
+        for key in sorted(value):
+            h.update(str(key).encode())
+            _digest(value[key], h)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            _digest(item, h)
+    elif inspect.ismodule(value):
+        # A module stands for its source and that of the repo modules it
+        # uses, so editing a stage or anything it calls invalidates its cache
+        for module in repo_modules(value):
+            h.update(module.__name__.encode())
+            with open(inspect.getsourcefile(module), 'rb') as f:
+                h.update(f.read())
+    else:
+        h.update(json.dumps(value, sort_keys=True, default=str).encode())
+
+
+def repo_modules(module):
+    """
+    module and the modules next to it that it imports, directly or through
+    each other, sorted by name. Found from module globals, so both
+    `import x` and `from x import y` count; imports inside functions don't.
+    """
+    root = os.path.dirname(os.path.abspath(inspect.getsourcefile(module)))
+    found = {}
+    stack = [module]
+    while stack:
+        current = stack.pop()
+        path = getattr(current, '__file__', None)
+        if current.__name__ in found or not path or os.path.dirname(os.path.abspath(path)) != root:
+            continue
+        found[current.__name__] = current
+        for value in vars(current).values():
+            name = value.__name__ if inspect.ismodule(value) else getattr(value, '__module__', None)
+            if isinstance(name, str) and name in sys.modules:
+                stack.append(sys.modules[name])
+    return [found[name] for name in sorted(found)]
+
+
+def fingerprint(*parts):
+    h = hashlib.sha256()
+    _digest(list(parts), h)
+    return h.hexdigest()[:16]
+
+
+# --- MEMORY ---
+def rss_mb():
+    """Current RSS in MB, or None where it can't be read (no psutil and no /proc)."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2**20
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except OSError:
+        return None
+
+
+def peak_rss_mb():
+    # ru_maxrss is in bytes on macOS and KiB on Linux
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 1024
+
+
+def _round(value):
+    return None if value is None else round(value, 1)
+
+
+# --- RUNNER ---
+class Pipeline:
+    """
+    Runs stages in order and hands each output to the next in memory.
+
+    A stage with a fingerprint is skipped when an output cached under the
+    same fingerprint exists, and its cached output is handed on instead.
+    Every stage records wall time and memory.
+    """
+
+    def __init__(self, stages, params=None, cache_dir=CACHE_DIR, force=(), log_path=RUN_LOG):
+        self.stages = {stage.name: stage for stage in stages}
+        self.params = dict(params or {})
+        self.cache_dir = cache_dir
+        self.force = set(force)
+        self.log_path = log_path
+        self.outputs = {}
+        self.metrics = []
+
+    def output(self, name):
+        """Output of an earlier stage: from this run if it ran, else its last output on disk."""
+        if name not in self.outputs:
+            stage = self.stages[name]
+            self.outputs[name] = stage.load(self) if stage.load else None
+        return self.outputs[name]
+
+    def _cache_path(self, name, fp):
+        return os.path.join(self.cache_dir, f'{name}-{fp}.pkl')
+
+    def _store(self, name, fp, output):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        pd.to_pickle(output, self._cache_path(name, fp))
+        versions = sorted(glob.glob(os.path.join(self.cache_dir, f'{name}-*.pkl')), key=os.path.getmtime)
+        for old in versions[:-CACHE_VERSIONS_KEPT]:
+            os.remove(old)
+
+    def run_stage(self, name):
+        stage = self.stages[name]
+        start = time.perf_counter()
+        rss_before = rss_mb()
+        parts = stage.fingerprint(self) if stage.fingerprint else None
+        fp = None if parts is None else fingerprint(name, *parts)
+        cached = fp is not None and name not in self.force and os.path.exists(self._cache_path(name, fp))
+        if cached:
+            output = pd.read_pickle(self._cache_path(name, fp))
+        else:
+            output = stage.run(self)
+            if fp is not None:
+                self._store(name, fp, output)
+        self.outputs[name] = output
+        rss_after = rss_mb()
+        record = {
+            'stage': name, 'status': 'cached' if cached else 'ran', 'fingerprint': fp,
+            'seconds': round(time.perf_counter() - start, 3),
+            # None (null in the run log) where RSS can't be read
+            'rss_mb': _round(rss_after),
+            'rss_delta_mb': None if rss_after is None or rss_before is None else round(rss_after - rss_before, 1),
+            'peak_rss_mb': _round(peak_rss_mb()),
+        }
+        self.metrics.append(record)
+        rss = '' if rss_after is None else f" (RSS {record['rss_mb']:.0f} MB, {record['rss_delta_mb']:+.0f} MB)"
+        print(f"[{name}] {record['status']} in {record['seconds']:.2f}s{rss}")
+        return output
+
+    def run(self, names=None):
+        started_at = datetime.utcnow().isoformat()
+        for name in names or list(self.stages):
+            if self.run_stage(name) is None and self.stages[name].fingerprint:
+                print(f'[{name}] produced no output; stopping.')
+                break
+        if self.log_path:
+            with open(self.log_path, 'a') as f:
+                for record in self.metrics:
+                    f.write(json.dumps({'run_started_at': started_at, 'params': self.params, **record}, default=str) + '\n')
+        return self.metrics
+
+    def report(self):
+        lines = [f"{'stage':<12}{'status':<8}{'seconds':>9}{'RSS MB':>9}{'delta MB':>10}{'peak MB':>9}"]
+        def mb(value, width, sign=''):
+            return f'{"-":>{width}}' if value is None else f'{value:>{sign}{width}.0f}'
+
+        for r in self.metrics:
+            lines.append(f"{r['stage']:<12}{r['status']:<8}{r['seconds']:>9.2f}{mb(r['rss_mb'], 9)}"
+                         f"{mb(r['rss_delta_mb'], 10, '+')}{mb(r['peak_rss_mb'], 9)}")
+        return '\n'.join(lines)
+
+
+# --- STAGES ---
+# Modules are imported inside each stage so running later stages does not
+# need the earlier stages' dependencies (PRAW, torch, MongoDB).
+
+def run_scrape(pipeline):
+    import reddit_scraper as rs
+    import storage
+    storage.setup()
+    return rs.scrape_concurrent(rs.SUBREDDITS, rs.TICKERS, listings=['new'], incremental=True,
+                                max_workers=pipeline.params['workers'])
+
+
+def run_sentiment(pipeline):
+    import sentiment_analysis as sa
+    import storage
+    storage.setup()
+    sa.analyze_and_update_sentiment()
+    return True
+
+
+def features_fingerprint(pipeline):
+    import feature_engineering as fe
+    newest = fe.collection.find_one({'scored_at': {'$exists': True}}, {'scored_at': 1}, sort=[('scored_at', -1)])
+    return [fe, fe.FEATURES, pipeline.params['backend'], fe.collection.estimated_document_count(),
+            newest and newest['scored_at']]
+
+
+def run_features(pipeline):
+    import feature_engineering as fe
+    import storage
+    storage.setup()
+    if pipeline.params['full_rebuild']:
+        features = fe.build_features(backend=pipeline.params['backend'])
+    else:
+        features = fe.update_features(backend=pipeline.params['backend'])
+    return features or None
+
+
+def load_features(pipeline):
+    import feature_engineering as fe
+    return {g: fe.read_store(g) for g in fe.GRANULARITIES}
+
+
+def _granularity(pipeline):
+    return 'hourly' if pipeline.params['hourly'] else 'daily'
+
+
+def merge_fingerprint(pipeline):
+    import market_data_merge as mdm
+    sentiment_df = pipeline.output('features')[_granularity(pipeline)]
+    # Today's bar is still forming, so a range reaching today is refreshed each day
+    today = datetime.utcnow().date()
+    reaches_today = sentiment_df['date'].max().date() >= today
+    return [mdm, sentiment_df, pipeline.params['hourly'], today if reaches_today else None]
+
+
+def run_merge(pipeline):
+    import market_data_merge as mdm
+    sentiment_df = pipeline.output('features')[_granularity(pipeline)]
+    return mdm.build_merged(sentiment_df, hourly=pipeline.params['hourly'])
+
+
+def load_merged(pipeline):
+    import market_data_merge as mdm
+    from dataset_io import read_dataset
+    return read_dataset(mdm.OUTPUT_HOURLY if pipeline.params['hourly'] else mdm.OUTPUT_DAILY)
+
+
+def train_fingerprint(pipeline):
+    import ml_baseline as mlb
+    import ml_dataset
+    parts = [mlb, ml_dataset, mlb.FEATURES, pipeline.output('merge')]
+    if pipeline.params.get('walk_forward'):
+        import walk_forward as wf
+        parts += [wf, wf.MODEL_PARAMS, pipeline.params.get('rolling_window')]
+    return parts
+
+
+def run_train(pipeline):
+    import ml_baseline as mlb
+    # Both build their labels and feature matrix with ml_dataset
+    if pipeline.params.get('walk_forward'):
+        # Fold models are also cached in model_cache/, so only folds with new data are fitted
+        import walk_forward as wf
+        return wf.walk_forward(pipeline.output('merge'), window=pipeline.params.get('rolling_window'))
+    return mlb.train_and_evaluate(pipeline.output('merge'))
+
+
+def backtest_fingerprint(pipeline):
+    import backtest_engine
+    import backtest_framework as bf
+    # The simulation itself lives in backtest_engine
+    return [bf, backtest_engine, pipeline.output('merge'), pipeline.output('train')]
+
+
+def run_backtest(pipeline):
+    import backtest_framework as bf
+    return bf.run_backtests(pipeline.output('merge'), predictions=pipeline.output('train'))
+
+
+def load_backtest(pipeline):
+    import backtest_framework as bf
+    if not os.path.exists(bf.METRICS_CSV):
+        return None
+    read = lambda path: pd.read_csv(path, parse_dates=['date'], dtype={'tickers': str})
+    return {'rule': read(bf.RESULTS_CSVS['Rule']), 'ml': read(bf.RESULTS_CSVS['ML']),
+            'metrics': pd.read_csv(bf.METRICS_CSV, dtype={'tickers': str})}
+
+
+# Optional: only runs when asked for (--report or --stages report)
+def run_report(pipeline):
+    import backtest_reports as br
+    return br.report_backtests(pipeline.output('backtest'), charts=pipeline.params.get('report') == 'charts',
+                               workers=pipeline.params.get('report_workers'))
+
+
+STAGES = [
+    Stage('scrape', run_scrape),
+    Stage('sentiment', run_sentiment),
+    Stage('features', run_features, features_fingerprint, load_features),
+    Stage('merge', run_merge, merge_fingerprint, load_merged),
+    Stage('train', run_train, train_fingerprint),
+    Stage('backtest', run_backtest, backtest_fingerprint, load_backtest),
+    Stage('report', run_report),
+]
+STAGE_NAMES = [stage.name for stage in STAGES]
+DEFAULT_STAGES = [name for name in STAGE_NAMES if name != 'report']
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run scrape -> sentiment -> features -> merge -> train -> backtest.')
+    parser.add_argument('--stages', nargs='+', choices=STAGE_NAMES, default=DEFAULT_STAGES, help='Stages to run, in pipeline order')
+    parser.add_argument('--force', nargs='*', choices=STAGE_NAMES, default=[], help='Rerun these stages even if cached')
+    parser.add_argument('--hourly', action='store_true', help='Merge, train and backtest on hourly instead of daily features')
+    parser.add_argument('--backend', choices=('pandas', 'mongo'), default='pandas', help='Feature aggregation backend')
+    parser.add_argument('--full-rebuild', action='store_true', help='Rebuild all features instead of updating dirty buckets')
+    parser.add_argument('--workers', type=int, default=1, help='Scraper fetch threads')
+    parser.add_argument('--walk-forward', action='store_true', help='Train walk-forward folds (out-of-sample predictions for every fold)')
+    parser.add_argument('--rolling-window', type=int, help='With --walk-forward, train on only the last N buckets')
+    parser.add_argument('--report', choices=('summary', 'charts'), help='Write backtest_report/ after backtesting; charts also renders equity curves')
+    parser.add_argument('--report-workers', type=int, help='Chart rendering processes (default: all cores)')
+    args = parser.parse_args()
+    stages = set(args.stages) | ({'report'} if args.report else set())
+    params = {'hourly': args.hourly, 'backend': args.backend, 'full_rebuild': args.full_rebuild, 'workers': args.workers,
+              'walk_forward': args.walk_forward, 'rolling_window': args.rolling_window,
+              'report': args.report, 'report_workers': args.report_workers}
+    pipeline = Pipeline(STAGES, params, force=args.force)
+    pipeline.run([name for name in STAGE_NAMES if name in stages])
+    print(pipeline.report())
@@ -0,0 +1,211 @@
+import json
+import os
+from datetime import date, datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from asof_join import EXCHANGE_TZ
+
+# --- CONFIGURATION ---
+PRICE_CACHE_DIR = 'price_cache'
+BAR_COLUMNS = ['tickers', 'timestamp', 'Open', 'High', 'Low', 'Close', 'Volume']
+MAX_TICKERS_PER_REQUEST = 50
+
+# Bars live in <root>/<interval>/<ticker>.parquet with UTC timestamps.
+# <root>/coverage.json records, per interval and ticker, the half-open
+# [start, end) date ranges already fetched, so a rerun only asks the
+# fetcher for dates outside them. Coverage never includes today: the
+# current bar is still forming and is fetched again on the next run.
+# A range is only recorded for tickers the fetch succeeded for: a failed
+# request, or a ticker left out of an otherwise non-empty response, is
+# asked for again next run.
+
+
+class FetchError(Exception):
+    """A price request failed for every ticker in it (rate limit, network)."""
+
+
+def _to_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return pd.Timestamp(value).date()
+
+
+def merge_ranges(ranges):
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def missing_ranges(covered, start, end):
+    """Parts of [start, end) not inside any covered range."""
+    gaps = []
+    cursor = start
+    for lo, hi in merge_ranges(covered):
+        if hi <= cursor or lo >= end:
+            continue
+        if lo > cursor:
+            gaps.append((cursor, lo))
+        cursor = max(cursor, hi)
+    if cursor < end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+def download_bars(raw, tickers, errors=()):
+    """
+    Long BAR_COLUMNS bars from a yf.download frame. yfinance logs failures
+    instead of raising and returns NaN columns for them; errors are the
+    tickers it reported, which are left out, and if every ticker failed
+    this raises FetchError.
+    """
+    tickers = list(tickers)
+    errors = {e.upper() for e in errors}
+    failed = [t for t in tickers if t.upper() in errors]
+    if failed and len(failed) == len(tickers):
+        raise FetchError(f"no prices for {', '.join(failed)}")
+    if raw.empty:
+        return pd.DataFrame(columns=BAR_COLUMNS)
+    if not isinstance(raw.columns, pd.MultiIndex):
+        raw.columns = pd.MultiIndex.from_product([tickers, raw.columns])
+    bars = raw.stack(level=0, future_stack=True).rename_axis(['timestamp', 'tickers']).reset_index()
+    bars = bars[~bars['tickers'].isin(failed)].dropna(subset=['Close'])
+    # Naive timestamps (daily bars unless ignore_tz=False) are exchange-local
+    # session dates; read as UTC, day D would map to D-1 evening in New York
+    if bars['timestamp'].dt.tz is None:
+        bars['timestamp'] = bars['timestamp'].dt.tz_localize(EXCHANGE_TZ)
+    bars['timestamp'] = bars['timestamp'].dt.tz_convert('UTC')
+    return bars[BAR_COLUMNS].reset_index(drop=True)
+
+
+class YFinanceFetcher:
+    """Batched yf.download: one request for many tickers over the same dates."""
+
+    def __call__(self, tickers, start, end, interval):
+        import yfinance as yf
+        raw = yf.download(list(tickers), start=start, end=end, interval=interval, group_by='ticker',
+                          auto_adjust=True, threads=True, progress=False, ignore_tz=False)
+        # Filled by each download with the tickers it failed for
+        return download_bars(raw, tickers, getattr(yf.shared, '_ERRORS', {}))
+
+
+class PriceStore:
+    """
+    Local OHLCV cache keyed by (ticker, interval).
+
+    ``fetcher(tickers, start, end, interval)`` returns bars for a list of
+    tickers in the long BAR_COLUMNS layout; it defaults to yfinance and can
+    be any callable (tests use a local stand-in). ``clock`` returns today's
+    UTC date.
+    """
+
+    def __init__(self, root=PRICE_CACHE_DIR, fetcher=None, clock=lambda: datetime.utcnow().date()):
+        self.root = root
+        self.fetcher = fetcher or YFinanceFetcher()
+        self.clock = clock
+        self.requests = 0
+        self._coverage_path = os.path.join(root, 'coverage.json')
+        self._coverage = self._load_coverage()
+
+    # --- COVERAGE ---
+    def _load_coverage(self):
+        if not os.path.exists(self._coverage_path):
+            return {}
+        with open(self._coverage_path) as f:
+            raw = json.load(f)
+        return {
+            interval: {t: [(date.fromisoformat(a), date.fromisoformat(b)) for a, b in ranges] for t, ranges in tickers.items()}
+            for interval, tickers in raw.items()
+        }
+
+    def _save_coverage(self):
+        os.makedirs(self.root, exist_ok=True)
+        raw = {
+            interval: {t: [[a.isoformat(), b.isoformat()] for a, b in ranges] for t, ranges in tickers.items()}
+            for interval, tickers in self._coverage.items()
+        }
+        tmp = f'{self._coverage_path}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(raw, f, indent=1, sort_keys=True)
+        os.replace(tmp, self._coverage_path)
+
+    def covered(self, ticker, interval):
+        return self._coverage.get(interval, {}).get(ticker, [])
+
+    def missing(self, ticker, interval, start, end):
+        return missing_ranges(self.covered(ticker, interval), _to_date(start), _to_date(end))
+
+    def _mark_covered(self, tickers, interval, start, end):
+        end = min(end, self.clock())
+        if end <= start:
+            return
+        by_ticker = self._coverage.setdefault(interval, {})
+        for ticker in tickers:
+            by_ticker[ticker] = merge_ranges(by_ticker.get(ticker, []) + [(start, end)])
+
+    # --- BARS ---
+    def _bars_path(self, ticker, interval):
+        return os.path.join(self.root, interval, f'{ticker}.parquet')
+
+    def _read_bars(self, ticker, interval):
+        path = self._bars_path(ticker, interval)
+        if not os.path.exists(path):
+            return pd.DataFrame(columns=BAR_COLUMNS)
+        return pq.read_table(path, memory_map=True).to_pandas()
+
+    def _write_bars(self, ticker, interval, new_bars):
+        path = self._bars_path(ticker, interval)
+        bars = new_bars
+        if os.path.exists(path):
+            bars = pd.concat([self._read_bars(ticker, interval), new_bars], ignore_index=True)
+        # A refetched bar (e.g. today's, still forming last run) replaces the cached one
+        bars = bars.drop_duplicates('timestamp', keep='last').sort_values('timestamp')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        pq.write_table(pa.Table.from_pandas(bars[BAR_COLUMNS], preserve_index=False), path)
+
+    def refresh(self, tickers, start, end, interval='1d'):
+        """Fetch the gaps in [start, end) for each ticker. Tickers with the same gap share a request."""
+        start, end = _to_date(start), _to_date(end)
+        batches = {}
+        for ticker in dict.fromkeys(tickers):
+            for gap in self.missing(ticker, interval, start, end):
+                batches.setdefault(gap, []).append(ticker)
+        for (gap_start, gap_end), gap_tickers in sorted(batches.items()):
+            for i in range(0, len(gap_tickers), MAX_TICKERS_PER_REQUEST):
+                chunk = gap_tickers[i:i + MAX_TICKERS_PER_REQUEST]
+                self.requests += 1
+                try:
+                    bars = self.fetcher(chunk, gap_start, gap_end, interval)
+                except FetchError as e:
+                    print(f'Prices {gap_start}..{gap_end} not fetched, will retry next run: {e}')
+                    continue
+                for ticker, ticker_bars in bars.groupby('tickers'):
+                    self._write_bars(ticker, interval, ticker_bars)
+                # No bars for anyone is a gap without trading days; no bars for
+                # some tickers while others have them is a failed fetch
+                fetched = set(bars['tickers'])
+                self._mark_covered([t for t in chunk if t in fetched] if fetched else chunk,
+                                   interval, gap_start, gap_end)
+                # Save after every request so an interrupted run keeps what it fetched
+                self._save_coverage()
+
+    def get_bars(self, tickers, start, end, interval='1d'):
+        """Bars for tickers with timestamps in [start, end) (UTC dates), fetching only what is missing."""
+        self.refresh(tickers, start, end, interval)
+        lo = pd.Timestamp(_to_date(start), tz='UTC')
+        hi = pd.Timestamp(_to_date(end), tz='UTC')
+        frames = []
+        for ticker in dict.fromkeys(tickers):
+            bars = self._read_bars(ticker, interval)
+            frames.append(bars[(bars['timestamp'] >= lo) & (bars['timestamp'] < hi)])
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            return pd.DataFrame(columns=BAR_COLUMNS)
+        return pd.concat(frames, ignore_index=True)
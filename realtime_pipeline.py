@@ -1,8 +1,12 @@
+import os
 import praw
 import yfinance as yf
+import threading
 import time
 from datetime import datetime
-from sentiment_analysis import clean_text, sia, finbert_score
+from decayed_sentiment import DecayedSentiment, engagement_weight
+from sentiment_analysis import clean_text, score_cleaned, warm_up
+from ticker_matcher import get_matcher
 
 # --- CONFIGURATION ---
 REDDIT_CLIENT_ID = 'YOUR_CLIENT_ID'
@@ -10,6 +14,9 @@ REDDIT_CLIENT_SECRET = 'YOUR_CLIENT_SECRET'
 REDDIT_USER_AGENT = 'Sentiment Analysis v1.0'
 SUBREDDITS = ['wallstreetbets', 'investing', 'stocks']
 TICKERS = ['AAPL', 'TSLA', 'GME', 'AMC', 'NVDA', 'MSFT', 'SPY']
+TICKER_MATCHER = get_matcher(TICKERS)
+STATE_PATH = 'realtime_decayed_state.json'
+SEED_STATE_PATH = 'decayed_sentiment_state.json'  # The feature build's state, used on the first start
 
 # --- REDDIT SETUP ---
 reddit = praw.Reddit(
@@ -18,25 +25,26 @@ reddit = praw.Reddit(
     user_agent=REDDIT_USER_AGENT
 )
 
-# --- IN-MEMORY BUFFER ---
-sentiment_buffer = {ticker: [] for ticker in TICKERS}
+# --- DECAYED SENTIMENT STATE ---
+# O(1) per post and constant memory per ticker; saved every sync so a restart resumes where it stopped
+state, _ = DecayedSentiment.load(STATE_PATH if os.path.exists(STATE_PATH) else SEED_STATE_PATH)
+state_lock = threading.Lock()
 
 # --- STREAM REDDIT POSTS ---
 def stream_reddit():
     for submission in reddit.subreddit('+'.join(SUBREDDITS)).stream.submissions(skip_existing=True):
         text = f"{submission.title} {submission.selftext}".upper()
-        mentioned = [ticker for ticker in TICKERS if f" {ticker} " in f" {text} "]
+        mentioned = TICKER_MATCHER.match(text)
         if mentioned:
             cleaned = clean_text(text)
-            vader_sent = sia.polarity_scores(cleaned)
-            finbert_sent = finbert_score(cleaned)
+            # Shared cache: the batch job reuses these scores later
+            scores = score_cleaned(cleaned)
+            vader_sent = scores['sentiment']
+            finbert_sent = scores['finbert_sentiment']
+            weight = engagement_weight(submission.score, submission.num_comments)
             for ticker in mentioned:
-                sentiment_buffer[ticker].append({
-                    'timestamp': datetime.utcnow(),
-                    'vader': vader_sent,
-                    'finbert': finbert_sent,
-                    'text': submission.title
-                })
+                with state_lock:
+                    state.update(ticker, datetime.utcnow(), vader_sent['compound'], weight)
                 print(f"[Reddit] {ticker} | VADER: {vader_sent['compound']:.3f} | FinBERT: {finbert_sent} | {submission.title}")
 
 # --- FETCH LIVE MARKET DATA ---
@@ -53,15 +61,21 @@ def fetch_live_price(ticker):
 # --- SYNCHRONIZE AND PRINT ---
 def sync_and_print():
     while True:
+        now = datetime.utcnow()
         for ticker in TICKERS:
-            if sentiment_buffer[ticker]:
-                latest_sent = sentiment_buffer[ticker][-1]
+            with state_lock:
+                snapshot = state.snapshot(ticker, at=now)
+            if snapshot:
                 price = fetch_live_price(ticker)
-                print(f"[Sync] {ticker} | Price: {price} | Sentiment: {latest_sent['vader']['compound']:.3f} | Time: {latest_sent['timestamp']}")
+                print(f"[Sync] {ticker} | Price: {price} | Sentiment: {snapshot['decayed_sentiment']:.3f} "
+                      f"(weight {snapshot['decayed_weight']:.1f}) | Time: {now}")
+        with state_lock:
+            state.save(STATE_PATH)
         time.sleep(60)
 
 if __name__ == '__main__':
-    import threading
+    # Load NLTK data and FinBERT before the stream starts instead of on the first post
+    warm_up(mongo=False)
     reddit_thread = threading.Thread(target=stream_reddit, daemon=True)
     reddit_thread.start()
     sync_and_print()
@@ -1,69 +1,176 @@
-import praw
-import pymongo
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pymongo import UpdateOne
 import pandas as pd
 from datetime import datetime, timedelta
-import re
 import config
+import storage
+from ticker_matcher import get_matcher
+from reddit_sources import PrawSource, HttpJsonSource, TokenBucket, LISTINGS
 
 # --- CONFIGURATION ---
 REDDIT_CLIENT_ID = config.client_id
 REDDIT_CLIENT_SECRET = config.client_secret
 REDDIT_USER_AGENT = 'Sentiment Analysis v1.0'
-MONGO_URI = 'mongodb://localhost:27017/'  # Or your MongoDB Atlas URI
 SUBREDDITS = ['wallstreetbets', 'investing', 'stocks']
 TICKERS = ['AAPL', 'TSLA', 'GME', 'AMC', 'NVDA', 'MSFT', 'SPY']
-DB_NAME = 'reddit_sentiment'
-COLLECTION_NAME = 'posts'
+# Fields refreshed on every sighting of a post; everything else is written once
+MUTABLE_FIELDS = ('score', 'num_comments')
+LISTING_LIMIT = 1000  # Reddit never pages past ~1000 items per listing
+UPSERT_BATCH_SIZE = 100
+MAX_FETCH_WORKERS = 8
 
 # --- SETUP ---
-# Reddit API
-reddit = praw.Reddit(
-    client_id=REDDIT_CLIENT_ID,
-    client_secret=REDDIT_CLIENT_SECRET,
-    user_agent=REDDIT_USER_AGENT
-)
+# Reddit API: every fetch thread shares one rate-limit budget
+rate_limiter = TokenBucket.per_minute()
+reddit_source = PrawSource(REDDIT_CLIENT_ID, REDDIT_CLIENT_SECRET, REDDIT_USER_AGENT, limiter=rate_limiter)
 
-# MongoDB
-mongo_client = pymongo.MongoClient(MONGO_URI)
-db = mongo_client[DB_NAME]
-collection = db[COLLECTION_NAME]
+# MongoDB (pooled client shared by the fetch threads)
+collection = storage.posts
+checkpoints = storage.checkpoints
 
-# --- SCRAPING FUNCTION ---
-def fetch_posts(subreddit_name, tickers, hours=24):
-    subreddit = reddit.subreddit(subreddit_name)
-    time_filter = 'day' if hours == 24 else 'all'
-    posts = []
-    for submission in subreddit.top(time_filter=time_filter, limit=1000):
+# --- SCRAPING FUNCTIONS ---
+def _post_data(submission, subreddit_name, created_utc, matcher):
+    title = submission.title
+    selftext = submission.selftext or ''
+    mentioned = matcher.match(f"{title} {selftext}")
+    if not mentioned:
+        return None
+    return {
+        'id': submission.id,
+        'subreddit': subreddit_name,
+        'title': title,
+        'selftext': selftext,
+        'created_utc': created_utc,
+        'tickers': mentioned,
+        'score': submission.score,
+        'num_comments': submission.num_comments,
+        'permalink': submission.permalink,
+        'url': submission.url
+    }
+
+def iter_submissions(subreddit_name, kind, hours=24, checkpoint=None, source=None):
+    """
+    Yield (submission, created_utc) for one listing, newest window only.
+    /new is newest-first, so there we stop paging as soon as we reach the
+    checkpointed post or the end of the window. hot/top are not time-ordered
+    and are filtered instead.
+    """
+    source = source or reddit_source
+    cutoff = datetime.utcnow() - timedelta(hours=hours)
+    if checkpoint:
+        cutoff = checkpoint['newest_created_utc']
+    time_filter = 'day' if hours <= 24 else 'all'
+    # Sources fetch pages lazily, so breaking out of the loop stops paging
+    for submission in source.listing(subreddit_name, kind, limit=LISTING_LIMIT, time_filter=time_filter):
         created_utc = datetime.utcfromtimestamp(submission.created_utc)
-        if created_utc < datetime.utcnow() - timedelta(hours=hours):
+        if kind == 'new':
+            if checkpoint and submission.id == checkpoint['newest_id']:
+                return
+            # Posts created in the checkpoint's second may be new; upserts make re-reading them harmless
+            if created_utc < cutoff:
+                return
+        elif created_utc < cutoff:
             continue
-        title = submission.title
-        selftext = submission.selftext or ''
-        text = f"{title} {selftext}".upper()
-        mentioned = [ticker for ticker in tickers if re.search(rf'\b{ticker}\b', text)]
-        if mentioned:
-            post_data = {
-                'id': submission.id,
-                'subreddit': subreddit_name,
-                'title': title,
-                'selftext': selftext,
-                'created_utc': created_utc,
-                'tickers': mentioned,
-                'score': submission.score,
-                'num_comments': submission.num_comments,
-                'permalink': submission.permalink,
-                'url': submission.url
-            }
+        yield submission, created_utc
+
+def fetch_posts(subreddit_name, tickers, hours=24, source=None):
+    matcher = get_matcher(tickers)
+    posts = []
+    for submission, created_utc in iter_submissions(subreddit_name, 'top', hours=hours, source=source):
+        post_data = _post_data(submission, subreddit_name, created_utc, matcher)
+        if post_data:
             posts.append(post_data)
     return posts
 
+# --- STORAGE ---
+def upsert_posts(posts):
+    """Idempotent write keyed on the Reddit id; returns the number of new posts."""
+    if not posts:
+        return 0
+    ops = []
+    for post in posts:
+        mutable = {k: post[k] for k in MUTABLE_FIELDS}
+        # New posts join the unscored backlog; a re-seen post keeps its scores
+        immutable = {**{k: v for k, v in post.items() if k not in MUTABLE_FIELDS}, storage.PENDING_FIELD: True}
+        ops.append(UpdateOne({'id': post['id']}, {'$set': mutable, '$setOnInsert': immutable}, upsert=True))
+    result = collection.bulk_write(ops, ordered=False)
+    return result.upserted_count
+
+def load_checkpoint(subreddit_name):
+    return checkpoints.find_one({'_id': subreddit_name})
+
+def save_checkpoint(subreddit_name, newest):
+    checkpoints.update_one(
+        {'_id': subreddit_name},
+        {'$set': {**newest, 'updated_at': datetime.utcnow()}},
+        upsert=True
+    )
+
+def scrape_listing(subreddit_name, kind, tickers, hours=24, incremental=False, source=None):
+    """
+    Fetch one subreddit listing and upsert matches in small batches as pages
+    arrive. Incremental /new runs resume from, and then advance, the
+    subreddit's checkpoint. Returns (matched, inserted).
+    """
+    matcher = get_matcher(tickers)
+    checkpoint = load_checkpoint(subreddit_name) if incremental and kind == 'new' else None
+    newest = None
+    buffer = []
+    matched = inserted = 0
+    for submission, created_utc in iter_submissions(subreddit_name, kind, hours=hours, checkpoint=checkpoint, source=source):
+        if newest is None:
+            newest = {'newest_id': submission.id, 'newest_created_utc': created_utc}
+        post_data = _post_data(submission, subreddit_name, created_utc, matcher)
+        if post_data:
+            buffer.append(post_data)
+        if len(buffer) >= UPSERT_BATCH_SIZE:
+            matched += len(buffer)
+            inserted += upsert_posts(buffer)
+            buffer = []
+    matched += len(buffer)
+    inserted += upsert_posts(buffer)
+    # Only advance the checkpoint once the posts are safely stored
+    if incremental and kind == 'new' and newest:
+        save_checkpoint(subreddit_name, newest)
+    return matched, inserted
+
+def scrape_concurrent(subreddits, tickers, listings=LISTINGS, hours=24, incremental=False, max_workers=MAX_FETCH_WORKERS, source=None):
+    """
+    Fan out over every (subreddit, listing) pair on a thread pool. All
+    threads draw from the source's shared token bucket, so adding
+    subreddits adds parallelism without exceeding the API quota.
+    """
+    get_matcher(tickers)  # Compile once before the threads start
+    total_inserted = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            pool.submit(scrape_listing, sub, kind, tickers, hours, incremental, source): (sub, kind)
+            for sub in subreddits for kind in listings
+        }
+        for future in as_completed(futures):
+            sub, kind = futures[future]
+            try:
+                matched, inserted = future.result()
+            except Exception as e:
+                print(f"Error scraping r/{sub}/{kind}: {e}")
+                continue
+            print(f"r/{sub}/{kind}: {matched} matching posts, {inserted} new")
+            total_inserted += inserted
+    return total_inserted
+
 # --- MAIN SCRIPT ---
 if __name__ == '__main__':
-    all_posts = []
-    for sub in SUBREDDITS:
-        posts = fetch_posts(sub, TICKERS, hours=24)
-        if posts:
-            collection.insert_many(posts)
-            print(f"Inserted {len(posts)} posts from r/{sub}")
-        all_posts.extend(posts)
-    print(f"Total posts inserted: {len(all_posts)}")
+    parser = argparse.ArgumentParser(description='Scrape ticker mentions from Reddit into MongoDB.')
+    parser.add_argument('--incremental', action='store_true', help='Only fetch posts newer than the per-subreddit checkpoint')
+    parser.add_argument('--hours', type=int, default=24, help='Look-back window (first incremental run, or top mode)')
+    parser.add_argument('--workers', type=int, default=1, help='Fetch subreddits/listings concurrently with this many threads')
+    parser.add_argument('--listings', nargs='+', choices=LISTINGS, help='Listings to fetch (default: new if incremental, else top)')
+    parser.add_argument('--base-url', help='Fetch from a Reddit-compatible JSON endpoint (e.g. a local fake server) instead of PRAW')
+    args = parser.parse_args()
+    source = HttpJsonSource(args.base_url, limiter=rate_limiter) if args.base_url else reddit_source
+    listings = args.listings or (['new'] if args.incremental else ['top'])
+    storage.setup()
+    total_inserted = scrape_concurrent(SUBREDDITS, TICKERS, listings=listings, hours=args.hours,
+                                       incremental=args.incremental, max_workers=args.workers, source=source)
+    print(f"Total posts inserted: {total_inserted}")
@@ -21,6 +21,6 @@ dag = DAG(
 
 run_scraper = BashOperator(
     task_id='run_reddit_scraper',
-    bash_command='python3 /Users/satviknayak/work/projects/sentiment_trading/reddit_scraper.py',
+    bash_command='python3 /Users/satviknayak/work/projects/sentiment_trading/reddit_scraper.py --incremental',
     dag=dag,
 )
@@ -0,0 +1,127 @@
+import json
+import threading
+import time
+import urllib.parse
+import urllib.request
+from types import SimpleNamespace
+
+# --- CONFIGURATION ---
+# Reddit allows 100 OAuth requests per minute per client id
+REDDIT_REQUESTS_PER_MINUTE = 100
+REDDIT_BURST = 10
+PAGE_SIZE = 100  # Reddit listings return at most 100 items per request
+LISTINGS = ('new', 'hot', 'top')
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket shared by every fetch thread, so the total
+    request rate stays within one API quota no matter how many threads run.
+    """
+
+    def __init__(self, rate_per_sec, capacity, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate_per_sec
+        self.capacity = capacity
+        self._tokens = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._last = clock()
+        self._lock = threading.Lock()
+        self.acquired = 0
+
+    @classmethod
+    def per_minute(cls, requests_per_minute=REDDIT_REQUESTS_PER_MINUTE, burst=REDDIT_BURST):
+        return cls(requests_per_minute / 60.0, burst)
+
+    def acquire(self, tokens=1):
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    self.acquired += tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            self._sleep(wait)
+
+
+# --- SOURCES ---
+# A source yields submission-like objects (id, title, selftext, created_utc,
+# score, num_comments, permalink, url) for one subreddit listing. Every
+# request it makes goes through the shared limiter.
+
+class PrawSource:
+    """Reddit API via PRAW. PRAW is not thread-safe, so each thread gets its own client."""
+
+    def __init__(self, client_id, client_secret, user_agent, limiter=None):
+        self._credentials = dict(client_id=client_id, client_secret=client_secret, user_agent=user_agent)
+        self.limiter = limiter or TokenBucket.per_minute()
+        self._local = threading.local()
+
+    def _reddit(self):
+        if not hasattr(self._local, 'reddit'):
+            import praw
+            self._local.reddit = praw.Reddit(**self._credentials)
+        return self._local.reddit
+
+    def listing(self, subreddit_name, kind, limit=None, time_filter='day'):
+        subreddit = self._reddit().subreddit(subreddit_name)
+        if kind == 'top':
+            submissions = subreddit.top(time_filter=time_filter, limit=limit)
+        else:
+            submissions = getattr(subreddit, kind)(limit=limit)
+        # PRAW fetches one page per PAGE_SIZE items; take a token before each page
+        yield from _throttled(submissions, self.limiter)
+
+
+def _throttled(submissions, limiter):
+    iterator = iter(submissions)
+    count = 0
+    while True:
+        if count % PAGE_SIZE == 0:
+            limiter.acquire()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        count += 1
+        yield item
+
+
+class HttpJsonSource:
+    """
+    Reddit's JSON listing endpoints (``/r/<sub>/<kind>.json``) over plain HTTP.
+    Point ``base_url`` at a local fake server to test the scraper offline.
+    """
+
+    def __init__(self, base_url='https://www.reddit.com', limiter=None, user_agent='Sentiment Analysis v1.0', timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.limiter = limiter or TokenBucket.per_minute()
+        self.user_agent = user_agent
+        self.timeout = timeout
+
+    def _get(self, path, params):
+        self.limiter.acquire()
+        url = f"{self.base_url}{path}?{urllib.parse.urlencode(params)}"
+        request = urllib.request.Request(url, headers={'User-Agent': self.user_agent})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.load(response)
+
+    def listing(self, subreddit_name, kind, limit=None, time_filter='day'):
+        after = None
+        seen = 0
+        while limit is None or seen < limit:
+            params = {'limit': PAGE_SIZE if limit is None else min(PAGE_SIZE, limit - seen), 'raw_json': 1}
+            if kind == 'top':
+                params['t'] = time_filter
+            if after:
+                params['after'] = after
+            page = self._get(f'/r/{subreddit_name}/{kind}.json', params)['data']
+            for child in page['children']:
+                seen += 1
+                yield SimpleNamespace(**child['data'])
+            after = page.get('after')
+            if not after or not page['children']:
+                return
@@ -0,0 +1,70 @@
+from collections import namedtuple
+
+# A feature is one column computed over each ticker's bucket series.
+# `name` may use {window} and {unit} ('d' for daily, 'h' for hourly) so one
+# spec serves every granularity.
+Feature = namedtuple('Feature', ['name', 'kind', 'window', 'source', 'min_periods'], defaults=('avg_sentiment', 1))
+
+KINDS = ('diff', 'momentum', 'mean', 'std', 'ewm', 'zscore')
+
+# The columns the feature CSVs have always had
+LEGACY_FEATURES = (
+    Feature('sentiment_change', 'diff', 1),
+    Feature('rolling_avg_sentiment', 'mean', 3),
+    Feature('momentum_{window}{unit}', 'momentum', 3),
+)
+
+
+def column_name(feature, unit):
+    return feature.name.format(window=feature.window, unit=unit)
+
+
+def column_names(features, unit):
+    return [column_name(feature, unit) for feature in features]
+
+
+def lookback(features):
+    """Rows before a changed bucket that can still affect it; None if unbounded (EWM)."""
+    rows = 0
+    for feature in features:
+        if feature.kind == 'ewm':
+            return None
+        rows = max(rows, feature.window if feature.kind in ('diff', 'momentum') else feature.window - 1)
+    return rows
+
+
+def add_features(frame, features, unit, group='tickers'):
+    """
+    Add one column per feature to frame, computed within each `group` value.
+
+    frame must be sorted by group and then time. Every feature is one grouped
+    pandas operation over all tickers (no per-ticker Python loop), and
+    results align back on frame's index, which need not be contiguous.
+    """
+    grouped = frame.groupby(group, sort=False)
+    rolling = {}
+
+    def rolled(source, window, min_periods):
+        # Shared by mean/std/zscore over the same window
+        key = (source, window, min_periods)
+        if key not in rolling:
+            rolling[key] = grouped[source].rolling(window, min_periods=min_periods)
+        return rolling[key]
+
+    for feature in features:
+        if feature.kind not in KINDS:
+            raise ValueError(f'Unknown feature kind {feature.kind!r} (expected one of {KINDS})')
+        values = grouped[feature.source]
+        if feature.kind in ('diff', 'momentum'):
+            result = values.diff(feature.window)
+        elif feature.kind == 'mean':
+            result = rolled(feature.source, feature.window, feature.min_periods).mean().droplevel(0)
+        elif feature.kind == 'std':
+            result = rolled(feature.source, feature.window, feature.min_periods).std().droplevel(0)
+        elif feature.kind == 'ewm':
+            result = values.ewm(span=feature.window, min_periods=feature.min_periods).mean().droplevel(0)
+        else:
+            window = rolled(feature.source, feature.window, feature.min_periods)
+            result = (frame[feature.source] - window.mean().droplevel(0)) / window.std().droplevel(0)
+        frame[column_name(feature, unit)] = result
+    return frame
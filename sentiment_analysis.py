@@ -1,67 +1,334 @@
-import pymongo
-import nltk
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
+import os
+import time
+import argparse
+import importlib
 import re
-from bson.objectid import ObjectId
-import torch
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
-from nltk.corpus import stopwords
+from datetime import datetime
+from pymongo import UpdateOne
+import storage
+from lazy_resource import LazyResource
+from sentiment_cache import SentimentCache, CACHE_PATH
 
 # --- CONFIGURATION ---
-MONGO_URI = 'mongodb://localhost:27017/'  # Or your MongoDB Atlas URI
-DB_NAME = 'reddit_sentiment'
-COLLECTION_NAME = 'posts'
+FINBERT_BATCH_SIZE = 32  # Posts per forward pass in batched mode
+FINBERT_MAX_LENGTH = 512
+BACKFILL_CHUNK_SIZE = 1000  # Unscored posts read (and committed) per chunk
+FINBERT_MODEL_NAME = 'yiyanghkust/finbert-tone'
+# 'fp32' (reference) or 'int8' (dynamic quantization of the Linear layers, CPU only)
+FINBERT_INFERENCE_MODE = os.environ.get('FINBERT_INFERENCE_MODE', 'fp32')
+FINBERT_NUM_THREADS = int(os.environ.get('FINBERT_NUM_THREADS', '0'))  # 0 = torch default
+FINBERT_INFERENCE_MODES = ('fp32', 'int8')
+SENTIMENT_CACHE_PATH = CACHE_PATH
+
+# Heavy resources below are LazyResource accessors: nothing is downloaded,
+# loaded or connected until first use (or an explicit warm_up()).
 
 # --- NLTK SETUP ---
-nltk.download('vader_lexicon')
-nltk.download('stopwords')
-STOPWORDS = set(stopwords.words('english'))
+def _nltk_resource(path, package):
+    import nltk
+    try:
+        nltk.data.find(path)
+    except LookupError:
+        nltk.download(package, quiet=True)
+
+def _load_stopwords():
+    _nltk_resource('corpora/stopwords', 'stopwords')
+    from nltk.corpus import stopwords
+    return frozenset(stopwords.words('english'))
+
+STOPWORDS = LazyResource(_load_stopwords, 'stopwords')
 
 # --- TEXT PREPROCESSING ---
+URL_PATTERN = re.compile(r'http\S+')
+SPECIAL_CHAR_PATTERN = re.compile(r'[^A-Za-z0-9\s]')
+
 def clean_text(text):
-    text = re.sub(r'http\S+', '', text)  # Remove URLs
-    text = re.sub(r'[^A-Za-z0-9\s]', '', text)  # Remove special characters
+    stopword_set = STOPWORDS.load()
+    text = URL_PATTERN.sub('', text)  # Remove URLs
+    text = SPECIAL_CHAR_PATTERN.sub('', text)  # Remove special characters
     text = text.lower()
     tokens = text.split()
-    tokens = [t for t in tokens if t not in STOPWORDS]
+    tokens = [t for t in tokens if t not in stopword_set]
     return ' '.join(tokens)
 
+# --- BATCH PREPROCESSING ---
+# Arrow (RE2) versions of the clean_text patterns. RE2's \s differs from
+# Python's, so whitespace is spelled out as Python's ASCII \s. Rows with any
+# non-ASCII character or \x1c-\x1f separator fall back to clean_text, which
+# keeps the batch output byte-for-byte identical.
+_PY_ASCII_WS = r' \t\n\r\x0b\x0c\x1c-\x1f'
+URL_PATTERN_RE2 = 'http[^' + _PY_ASCII_WS + ']+'
+SPECIAL_CHAR_PATTERN_RE2 = '[^A-Za-z0-9' + _PY_ASCII_WS + ']'
+FALLBACK_ROW_PATTERN_RE2 = r'[^\x00-\x1b\x20-\x7f]'
+
+def _as_large_string_array(texts):
+    import pyarrow as pa
+    if isinstance(texts, pa.ChunkedArray):
+        texts = texts.combine_chunks()
+    if isinstance(texts, pa.Array):
+        arr = texts.cast(pa.large_string())
+    else:
+        arr = pa.array(texts, type=pa.large_string(), from_pandas=True)
+    return arr.fill_null('')
+
+def clean_texts(texts):
+    """
+    clean_text over a whole column (list, pandas Series or Arrow array) using
+    Arrow compute kernels: regex removal, lower-casing, whitespace split and
+    stopword filtering all run in C++ over the batch. Returns a list of str.
+    """
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    arr = _as_large_string_array(texts)
+    stopword_values = pa.array(sorted(STOPWORDS.load() | {''}), type=pa.large_string())
+    cleaned = pc.replace_substring_regex(arr, URL_PATTERN_RE2, '')
+    cleaned = pc.replace_substring_regex(cleaned, SPECIAL_CHAR_PATTERN_RE2, '')
+    cleaned = pc.ascii_lower(cleaned)
+    tokens = pc.ascii_split_whitespace(cleaned)
+    flat = pc.list_flatten(tokens)
+    parents = pc.list_parent_indices(tokens)
+    # '' is dropped too: Arrow keeps empty tokens from leading/trailing whitespace
+    keep = pc.invert(pc.is_in(flat, value_set=stopword_values))
+    counts = np.bincount(parents.filter(keep).to_numpy(), minlength=len(arr))
+    offsets = pa.array(np.concatenate([[0], np.cumsum(counts)]), type=pa.int64())
+    kept = pa.LargeListArray.from_arrays(offsets, flat.filter(keep))
+    result = pc.binary_join(kept, pa.scalar(' ', pa.large_string())).to_pylist()
+    fallback = pc.match_substring_regex(arr, FALLBACK_ROW_PATTERN_RE2).to_numpy(zero_copy_only=False)
+    for i in np.flatnonzero(fallback):
+        result[i] = clean_text(arr[i].as_py())
+    return result
+
+def vader_scores_batch(cleaned):
+    """VADER scores for a batch of cleaned texts; duplicate texts are scored once."""
+    scores = {text: None for text in cleaned}
+    for text in scores:
+        scores[text] = sia.polarity_scores(text)
+    return [scores[text] for text in cleaned]
+
+def preprocess_batch(texts):
+    """Cleaned text plus VADER neg/neu/pos/compound for a column of raw texts, as a DataFrame."""
+    import pandas as pd
+    cleaned = clean_texts(texts)
+    frame = pd.DataFrame(vader_scores_batch(cleaned), columns=['neg', 'neu', 'pos', 'compound'])
+    frame.insert(0, 'cleaned', cleaned)
+    if isinstance(texts, pd.Series):
+        frame.index = texts.index
+    return frame
+
 # --- FINBERT SETUP ---
-finbert_tokenizer = AutoTokenizer.from_pretrained('yiyanghkust/finbert-tone')
-finbert_model = AutoModelForSequenceClassification.from_pretrained('yiyanghkust/finbert-tone')
+torch = LazyResource(lambda: importlib.import_module('torch'), 'torch')
+
+def _load_finbert_tokenizer():
+    from transformers import AutoTokenizer
+    return AutoTokenizer.from_pretrained(FINBERT_MODEL_NAME)
+
+def load_finbert_model(mode=None, num_threads=None):
+    """Load FinBERT for CPU inference in the given mode (defaults to the configured one)."""
+    from transformers import AutoModelForSequenceClassification
+    mode = mode or FINBERT_INFERENCE_MODE
+    num_threads = FINBERT_NUM_THREADS if num_threads is None else num_threads
+    if mode not in FINBERT_INFERENCE_MODES:
+        raise ValueError(f"Unknown FinBERT inference mode {mode!r}; expected one of {FINBERT_INFERENCE_MODES}")
+    if num_threads:
+        torch.set_num_threads(num_threads)
+    model = AutoModelForSequenceClassification.from_pretrained(FINBERT_MODEL_NAME).eval()
+    if mode == 'int8':
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model
+
+def sentiment_model_id():
+    """Cache results are keyed by this id; it changes whenever scoring would change."""
+    suffix = '' if FINBERT_INFERENCE_MODE == 'fp32' else f'+{FINBERT_INFERENCE_MODE}'
+    return f'vader+{FINBERT_MODEL_NAME}{suffix}'
+
+finbert_tokenizer = LazyResource(_load_finbert_tokenizer, 'finbert_tokenizer')
+finbert_model = LazyResource(load_finbert_model, 'finbert_model')
 
 # --- FINBERT SCORING ---
-def finbert_score(text):
-    inputs = finbert_tokenizer(text, return_tensors='pt', truncation=True, max_length=512)
-    with torch.no_grad():
-        outputs = finbert_model(**inputs)
-        scores = torch.nn.functional.softmax(outputs.logits, dim=1)[0].tolist()
+def _finbert_probs(scores):
     return {
         'finbert_positive': scores[2],
         'finbert_neutral': scores[1],
         'finbert_negative': scores[0]
     }
 
+def finbert_score(text):
+    inputs = finbert_tokenizer(text, return_tensors='pt', truncation=True, max_length=FINBERT_MAX_LENGTH)
+    with torch.no_grad():
+        outputs = finbert_model(**inputs)
+        scores = torch.nn.functional.softmax(outputs.logits, dim=1)[0].tolist()
+    return _finbert_probs(scores)
+
+def _finbert_batch(texts, model=None):
+    # Dynamic padding: pad only to the longest text in this batch
+    inputs = finbert_tokenizer(texts, return_tensors='pt', padding='longest', truncation=True, max_length=FINBERT_MAX_LENGTH)
+    with torch.no_grad():
+        outputs = (model or finbert_model)(**inputs)
+        scores = torch.nn.functional.softmax(outputs.logits, dim=1).tolist()
+    return [_finbert_probs(s) for s in scores]
+
+def _length_buckets(texts, batch_size):
+    # Sort by length so each batch holds texts of similar size and short
+    # titles are not padded up to the longest post in the backlog
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    for start in range(0, len(order), batch_size):
+        yield order[start:start + batch_size]
+
+def finbert_score_batch(texts, batch_size=FINBERT_BATCH_SIZE, model=None):
+    """Score many texts with length-bucketed, dynamically padded batches.
+
+    Returns one result dict per input text, in input order. ``model``
+    overrides the configured FinBERT (e.g. to compare inference modes).
+    """
+    results = [None] * len(texts)
+    for bucket in _length_buckets(texts, batch_size):
+        for i, scores in zip(bucket, _finbert_batch([texts[i] for i in bucket], model=model)):
+            results[i] = scores
+    return results
+
 # --- MONGODB SETUP ---
-mongo_client = pymongo.MongoClient(MONGO_URI)
-db = mongo_client[DB_NAME]
-collection = db[COLLECTION_NAME]
+# The pooled client and collection are owned by storage; still lazy, nothing connects on import
+mongo_client = storage.client
+collection = storage.posts
 
 # --- VADER SETUP ---
-sia = SentimentIntensityAnalyzer()
+def _load_vader():
+    _nltk_resource('sentiment/vader_lexicon.zip', 'vader_lexicon')
+    from nltk.sentiment.vader import SentimentIntensityAnalyzer
+    return SentimentIntensityAnalyzer()
+
+sia = LazyResource(_load_vader, 'sia')
+
+# --- SENTIMENT CACHE ---
+sentiment_cache = LazyResource(lambda: SentimentCache(SENTIMENT_CACHE_PATH), 'sentiment_cache')
+
+# --- WARM-UP ---
+def warm_up(finbert=True, mongo=True):
+    """Load resources up front so a long-running service pays the cost at startup, not on the first post."""
+    resources = [STOPWORDS, sia, sentiment_cache]
+    if finbert:
+        resources += [torch, finbert_tokenizer, finbert_model]
+    if mongo:
+        resources += [collection]
+    for resource in resources:
+        resource.load()
+    if mongo:
+        mongo_client.admin.command('ping')
+
+def score_cleaned(cleaned):
+    """VADER + FinBERT scores for one cleaned text, served from the cache when possible."""
+    model_id = sentiment_model_id()
+    result = sentiment_cache.get(cleaned, model_id)
+    if result is None:
+        result = {'sentiment': sia.polarity_scores(cleaned), 'finbert_sentiment': finbert_score(cleaned)}
+        sentiment_cache.put(cleaned, model_id, result)
+    return result
+
+def score_cleaned_batch(cleaned):
+    """Batch version of score_cleaned; only cache misses reach FinBERT."""
+    model_id = sentiment_model_id()
+    results = [sentiment_cache.get(text, model_id) for text in cleaned]
+    # Group misses by text so duplicates within a batch are scored once
+    misses = {}
+    for i, result in enumerate(results):
+        if result is None:
+            misses.setdefault(cleaned[i], []).append(i)
+    if misses:
+        texts = list(misses)
+        for text, finbert_sentiment in zip(texts, _finbert_batch(texts)):
+            result = {'sentiment': sia.polarity_scores(text), 'finbert_sentiment': finbert_sentiment}
+            sentiment_cache.put(text, model_id, result)
+            for i in misses[text]:
+                results[i] = result
+    return results
 
 # --- PROCESS POSTS ---
-def analyze_and_update_sentiment():
-    posts = list(collection.find({'sentiment': {'$exists': False}}))
-    print(f"Found {len(posts)} posts to analyze.")
-    for post in posts:
-        text = f"{post.get('title', '')} {post.get('selftext', '')}"
-        cleaned = clean_text(text)
-        vader_sentiment = sia.polarity_scores(cleaned)
-        finbert_sentiment = finbert_score(cleaned)
-        # Add both sentiment scores to post
-        collection.update_one({'_id': post['_id']}, {'$set': {'sentiment': vader_sentiment, 'finbert_sentiment': finbert_sentiment}})
+UNSCORED_QUERY = storage.UNSCORED_QUERY
+# Scoring only needs the text; never pull whole documents
+SCORING_PROJECTION = {'_id': 1, 'title': 1, 'selftext': 1}
+
+def scored_fields(result):
+    """$set payload for a scored post. scored_at lets the feature job find new or re-scored posts."""
+    return {**result, 'scored_at': datetime.utcnow()}
+
+def scored_update(result, unset=None):
+    """Update for a scored post: set its scores and take it out of the unscored backlog."""
+    return {'$set': scored_fields(result), '$unset': {storage.PENDING_FIELD: '', **(unset or {})}}
+
+def _post_text(post):
+    return f"{post.get('title', '')} {post.get('selftext', '')}"
+
+def _score_posts(posts, batch_size):
+    if not batch_size:
+        for post in posts:
+            # Add both sentiment scores to post
+            collection.update_one({'_id': post['_id']}, scored_update(score_cleaned(clean_text(_post_text(post)))))
+        return
+    for batch, results in iter_scored_batches(posts, batch_size):
+        ops = [UpdateOne({'_id': post['_id']}, scored_update(result)) for post, result in zip(batch, results)]
+        # One round trip per batch instead of one per post
+        collection.bulk_write(ops, ordered=False)
+
+def iter_scored_batches(posts, batch_size=FINBERT_BATCH_SIZE):
+    """Yield (posts, results) per length-bucketed batch of sentiment results."""
+    cleaned = clean_texts([_post_text(post) for post in posts])
+    for bucket in _length_buckets(cleaned, batch_size):
+        yield [posts[i] for i in bucket], score_cleaned_batch([cleaned[i] for i in bucket])
+
+def iter_unscored_chunks(chunk_size=BACKFILL_CHUNK_SIZE):
+    """
+    Yield unscored posts (projected to _id/title/selftext) in _id order,
+    chunk_size at a time. Each chunk is its own short keyset query
+    (_id > last seen), so memory stays bounded, no server cursor has to
+    survive hours of FinBERT time, and a restarted job simply picks up the
+    posts that are still unscored.
+    """
+    last_id = None
+    while True:
+        query = dict(UNSCORED_QUERY)
+        if last_id is not None:
+            query['_id'] = {'$gt': last_id}
+        chunk = list(collection.find(query, SCORING_PROJECTION).sort('_id', 1).limit(chunk_size))
+        if not chunk:
+            return
+        yield chunk
+        last_id = chunk[-1]['_id']
+
+def analyze_and_update_sentiment(batch_size=FINBERT_BATCH_SIZE, chunk_size=BACKFILL_CHUNK_SIZE):
+    """
+    Score all unscored posts. ``batch_size=None`` uses the per-post path;
+    ``chunk_size=None`` loads the whole backlog up front instead of streaming it.
+    """
+    if chunk_size:
+        print(f"Found {collection.count_documents(UNSCORED_QUERY)} posts to analyze.")
+        chunks = iter_unscored_chunks(chunk_size)
+    else:
+        posts = list(collection.find(UNSCORED_QUERY, SCORING_PROJECTION))
+        print(f"Found {len(posts)} posts to analyze.")
+        chunks = [posts]
+    start = time.perf_counter()
+    scored = 0
+    for chunk in chunks:
+        # Each chunk is fully written before the next is read, so a crash loses at most one chunk of work
+        _score_posts(chunk, batch_size)
+        scored += len(chunk)
+        if chunk_size:
+            print(f"  {scored} posts scored ({scored / (time.perf_counter() - start):.1f} posts/sec)")
+    elapsed = time.perf_counter() - start
+    if scored:
+        print(f"Scored {scored} posts in {elapsed:.1f}s ({scored / elapsed:.1f} posts/sec).")
+        print(sentiment_cache.report())
     print("Sentiment analysis complete.")
 
 if __name__ == '__main__':
-    analyze_and_update_sentiment()
+    parser = argparse.ArgumentParser(description='Score unscored Reddit posts with VADER and FinBERT.')
+    parser.add_argument('--batch-size', type=int, default=FINBERT_BATCH_SIZE, help='FinBERT batch size (0 = per-post path)')
+    parser.add_argument('--chunk-size', type=int, default=BACKFILL_CHUNK_SIZE, help='Posts read and committed per chunk (0 = load the whole backlog)')
+    parser.add_argument('--inference-mode', choices=FINBERT_INFERENCE_MODES, default=FINBERT_INFERENCE_MODE, help='FinBERT CPU inference mode')
+    parser.add_argument('--num-threads', type=int, default=FINBERT_NUM_THREADS, help='torch intra-op threads (0 = torch default)')
+    args = parser.parse_args()
+    FINBERT_INFERENCE_MODE = args.inference_mode
+    FINBERT_NUM_THREADS = args.num_threads
+    storage.setup()
+    analyze_and_update_sentiment(batch_size=args.batch_size or None, chunk_size=args.chunk_size or None)
@@ -0,0 +1,161 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# --- CONFIGURATION ---
+CACHE_PATH = 'sentiment_cache.sqlite'
+MEMORY_MAX_ENTRIES = 50_000
+DISK_MAX_ENTRIES = 2_000_000
+DISK_EVICT_FRACTION = 0.01  # Headroom freed below the cap per eviction, so a full cache doesn't evict on every insert
+RECOUNT_EVERY = 1_000  # Inserts between recounts of the shared disk table
+TOUCH_BATCH = 1_000  # Memory hits whose last_used is written to disk in one batch
+
+
+def cache_key(cleaned_text, model_id):
+    """Content address for a cleaned text scored by a given model stack."""
+    digest = hashlib.sha256()
+    digest.update(model_id.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(cleaned_text.encode('utf-8'))
+    return digest.hexdigest()
+
+
+class SentimentCache:
+    """
+    Two-tier cache of sentiment results keyed by (cleaned text, model id).
+    Tier 1: in-process LRU (OrderedDict). Tier 2: SQLite file on disk.
+    Both tiers are size-bounded and evict least recently used entries.
+    Memory hits refresh last_used on disk in batches, so hot entries are not
+    evicted from SQLite. Several processes can share the file: the disk
+    size is recounted from the table, not tracked per process. Safe to
+    share between threads.
+    """
+
+    def __init__(self, path=CACHE_PATH, memory_max_entries=MEMORY_MAX_ENTRIES, disk_max_entries=DISK_MAX_ENTRIES,
+                 recount_every=RECOUNT_EVERY):
+        self.memory_max_entries = memory_max_entries
+        self.disk_max_entries = disk_max_entries
+        self.recount_every = recount_every
+        self._memory = OrderedDict()
+        self._touched = {}  # key -> time of its last memory hit, not yet written to disk
+        self._inserts_since_count = 0
+        self._lock = threading.Lock()
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0}
+        self._conn = None
+        if path:
+            # Autocommit + WAL keeps each write short so several processes can share the file
+            self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS sentiment_cache ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, last_used REAL NOT NULL)'
+            )
+            self._conn.execute('CREATE INDEX IF NOT EXISTS sentiment_cache_last_used ON sentiment_cache (last_used)')
+            (self._disk_count,) = self._conn.execute('SELECT COUNT(*) FROM sentiment_cache').fetchone()
+
+    # --- LOOKUP ---
+    def get(self, cleaned_text, model_id):
+        key = cache_key(cleaned_text, model_id)
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.stats['memory_hits'] += 1
+                self._touch(key)
+                return self._memory[key]
+            value = self._disk_get(key)
+            if value is None:
+                self.stats['misses'] += 1
+                return None
+            self.stats['disk_hits'] += 1
+            self._memory_put(key, value)
+            return value
+
+    def put(self, cleaned_text, model_id, value):
+        key = cache_key(cleaned_text, model_id)
+        with self._lock:
+            self._memory_put(key, value)
+            self._disk_put(key, value)
+
+    # --- MEMORY TIER ---
+    def _memory_put(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_max_entries:
+            self._memory.popitem(last=False)
+
+    # --- DISK TIER ---
+    def _touch(self, key):
+        if self._conn is None:
+            return
+        self._touched[key] = time.time()
+        if len(self._touched) >= TOUCH_BATCH:
+            self._flush_touched()
+
+    def _flush_touched(self):
+        if self._touched:
+            self._conn.executemany(
+                'UPDATE sentiment_cache SET last_used = MAX(last_used, ?) WHERE key = ?',
+                [(used, key) for key, used in self._touched.items()]
+            )
+            self._touched.clear()
+
+    def _disk_get(self, key):
+        if self._conn is None:
+            return None
+        row = self._conn.execute('SELECT value FROM sentiment_cache WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        self._conn.execute('UPDATE sentiment_cache SET last_used = ? WHERE key = ?', (time.time(), key))
+        return json.loads(row[0])
+
+    def _disk_put(self, key, value):
+        if self._conn is None:
+            return
+        now = time.time()
+        cursor = self._conn.execute(
+            'INSERT OR IGNORE INTO sentiment_cache (key, value, last_used) VALUES (?, ?, ?)',
+            (key, json.dumps(value), now)
+        )
+        if cursor.rowcount == 0:
+            self._conn.execute('UPDATE sentiment_cache SET value = ?, last_used = ? WHERE key = ?', (json.dumps(value), now, key))
+            return
+        self._disk_count += 1
+        self._inserts_since_count += 1
+        if self._disk_count > self.disk_max_entries or self._inserts_since_count >= self.recount_every:
+            self._evict()
+
+    def _evict(self):
+        # Other processes insert and evict too: count the table itself
+        (self._disk_count,) = self._conn.execute('SELECT COUNT(*) FROM sentiment_cache').fetchone()
+        self._inserts_since_count = 0
+        if self._disk_count <= self.disk_max_entries:
+            return
+        self._flush_touched()
+        overflow = self._disk_count - self.disk_max_entries + int(self.disk_max_entries * DISK_EVICT_FRACTION)
+        cursor = self._conn.execute(
+            'DELETE FROM sentiment_cache WHERE key IN '
+            '(SELECT key FROM sentiment_cache ORDER BY last_used LIMIT ?)', (overflow,)
+        )
+        self._disk_count -= cursor.rowcount
+        self.stats['evictions'] += cursor.rowcount
+
+    # --- REPORTING ---
+    def hit_rate(self):
+        hits = self.stats['memory_hits'] + self.stats['disk_hits']
+        total = hits + self.stats['misses']
+        return hits / total if total else 0.0
+
+    def report(self):
+        return (f"cache: {self.stats['memory_hits']} memory hits, {self.stats['disk_hits']} disk hits, "
+                f"{self.stats['misses']} misses, {self.stats['evictions']} evictions "
+                f"(hit rate {self.hit_rate():.1%})")
+
+    def close(self):
+        if self._conn is not None:
+            self._flush_touched()
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,117 @@
+import argparse
+import multiprocessing
+import os
+import random
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+from pymongo import UpdateOne
+import sentiment_analysis as sa
+import storage
+
+# --- CONFIGURATION ---
+CLAIM_BATCH_SIZE = 256  # Posts leased per claim
+LEASE_SECONDS = 600  # A crashed worker's posts become claimable again after this
+CANDIDATE_FACTOR = 4  # Over-fetch candidates so concurrent claimers rarely collide
+POLL_SECONDS = 15
+LEASE_FIELDS = {'lease_owner': '', 'lease_expires': ''}
+
+# Work claiming: a worker picks candidate unscored posts whose lease is absent
+# or expired, then stamps them with a unique lease token in one update_many.
+# The update re-checks the lease condition per document, so two workers can
+# never hold the same post. Results are written back only where the token
+# still matches, which also releases the lease.
+
+
+def _claimable(now):
+    return {**sa.UNSCORED_QUERY, '$or': [{'lease_expires': {'$exists': False}}, {'lease_expires': {'$lt': now}}]}
+
+
+def claim_batch(collection, worker_id, batch_size=CLAIM_BATCH_SIZE, lease_seconds=LEASE_SECONDS):
+    """Lease up to batch_size unscored posts. Returns (lease_token, posts)."""
+    now = datetime.utcnow()
+    candidates = [doc['_id'] for doc in collection.find(_claimable(now), {'_id': 1}).limit(batch_size * CANDIDATE_FACTOR)]
+    if not candidates:
+        return None, []
+    if len(candidates) > batch_size:
+        candidates = random.sample(candidates, batch_size)
+    lease_token = f'{worker_id}:{uuid.uuid4().hex}'
+    collection.update_many(
+        {'_id': {'$in': candidates}, **_claimable(now)},
+        {'$set': {'lease_owner': lease_token, 'lease_expires': now + timedelta(seconds=lease_seconds)}}
+    )
+    return lease_token, list(collection.find({'lease_owner': lease_token}, sa.SCORING_PROJECTION))
+
+
+def complete_batch(collection, lease_token, posts, results):
+    """Write results for posts we still hold and release their leases. Returns posts written."""
+    ops = [
+        UpdateOne({'_id': post['_id'], 'lease_owner': lease_token}, sa.scored_update(result, LEASE_FIELDS))
+        for post, result in zip(posts, results)
+    ]
+    if not ops:
+        return 0
+    return collection.bulk_write(ops, ordered=False).modified_count
+
+
+def release_batch(collection, lease_token):
+    """Give leased posts back without scoring them (e.g. after an error)."""
+    collection.update_many({'lease_owner': lease_token}, {'$unset': LEASE_FIELDS})
+
+
+def run_worker(worker_id, batch_size=CLAIM_BATCH_SIZE, lease_seconds=LEASE_SECONDS, num_threads=None):
+    """Claim, score and release batches until no unscored posts remain. Returns posts scored."""
+    if num_threads:
+        sa.FINBERT_NUM_THREADS = num_threads
+    collection = sa.collection
+    scored = 0
+    while True:
+        lease_token, posts = claim_batch(collection, worker_id, batch_size, lease_seconds)
+        if not posts:
+            # Everything left is leased by live workers; wait in case one of them dies
+            if collection.count_documents(sa.UNSCORED_QUERY, limit=1) == 0:
+                return scored
+            time.sleep(POLL_SECONDS)
+            continue
+        try:
+            written = 0
+            for batch, results in sa.iter_scored_batches(posts, sa.FINBERT_BATCH_SIZE):
+                written += complete_batch(collection, lease_token, batch, results)
+        except Exception:
+            release_batch(collection, lease_token)
+            raise
+        if written < len(posts):
+            print(f"[{worker_id}] lease expired on {len(posts) - written} posts; another worker owns them now")
+        scored += written
+        print(f"[{worker_id}] scored {scored} posts")
+
+
+def _worker_main(args):
+    return run_worker(*args)
+
+
+def run_pool(workers, batch_size=CLAIM_BATCH_SIZE, lease_seconds=LEASE_SECONDS, num_threads=None):
+    """Run `workers` scoring processes on this host. Other hosts can run their own pools against the same collection."""
+    num_threads = num_threads or max(1, (os.cpu_count() or 1) // workers)
+    prefix = f'{socket.gethostname()}-{os.getpid()}'
+    jobs = [(f'{prefix}-{i}', batch_size, lease_seconds, num_threads) for i in range(workers)]
+    start = time.perf_counter()
+    # spawn: torch and MongoClient are not fork-safe
+    with multiprocessing.get_context('spawn').Pool(workers) as pool:
+        counts = pool.map(_worker_main, jobs)
+    elapsed = time.perf_counter() - start
+    total = sum(counts)
+    print(f"{workers} workers scored {total} posts in {elapsed:.1f}s ({total / elapsed:.1f} posts/sec)")
+    return total
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Score unscored posts with a pool of lease-claiming worker processes.')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--batch-size', type=int, default=CLAIM_BATCH_SIZE, help='Posts leased per claim')
+    parser.add_argument('--lease-seconds', type=int, default=LEASE_SECONDS)
+    parser.add_argument('--num-threads', type=int, help='torch threads per worker (default: cores / workers)')
+    args = parser.parse_args()
+    storage.setup()
+    run_pool(args.workers, args.batch_size, args.lease_seconds, args.num_threads)
@@ -0,0 +1,170 @@
+import argparse
+from datetime import datetime
+
+import pymongo
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import DuplicateKeyError, OperationFailure
+from lazy_resource import LazyResource
+
+# --- CONFIGURATION ---
+MONGO_URI = 'mongodb://localhost:27017/'  # Or your MongoDB Atlas URI
+DB_NAME = 'reddit_sentiment'
+COLLECTION_NAME = 'posts'
+CHECKPOINT_COLLECTION_NAME = 'scrape_checkpoints'
+MIGRATIONS_COLLECTION_NAME = 'schema_migrations'
+# One client per process, shared by every thread (scraper fetch threads, the
+# sentiment job); spawned worker processes each open their own
+POOL_OPTIONS = {
+    'maxPoolSize': 32,
+    'minPoolSize': 0,
+    'maxIdleTimeMS': 5 * 60 * 1000,
+    'serverSelectionTimeoutMS': 10 * 1000,
+    'retryWrites': True,
+}
+
+# Unscored posts carry sentiment_pending: True from insert until they are
+# scored. A partial index can't select on {'sentiment': {'$exists': False}},
+# but it can on the flag, so the backlog index holds only unscored posts and
+# stays small however large the collection grows.
+PENDING_FIELD = 'sentiment_pending'
+UNSCORED_QUERY = {PENDING_FIELD: True}
+SCORED_QUERY = {'sentiment': {'$exists': True}}
+INDEXES = [
+    # Upserts and id lookups; also makes a duplicate Reddit post impossible
+    IndexModel([('id', ASCENDING)], name='id_unique', unique=True),
+    # Backlog scans: keyset pages in _id order and worker claims
+    IndexModel([(PENDING_FIELD, ASCENDING), ('_id', ASCENDING)], name='pending_by_id',
+               partialFilterExpression={PENDING_FIELD: True}),
+    # Windowed feature aggregation by ticker and time
+    IndexModel([('tickers', ASCENDING), ('created_utc', ASCENDING)], name='tickers_created_utc'),
+    # Incremental feature runs find newly scored posts
+    IndexModel([('scored_at', ASCENDING)], name='scored_at'),
+]
+
+# --- CONNECTION ---
+client = LazyResource(lambda: pymongo.MongoClient(MONGO_URI, **POOL_OPTIONS), 'mongo_client')
+db = LazyResource(lambda: client.load()[DB_NAME], 'db')
+posts = LazyResource(lambda: db.load()[COLLECTION_NAME], 'posts')
+checkpoints = LazyResource(lambda: db.load()[CHECKPOINT_COLLECTION_NAME], 'checkpoints')
+
+# --- MIGRATIONS ---
+def migrate_pending_flag(collection=posts):
+    """
+    Flag posts stored before sentiment_pending existed. Runs once per
+    database; jobs starting together may both flag (the update is
+    idempotent), but only the first records the migration.
+    """
+    migrations = collection.database[MIGRATIONS_COLLECTION_NAME]
+    if migrations.find_one({'_id': PENDING_FIELD}):
+        return 0
+    result = collection.update_many(
+        {'sentiment': {'$exists': False}, PENDING_FIELD: {'$exists': False}},
+        {'$set': {PENDING_FIELD: True}}
+    )
+    try:
+        migrations.update_one(
+            {'_id': PENDING_FIELD},
+            {'$setOnInsert': {'applied_at': datetime.utcnow(), 'flagged': result.modified_count}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        pass  # Concurrent upserts of the same marker: another job recorded it
+    return result.modified_count
+
+def dedupe_posts(collection=posts):
+    """
+    Delete extra copies of the same Reddit id (left by inserts from before
+    the upsert path), keeping a scored copy when there is one. Returns the
+    number of documents deleted.
+    """
+    pipeline = [
+        {'$match': {'id': {'$exists': True}}},
+        {'$project': {'id': 1, 'scored': {'$cond': [{'$gt': ['$sentiment', None]}, 1, 0]}}},
+        {'$sort': {'id': 1, 'scored': -1, '_id': 1}},
+        {'$group': {'_id': '$id', 'copies': {'$push': '$_id'}, 'count': {'$sum': 1}}},
+        {'$match': {'count': {'$gt': 1}}},
+    ]
+    extra = [copy for group in collection.aggregate(pipeline, allowDiskUse=True) for copy in group['copies'][1:]]
+    if not extra:
+        return 0
+    return collection.delete_many({'_id': {'$in': extra}}).deleted_count
+
+# --- INDEXES ---
+def _spec(index):
+    document = index.document
+    return {
+        'key': list(document['key'].items()),
+        'unique': document.get('unique', False),
+        'partialFilterExpression': document.get('partialFilterExpression'),
+    }
+
+def verify_indexes(collection=posts):
+    """Names of INDEXES that are missing or differ from their spec; [] when all are in place."""
+    existing = collection.index_information()
+    problems = []
+    for index in INDEXES:
+        name = index.document['name']
+        info = existing.get(name)
+        if info is None:
+            problems.append(name)
+            continue
+        actual = {
+            'key': [(field, direction) for field, direction in info['key']],
+            'unique': info.get('unique', False),
+            'partialFilterExpression': info.get('partialFilterExpression'),
+        }
+        if actual != _spec(index):
+            problems.append(name)
+    return problems
+
+def _drop_renamed(collection):
+    # Indexes created before this module (e.g. 'scored_at_1') have the same keys
+    # under default names, which would make create_indexes fail
+    wanted = {tuple(_spec(index)['key']): index.document['name'] for index in INDEXES}
+    for name, info in collection.index_information().items():
+        key = tuple((field, direction) for field, direction in info['key'])
+        if wanted.get(key, name) != name:
+            collection.drop_index(name)
+
+def ensure_indexes(collection=posts):
+    _drop_renamed(collection)
+    try:
+        collection.create_indexes(INDEXES)
+    except OperationFailure as e:
+        if e.code == 11000:
+            raise RuntimeError('posts has duplicate Reddit ids; run `python storage.py --dedupe` first') from e
+        raise
+    problems = verify_indexes(collection)
+    if problems:
+        raise RuntimeError(f'Indexes do not match their spec: {problems} (drop them and rerun setup)')
+
+def setup(collection=posts):
+    """Migrate and index the posts collection. Cheap to repeat, so every job calls it at startup."""
+    migrate_pending_flag(collection)
+    ensure_indexes(collection)
+
+# --- QUERY PLANS ---
+def plan_stages(explain):
+    """(stage, indexName) pairs of an explain() result's winning plan, outermost first."""
+    stages = []
+    node = explain['queryPlanner']['winningPlan']
+    node = node.get('queryPlan', node)  # Slot-based engine nests the plan one level down
+    pending = [node]
+    while pending:
+        node = pending.pop()
+        stages.append((node.get('stage'), node.get('indexName')))
+        pending.extend(node.get('inputStages', []))
+        if 'inputStage' in node:
+            pending.append(node['inputStage'])
+    return stages
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Create and verify the posts collection indexes.')
+    parser.add_argument('--dedupe', action='store_true', help='Delete duplicate Reddit ids before building the unique index')
+    args = parser.parse_args()
+    if args.dedupe:
+        print(f'Deleted {dedupe_posts()} duplicate posts.')
+    setup()
+    for name, info in posts.index_information().items():
+        print(f"{name:<22}{info['key']}{' unique' if info.get('unique') else ''}"
+              f"{' partial ' + str(info['partialFilterExpression']) if 'partialFilterExpression' in info else ''}")
@@ -0,0 +1,22 @@
+import os
+
+import pymongo
+import pytest
+
+TEST_MONGO_URI = os.environ.get('TEST_MONGO_URI', 'mongodb://localhost:27017/')
+TEST_DB_NAME = 'reddit_sentiment_test'
+
+
+@pytest.fixture
+def mongo_db():
+    """An empty test database on a local mongod; skips the test when none is running."""
+    client = pymongo.MongoClient(TEST_MONGO_URI, serverSelectionTimeoutMS=500)
+    try:
+        client.admin.command('ping')
+    except pymongo.errors.PyMongoError:
+        client.close()
+        pytest.skip('needs a local mongod (set TEST_MONGO_URI)')
+    client.drop_database(TEST_DB_NAME)
+    yield client[TEST_DB_NAME]
+    client.drop_database(TEST_DB_NAME)
+    client.close()
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+
+from asof_join import asof_join, bar_available_at, bucket_end, grouped_ffill
+
+
+def _bars(ticker, timestamps, closes, tz='UTC'):
+    ts = pd.DatetimeIndex(pd.to_datetime(timestamps)).tz_localize(tz).tz_convert('UTC')
+    return pd.DataFrame({'tickers': ticker, 'timestamp': ts, 'Close': closes})
+
+
+def _hourly(rows):
+    return pd.DataFrame(rows, columns=['tickers', 'date', 'hour', 'avg_sentiment']).astype({'date': 'datetime64[ns]'})
+
+
+def test_hourly_bucket_sees_only_bars_closed_by_its_end():
+    # 14:30 UTC bar closes at 15:30 UTC
+    bars = _bars('GME', ['2024-01-08 14:30', '2024-01-08 15:30', '2024-01-08 16:30'], [10.0, 11.0, 12.0])
+    buckets = _hourly([('GME', '2024-01-08', 14, 0.1), ('GME', '2024-01-08', 15, 0.2), ('GME', '2024-01-08', 16, 0.3)])
+    merged = asof_join(buckets, bars, '1h')
+    # The 14:00-15:00 bucket ends before any bar has closed; 15:00-16:00 ends after the first one
+    assert np.isnan(merged['Close'].iloc[0])
+    assert merged['Close'].tolist()[1:] == [10.0, 11.0]
+    assert (merged['bar_timestamp'].dropna() + pd.Timedelta(hours=1) <= bucket_end(buckets)[1:]).all()
+
+
+def test_buckets_outside_market_hours_get_the_last_close():
+    bars = _bars('GME', ['2024-01-05 15:30'], [20.0], tz='America/New_York')  # Friday's last hourly bar
+    buckets = _hourly([('GME', '2024-01-06', 3, 0.1), ('GME', '2024-01-07', 22, -0.2)])  # weekend, UTC
+    assert asof_join(buckets, bars, '1h')['Close'].tolist() == [20.0, 20.0]
+
+
+def test_daily_bucket_uses_that_days_close_across_dst():
+    # yfinance daily bars are stamped at exchange-local midnight
+    bars = _bars('AAPL', ['2024-03-08', '2024-03-11', '2024-07-01'], [1.0, 2.0, 3.0], tz='America/New_York')
+    assert bar_available_at(bars, '1d').tolist() == [
+        pd.Timestamp('2024-03-08 21:00', tz='UTC'), pd.Timestamp('2024-03-11 20:00', tz='UTC'),
+        pd.Timestamp('2024-07-01 20:00', tz='UTC')]
+    buckets = pd.DataFrame({'tickers': 'AAPL', 'date': pd.to_datetime(['2024-03-08', '2024-03-10', '2024-03-11', '2024-07-01'])})
+    assert asof_join(buckets, bars, '1d')['Close'].tolist() == [1.0, 1.0, 2.0, 3.0]
+
+
+def test_minute_bars_and_tolerance():
+    bars = _bars('TSLA', ['2024-01-08 14:30', '2024-01-08 14:31', '2024-01-08 14:58'], [1.0, 2.0, 3.0])
+    buckets = _hourly([('TSLA', '2024-01-08', 14, 0.0), ('TSLA', '2024-01-08', 17, 0.0)])
+    assert asof_join(buckets, bars, '1m')['Close'].tolist() == [3.0, 3.0]
+    stale = asof_join(buckets, bars, '1m', tolerance=pd.Timedelta(hours=1))['Close']
+    assert stale.iloc[0] == 3.0 and np.isnan(stale.iloc[1])
+
+
+def test_tickers_do_not_leak_and_input_order_is_kept():
+    bars = pd.concat([_bars('AAPL', ['2024-01-08 14:30'], [100.0]), _bars('GME', ['2024-01-08 14:30'], [10.0])])
+    buckets = _hourly([('GME', '2024-01-08', 16, 0.1), ('AAPL', '2024-01-08', 16, 0.2), ('TSLA', '2024-01-08', 16, 0.3)])
+    buckets.index = [7, 3, 5]
+    merged = asof_join(buckets, bars, '1h')
+    assert merged.index.tolist() == [7, 3, 5]
+    assert merged['tickers'].tolist() == ['GME', 'AAPL', 'TSLA']
+    assert merged['Close'].tolist()[:2] == [10.0, 100.0] and np.isnan(merged['Close'].iloc[2])
+
+
+def test_grouped_ffill_matches_per_group_ffill():
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame({'tickers': np.repeat(['A', 'B', 'C'], 30), 'x': rng.normal(size=90), 'y': rng.normal(size=90)})
+    frame.loc[rng.random(90) < 0.4, ['x']] = np.nan
+    frame.loc[rng.random(90) < 0.4, ['y']] = np.nan
+    expected = pd.concat([g.ffill() for _, g in frame.groupby('tickers')])
+    pdt.assert_frame_equal(grouped_ffill(frame.copy(), ['x', 'y']), expected)
+
+
+def test_matches_pandas_merge_asof_on_random_data():
+    rng = np.random.default_rng(1)
+    starts = pd.Timestamp('2024-01-01', tz='UTC') + pd.to_timedelta(np.sort(rng.integers(0, 60 * 24 * 30, 3000)), unit='min')
+    bars = pd.DataFrame({'tickers': rng.choice(['A', 'B', 'C'], 3000), 'timestamp': starts, 'Close': rng.normal(size=3000)})
+    buckets = pd.DataFrame({
+        'tickers': rng.choice(['A', 'B', 'C', 'D'], 2000),
+        'date': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 31, 2000), unit='D'),
+        'hour': rng.integers(0, 24, 2000),
+    })
+    left = buckets.assign(t=bucket_end(buckets).astype('datetime64[ns, UTC]'), row=np.arange(len(buckets))).sort_values('t')
+    right = bars.assign(t=bar_available_at(bars, '5m').astype('datetime64[ns, UTC]')).sort_values('t')
+    expected = pd.merge_asof(left, right, on='t', by='tickers').sort_values('row')
+    np.testing.assert_array_equal(asof_join(buckets, bars, '5m')['Close'].to_numpy(), expected['Close'].to_numpy())
@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+
+import backtest_framework as bf
+from backtest_engine import BUY, HOLD, SELL, make_panel, run_backtest, sort_bars, threshold_signals
+
+
+def legacy_backtest(df, strategy_func, label='Strategy'):
+    """The per-row loop backtest_framework.backtest used before the engine (plots and prints removed)."""
+    df = df.sort_values(['tickers', 'date']).reset_index(drop=True)
+    results, metrics = [], []
+    for ticker in df['tickers'].unique():
+        tdf = df[df['tickers'] == ticker].reset_index(drop=True)
+        cash = bf.INITIAL_CASH
+        position = 0
+        portfolio_values, actions, trade_dates = [], [], []
+        wins = trades = 0
+        last_buy_price = None
+        for i, row in tdf.iterrows():
+            price = row['Close']
+            action = strategy_func(row)
+            if action == 'buy' and cash >= price:
+                position += bf.POSITION_SIZE
+                cash -= price * bf.POSITION_SIZE
+                trade_dates.append(row['date'])
+                last_buy_price = price
+                trades += 1
+            elif action == 'sell' and position > 0:
+                cash += price * position
+                if last_buy_price is not None and price > last_buy_price:
+                    wins += 1
+                position = 0
+                trade_dates.append(row['date'])
+                trades += 1
+                last_buy_price = None
+            portfolio_values.append(cash + position * price)
+            actions.append(action)
+        tdf[f'portfolio_value_{label}'] = portfolio_values
+        tdf[f'action_{label}'] = actions
+        tdf[f'trade_marker_{label}'] = [d in trade_dates for d in tdf['date']]
+        tdf[f'trade_price_{label}'] = [p if d in trade_dates else np.nan for d, p in zip(tdf['date'], tdf['Close'])]
+        tdf['returns'] = pd.Series(portfolio_values).pct_change().fillna(0)
+        sharpe = (tdf['returns'].mean() - bf.RISK_FREE_RATE) / (tdf['returns'].std() + 1e-9) * np.sqrt(252) if tdf['returns'].std() > 0 else 0
+        running_max = pd.Series(portfolio_values).cummax()
+        metrics.append({
+            'tickers': ticker,
+            'total_return': (portfolio_values[-1] - bf.INITIAL_CASH) / bf.INITIAL_CASH,
+            'sharpe': sharpe,
+            'max_drawdown': ((pd.Series(portfolio_values) - running_max) / running_max).min(),
+            'win_rate': wins / trades if trades > 0 else 0,
+            'trades': trades,
+        })
+        results.append(tdf)
+    return pd.concat(results, ignore_index=True), pd.DataFrame(metrics)
+
+
+def _bars(n_tickers=6, seed=0):
+    rng = np.random.default_rng(seed)
+    frames = []
+    for i in range(n_tickers):
+        n = int(rng.integers(1, 120))  # Uneven histories, including a single bar
+        close = 50 * np.exp(np.cumsum(rng.normal(0, 0.03, n)))
+        if i == 0:
+            close[:3] = np.nan  # Bars before the first price, as after an as-of join
+        frames.append(pd.DataFrame({
+            'tickers': f'T{i}',
+            'date': pd.date_range('2024-01-01', periods=n, freq='D'),
+            'Close': close,
+            'avg_sentiment': rng.uniform(-0.6, 0.6, n),
+            'ml_action': rng.choice([1.0, -1.0, 0.0, np.nan], n),
+        }))
+    # Shuffled: both engines must sort
+    return pd.concat(frames, ignore_index=True).sample(frac=1, random_state=seed)
+
+
+@pytest.mark.parametrize('strategy', [bf.rule_based_strategy, bf.ml_strategy])
+def test_backtest_matches_legacy_loop(strategy):
+    df = _bars()
+    expected, expected_metrics = legacy_backtest(df, strategy, label='X')
+    out = bf.backtest(df, strategy, label='X')
+    pdt.assert_frame_equal(out, expected, check_dtype=False)
+
+    result = run_backtest(sort_bars(df), bf.strategy_signals(sort_bars(df), strategy))
+    pdt.assert_frame_equal(result.metrics, expected_metrics, check_dtype=False, rtol=1e-9)
+
+
+def test_row_wise_strategy_without_vectorized_twin():
+    df = _bars(n_tickers=3, seed=1)
+
+    def contrarian(row):
+        return 'sell' if row['avg_sentiment'] > 0.3 else ('buy' if row['avg_sentiment'] < -0.3 else 'hold')
+
+    expected, _ = legacy_backtest(df, contrarian, label='C')
+    pdt.assert_frame_equal(bf.backtest(df, contrarian, label='C'), expected, check_dtype=False)
+
+
+def test_cash_limits_buys():
+    df = pd.DataFrame({'tickers': 'A', 'date': pd.date_range('2024-01-01', periods=4), 'Close': [6000.0, 6000.0, 7000.0, 100.0]})
+    result = run_backtest(df, [BUY, BUY, SELL, SELL])
+    assert result.executed.tolist() == [BUY, HOLD, SELL, HOLD]
+    assert result.portfolio_value.tolist() == [10000.0, 10000.0, 11000.0, 11000.0]
+    # Buys and sells both count as trades, as in the original loop
+    assert result.metrics.loc[0, 'win_rate'] == 0.5
+
+
+def test_panel_layout_round_trips():
+    df = sort_bars(_bars(n_tickers=4, seed=2))
+    panel = make_panel(df['tickers'])
+    assert panel.lengths.sum() == len(df)
+    assert (panel.row < panel.lengths[panel.column]).all()
+    assert threshold_signals([0.5, -0.5, 0.1, np.nan], 0.2, -0.2).tolist() == [BUY, SELL, HOLD, HOLD]
+
+
+def test_transaction_cost_is_charged_on_both_sides():
+    df = pd.DataFrame({'tickers': 'A', 'date': pd.date_range('2024-01-01', periods=2), 'Close': [100.0, 110.0]})
+    result = run_backtest(df, [BUY, SELL], transaction_cost=0.01)
+    assert result.portfolio_value.tolist() == pytest.approx([10000 - 1.0, 10000 - 101.0 + 110 * 0.99])
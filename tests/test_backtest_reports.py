@@ -0,0 +1,49 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+import backtest_framework as bf
+import backtest_reports as br
+
+
+def _bars(n_tickers=4, n=30, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'tickers': np.repeat(['AAPL', 'GME', 'BRK.B', 'T<1>'][:n_tickers], n),
+        'date': np.tile(pd.date_range('2024-01-01', periods=n, freq='D'), n_tickers),
+        'Close': 50 * np.exp(np.cumsum(rng.normal(0, 0.03, n_tickers * n))),
+        'avg_sentiment': rng.uniform(-0.6, 0.6, n_tickers * n),
+    })
+
+
+def test_backtest_is_headless(capsys):
+    results, metrics = bf.run_strategy(_bars(), bf.rule_based_strategy, label='Rule')
+    assert capsys.readouterr().out == ''
+    assert not hasattr(bf, 'plt')
+    assert list(metrics['strategy'].unique()) == ['Rule'] and len(metrics) == 4
+    assert results['trade_marker_Rule'].sum() == metrics['trades'].sum()
+
+
+def test_summary_report_matches_metrics(tmp_path):
+    results, metrics = bf.run_strategy(_bars(), bf.rule_based_strategy, label='Rule')
+    summary = br.write_report({'Rule': results}, metrics, out_dir=str(tmp_path))
+    with open(tmp_path / 'summary.json') as f:
+        saved = json.load(f)
+    assert saved['strategies']['Rule']['tickers'] == 4
+    assert saved['strategies']['Rule']['sharpe'] == metrics['sharpe'].mean()
+    assert [r['tickers'] for r in saved['tickers']] == list(metrics['tickers'])
+    page = (tmp_path / 'index.html').read_text()
+    assert 'T&lt;1&gt;' in page and 'T<1>' not in page
+    assert not (tmp_path / 'charts').exists()
+    assert summary['strategies'] == saved['strategies']
+
+
+def test_charts_render_in_worker_processes(tmp_path, monkeypatch):
+    monkeypatch.setattr(br, 'CHARTS_PER_TASK', 1)
+    results, metrics = bf.run_strategy(_bars(), bf.rule_based_strategy, label='Rule')
+    br.write_report({'Rule': results}, metrics, out_dir=str(tmp_path), charts=True, workers=2)
+    charts = sorted(os.listdir(tmp_path / 'charts'))
+    assert charts == ['Rule_AAPL.png', 'Rule_BRK.B.png', 'Rule_GME.png', 'Rule_T_1_.png']
+    assert 'href="charts/Rule_BRK.B.png"' in (tmp_path / 'index.html').read_text()
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+
+from backtest_engine import run_backtest, sort_bars, threshold_signals
+from backtest_sweep import attach, expand_grid, share_arrays, sweep
+
+
+def _bars(seed=0):
+    rng = np.random.default_rng(seed)
+    frames = []
+    for i in range(5):
+        n = int(rng.integers(1, 80))  # Uneven histories
+        frames.append(pd.DataFrame({
+            'tickers': f'T{i}',
+            'date': pd.date_range('2024-01-01', periods=n, freq='D'),
+            'Close': 50 * np.exp(np.cumsum(rng.normal(0, 0.03, n))),
+            'avg_sentiment': rng.uniform(-0.6, 0.6, n),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+GRID = {'buy_above': [0.1, 0.3], 'sell_below': [-0.2], 'position_size': [1, 3], 'transaction_cost': [0.0, 0.01]}
+
+
+def test_sweep_matches_one_backtest_per_combination():
+    df = _bars()
+    out = sweep(df, GRID, workers=2)
+    assert len(out) == len(expand_grid(GRID)) * df['tickers'].nunique()
+    bars = sort_bars(df)
+    for params in expand_grid(GRID):
+        signals = threshold_signals(bars['avg_sentiment'], params['buy_above'], params['sell_below'])
+        expected = run_backtest(bars, signals, position_size=params['position_size'],
+                                transaction_cost=params['transaction_cost']).metrics
+        rows = out[(out[list(params)] == pd.Series(params)).all(axis=1)]
+        pdt.assert_frame_equal(rows[expected.columns].reset_index(drop=True), expected, check_dtype=False)
+
+
+def test_pool_and_serial_sweeps_agree():
+    df = _bars(seed=1)
+    pdt.assert_frame_equal(sweep(df, GRID, workers=3), sweep(df, GRID, workers=1))
+
+
+def test_shared_arrays_round_trip_read_only():
+    arrays = {'a': np.arange(12.0).reshape(3, 4), 'b': np.array([1, 2], np.int8)}
+    owned, specs = share_arrays(arrays)
+    try:
+        blocks, shared = attach(specs)
+        for name, array in arrays.items():
+            np.testing.assert_array_equal(shared[name], array)
+            assert not shared[name].flags.writeable
+        del shared
+        for block in blocks:
+            block.close()
+    finally:
+        for block in owned:
+            block.close()
+            block.unlink()
@@ -0,0 +1,72 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+
+import dataset_io
+from dataset_io import read_dataset, write_dataset
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(dataset_io, 'DATA_DIR', str(tmp_path))
+    return tmp_path
+
+
+def _features(tickers=('AAPL', 'GME', '1234'), days=40, hours=(0,)):
+    rng = np.random.default_rng(0)
+    index = pd.MultiIndex.from_product([tickers, pd.date_range('2024-01-15', periods=days), hours], names=['tickers', 'date', 'hour'])
+    frame = index.to_frame(index=False)
+    frame['avg_sentiment'] = rng.uniform(-1, 1, len(frame))
+    frame['post_volume'] = rng.integers(1, 50, len(frame))
+    return frame.sort_values(['tickers', 'date', 'hour']).reset_index(drop=True)
+
+
+def test_round_trip_keeps_rows_columns_and_types():
+    frame = _features().drop(columns='hour')
+    write_dataset(frame, 'sentiment_features_daily')
+    # Numeric-looking tickers stay strings
+    pdt.assert_frame_equal(read_dataset('sentiment_features_daily'), frame, check_dtype=False)
+    assert read_dataset('sentiment_features_daily')['tickers'].tolist().count('1234') == 40
+
+
+def test_dates_are_normalized_to_datetime64():
+    frame = _features().drop(columns='hour')
+    frame['date'] = frame['date'].dt.date
+    write_dataset(frame, 'sentiment_features_daily')
+    assert pd.api.types.is_datetime64_dtype(read_dataset('sentiment_features_daily')['date'])
+
+
+def test_projection_and_pushdown_filters():
+    frame = _features(hours=(9, 15))
+    write_dataset(frame, 'sentiment_features_hourly')
+    got = read_dataset('sentiment_features_hourly', columns=['date', 'hour', 'avg_sentiment'],
+                       tickers=['GME'], start=date(2024, 2, 1), end='2024-02-10')
+    expected = frame[(frame.tickers == 'GME') & frame.date.between('2024-02-01', '2024-02-10')]
+    assert list(got.columns) == ['date', 'hour', 'avg_sentiment']
+    np.testing.assert_array_equal(got['avg_sentiment'], expected['avg_sentiment'])
+
+
+def test_hourly_partitions_by_ticker_and_year(data_dir):
+    frame = _features(tickers=('GME',))
+    frame['date'] -= pd.Timedelta(days=20)
+    write_dataset(frame, 'sentiment_features_hourly')
+    partitions = sorted(p.name for p in (data_dir / 'sentiment_features_hourly.parquet' / 'tickers=GME').iterdir())
+    assert partitions == ['year=2023', 'year=2024']
+    assert 'year' not in read_dataset('sentiment_features_hourly')
+
+
+def test_rewrite_drops_stale_partitions():
+    frame = _features().drop(columns='hour')
+    write_dataset(frame, 'merged_features_daily')
+    write_dataset(frame[frame.tickers == 'AAPL'], 'merged_features_daily')
+    assert read_dataset('merged_features_daily')['tickers'].unique().tolist() == ['AAPL']
+
+
+def test_falls_back_to_legacy_csv(data_dir):
+    frame = _features().drop(columns='hour')
+    frame.to_csv(data_dir / 'merged_features_daily.csv', index=False)
+    got = read_dataset('merged_features_daily', columns=['date', 'avg_sentiment'], tickers=['GME'])
+    np.testing.assert_allclose(got['avg_sentiment'], frame.loc[frame.tickers == 'GME', 'avg_sentiment'])
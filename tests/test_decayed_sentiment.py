@@ -0,0 +1,83 @@
+import math
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from decayed_sentiment import DecayedSentiment, engagement_weight
+
+
+def _stream(n, seed):
+    rng = np.random.default_rng(seed)
+    start = datetime(2024, 1, 1)
+    times = sorted(start + timedelta(minutes=int(m)) for m in rng.integers(0, 60 * 24 * 5, n))
+    return [(rng.choice(['AAPL', 'GME']), t, rng.uniform(-1, 1), engagement_weight(*rng.integers(0, 500, 2)))
+            for t in times]
+
+
+def _brute_force(posts, ticker, at, half_life_hours=24.0):
+    rate = math.log(2) / (half_life_hours * 3600)
+    rows = [(w * math.exp(-rate * (at - t).total_seconds()), v) for tk, t, v, w in posts if tk == ticker]
+    weight = sum(w for w, _ in rows)
+    mean = sum(w * v for w, v in rows) / weight
+    std = math.sqrt(sum(w * (v - mean) ** 2 for w, v in rows) / weight)
+    return mean, std, weight
+
+
+def test_streaming_state_matches_brute_force_decay():
+    posts = _stream(300, seed=1)
+    aggregator = DecayedSentiment()
+    for post in posts:
+        aggregator.update(*post)
+    at = posts[-1][1] + timedelta(hours=6)
+    for ticker in ('AAPL', 'GME'):
+        snapshot = aggregator.snapshot(ticker, at=at)
+        mean, std, weight = _brute_force(posts, ticker, at)
+        assert snapshot['decayed_sentiment'] == pytest.approx(mean)
+        assert snapshot['decayed_volatility'] == pytest.approx(std)
+        assert snapshot['decayed_weight'] == pytest.approx(weight)
+
+
+def test_late_posts_give_the_same_state_as_in_order():
+    posts = _stream(200, seed=2)
+    in_order, shuffled = DecayedSentiment(), DecayedSentiment()
+    for post in posts:
+        in_order.update(*post)
+    for i in np.random.default_rng(0).permutation(len(posts)):
+        shuffled.update(*posts[i])
+    for ticker in ('AAPL', 'GME'):
+        assert shuffled.snapshot(ticker) == pytest.approx(in_order.snapshot(ticker))
+
+
+def test_restored_state_resumes_without_replay(tmp_path):
+    posts = _stream(200, seed=3)
+    uninterrupted = DecayedSentiment(half_life_hours=6)
+    for post in posts:
+        uninterrupted.update(*post)
+
+    first = DecayedSentiment(half_life_hours=6)
+    for post in posts[:120]:
+        first.update(*post)
+    first.save(tmp_path / 'state.json', {'newest': 1.0})
+    restored, saved = DecayedSentiment.load(tmp_path / 'state.json')
+    for post in posts[120:]:
+        restored.update(*post)
+
+    assert saved['newest'] == 1.0 and restored.half_life_hours == 6
+    for ticker in ('AAPL', 'GME'):
+        assert restored.snapshot(ticker) == pytest.approx(uninterrupted.snapshot(ticker))
+
+
+def test_snapshot_refuses_times_before_the_newest_post():
+    aggregator = DecayedSentiment()
+    aggregator.update('AAPL', datetime(2024, 1, 2), 0.5)
+    assert aggregator.snapshot('AAPL', at=datetime(2024, 1, 1)) is None
+    assert aggregator.snapshot('TSLA') is None
+    assert aggregator.snapshot('AAPL', at=datetime(2024, 1, 3))['decayed_weight'] == pytest.approx(0.5)
+
+
+def test_engagement_weight():
+    assert engagement_weight(0, 0) == 1.0
+    assert engagement_weight(-20, 0) == 1.0
+    assert engagement_weight(None, None) == 1.0
+    assert 1.0 < engagement_weight(10, 0) < engagement_weight(10, 5) < engagement_weight(1000, 5)
@@ -0,0 +1,182 @@
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+
+from feature_engineering import GRANULARITIES, add_rolling_features, aggregate, merge_dirty_buckets
+from rolling_features import LEGACY_FEATURES
+
+
+def _posts(n, seed, start_id=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'id': [f'p{start_id + i}' for i in range(n)],
+        'tickers': rng.choice(['AAPL', 'GME', 'TSLA'], n),
+        'date': pd.to_datetime([date(2024, 1, d) for d in rng.integers(1, 20, n)]),
+        'hour': rng.integers(0, 24, n),
+        'compound': rng.uniform(-1, 1, n),
+    })
+
+
+def _build(posts, granularity):
+    return add_rolling_features(aggregate(posts, GRANULARITIES[granularity]['keys']), granularity)
+
+
+@pytest.mark.parametrize('unbounded', [False, True], ids=['windowed', 'ewm'])
+@pytest.mark.parametrize('granularity', ['daily', 'hourly'])
+def test_incremental_merge_matches_full_rebuild(monkeypatch, granularity, unbounded):
+    if unbounded:
+        # An ewm depends on a ticker's whole history, so it must be recomputed in full
+        from rolling_features import Feature
+        monkeypatch.setattr('feature_engineering.FEATURES', (*LEGACY_FEATURES, Feature('ewm_{window}{unit}', 'ewm', 5)))
+    keys = GRANULARITIES[granularity]['keys']
+    old = _posts(400, seed=1)
+    new = _posts(30, seed=2, start_id=400)
+    everything = pd.concat([old, new], ignore_index=True)
+
+    store = _build(old, granularity)
+    dirty_keys = new[keys].drop_duplicates()
+    fresh = aggregate(everything.merge(dirty_keys, on=keys), keys)
+    incremental = merge_dirty_buckets(store, fresh, keys, granularity)
+
+    pdt.assert_frame_equal(incremental, _build(everything, granularity), check_dtype=False)
+
+
+@pytest.fixture
+def scored_posts(mongo_db, monkeypatch):
+    collection = mongo_db['posts']
+    rng = np.random.default_rng(3)
+    docs = []
+    for i in range(500):
+        probs = rng.dirichlet([1, 1, 1])
+        doc = {
+            'id': f'p{i}', 'title': 'x', 'selftext': 'y' * 100,
+            'tickers': list(rng.choice(['AAPL', 'GME', 'TSLA'], rng.integers(0, 3), replace=False)),
+            'created_utc': datetime(2024, 1, 1) + timedelta(minutes=int(rng.integers(0, 60 * 24 * 10))),
+            'sentiment': {'neg': 0.0, 'neu': 1.0, 'pos': 0.0, 'compound': float(rng.uniform(-1, 1))},
+        }
+        # Some posts predate FinBERT scoring
+        if i % 7:
+            doc['finbert_sentiment'] = dict(zip(['finbert_negative', 'finbert_neutral', 'finbert_positive'], map(float, probs)))
+        docs.append(doc)
+    docs.append({'id': 'unscored', 'tickers': ['GME'], 'created_utc': datetime(2024, 1, 2)})
+    collection.insert_many(docs)
+    monkeypatch.setattr('feature_engineering.collection', collection)
+    return collection
+
+
+@pytest.mark.parametrize('granularity', ['daily', 'hourly'])
+def test_mongo_backend_matches_pandas(scored_posts, granularity):
+    from feature_engineering import aggregate_buckets
+    pandas_frame = aggregate_buckets([granularity], backend='pandas')[granularity]
+    mongo_frame = aggregate_buckets([granularity], backend='mongo')[granularity]
+    pdt.assert_frame_equal(mongo_frame, pandas_frame, check_dtype=False)
+
+
+def _timed_posts(n, seed, start, start_id=0):
+    rng = np.random.default_rng(seed)
+    posts = _posts(n, seed, start_id)
+    posts['datetime'] = start + pd.to_timedelta(np.sort(rng.integers(0, 3 * 86400, n)), unit='s')
+    posts['date'] = posts['datetime'].dt.normalize()
+    posts['hour'] = posts['datetime'].dt.hour
+    posts['score'] = rng.integers(0, 300, n)
+    posts['num_comments'] = rng.integers(0, 50, n)
+    return posts
+
+
+@pytest.mark.parametrize('granularity', ['daily', 'hourly'])
+def test_decayed_features_resume_from_saved_state(tmp_path, monkeypatch, granularity):
+    from decayed_sentiment import DecayedSentiment
+    from feature_engineering import decayed_features, save_decayed_state, unfed_posts
+    monkeypatch.setattr('feature_engineering.DECAYED_STATE_PATH', str(tmp_path / 'state.json'))
+    keys = GRANULARITIES[granularity]['keys']
+    old = _timed_posts(300, seed=1, start=pd.Timestamp('2024-01-01'))
+    new = _timed_posts(100, seed=2, start=pd.Timestamp('2024-01-04'), start_id=300)
+    full = decayed_features(pd.concat([old, new]), DecayedSentiment(), [granularity])[granularity]
+
+    aggregator = DecayedSentiment()
+    decayed_features(old, aggregator, [granularity])
+    save_decayed_state(aggregator, old)
+    aggregator, saved = DecayedSentiment.load(tmp_path / 'state.json')
+    # The overlap re-reads some old posts; they must not be counted twice
+    resumed = decayed_features(unfed_posts(pd.concat([old.tail(20), new]), saved), aggregator, [granularity])[granularity]
+
+    expected = full[full['date'] >= pd.Timestamp('2024-01-04')].reset_index(drop=True)
+    pdt.assert_frame_equal(resumed, expected, check_dtype=False)
+
+
+def test_posts_frame_is_compact_and_text_free():
+    from feature_engineering import posts_frame
+    docs = [
+        {'id': 'a', 'title': 'GME TSLA', 'selftext': 'long body', 'subreddit': 'stocks', 'tickers': ['GME', 'TSLA'],
+         'created_utc': datetime(2024, 1, 1, 15, 30), 'score': 10, 'num_comments': 2, 'sentiment': {'compound': 0.5},
+         'finbert_sentiment': {'finbert_positive': 0.7, 'finbert_neutral': 0.2, 'finbert_negative': 0.1}},
+        {'id': 'b', 'subreddit': 'wallstreetbets', 'tickers': ['GME'], 'created_utc': datetime(2024, 1, 2),
+         'sentiment': {'compound': -0.25}},
+        {'id': 'c', 'subreddit': 'stocks', 'tickers': [], 'created_utc': datetime(2024, 1, 2), 'sentiment': {'compound': 0.0}},
+    ]
+    df = posts_frame(iter(docs))
+
+    assert df['id'].tolist() == ['a', 'a', 'b']
+    assert df['tickers'].tolist() == ['GME', 'TSLA', 'GME']
+    assert not {'title', 'selftext', '_id'} & set(df.columns)
+    assert isinstance(df['tickers'].dtype, pd.CategoricalDtype) and isinstance(df['subreddit'].dtype, pd.CategoricalDtype)
+    assert df['compound'].dtype == np.float32 and df['score'].dtype == np.int32
+    assert df['hour'].tolist() == [15, 15, 0] and df['date'].iloc[2] == pd.Timestamp('2024-01-02')
+    assert np.isnan(df['finbert_positive'].iloc[2]) and df['finbert_positive'].iloc[1] == pytest.approx(0.7)
+
+    daily = aggregate(df, GRANULARITIES['daily']['keys'])
+    assert daily['tickers'].tolist() == ['GME', 'GME', 'TSLA']
+    assert daily['avg_sentiment'].dtype == np.float64
+
+
+def test_aggregate_keeps_only_observed_buckets_whatever_the_pandas_default(monkeypatch):
+    from feature_engineering import posts_frame
+    docs = [
+        {'id': 'a', 'tickers': ['GME', 'TSLA'], 'created_utc': datetime(2024, 1, 1, 15), 'sentiment': {'compound': 0.5}},
+        {'id': 'b', 'tickers': ['GME'], 'created_utc': datetime(2024, 1, 2, 9), 'sentiment': {'compound': -0.25}},
+    ]
+    df = posts_frame(iter(docs))
+    # Group as pandas 2 does by default (observed=False) unless told otherwise
+    groupby = pd.DataFrame.groupby
+    monkeypatch.setattr(pd.DataFrame, 'groupby',
+                        lambda self, by=None, **kwargs: groupby(self, by, **{'observed': False, **kwargs}))
+    for granularity in GRANULARITIES:
+        frame = aggregate(df, GRANULARITIES[granularity]['keys'])
+        # GME on both days, TSLA only on the first: no empty TSLA bucket
+        assert len(frame) == 3
+        assert (frame['post_volume'] > 0).all()
+
+
+
+@pytest.mark.parametrize('backend', ['pandas', 'mongo'])
+def test_full_build_reads_posts_once(tmp_path, monkeypatch, backend):
+    import feature_engineering as fe
+    rng = np.random.default_rng(4)
+    docs = [{'id': f'p{i}', 'subreddit': 'stocks', 'tickers': [['GME'], ['TSLA'], ['GME', 'TSLA']][i % 3],
+             'created_utc': datetime(2024, 1, 1) + timedelta(minutes=int(rng.integers(0, 60 * 24 * 5))),
+             'score': int(rng.integers(0, 100)), 'num_comments': 3,
+             'sentiment': {'compound': float(rng.uniform(-1, 1))},
+             'finbert_sentiment': {'finbert_positive': 0.5, 'finbert_neutral': 0.3, 'finbert_negative': 0.2}}
+            for i in range(200)]
+    loads = []
+
+    def load_posts(query=None, projection=fe.POST_FIELDS):
+        loads.append(projection)
+        fields = [f for f in fe.FINBERT_FIELDS if f'finbert_sentiment.{f}' in projection]
+        return fe.posts_frame(iter(docs), fields)
+
+    everything = fe.posts_frame(iter(docs))
+    monkeypatch.setattr(fe, 'load_posts', load_posts)
+    # The server-side grouping, without a mongod
+    monkeypatch.setattr(fe, 'mongo_aggregate', lambda keys, query=None: aggregate(everything, keys))
+    monkeypatch.setattr(fe, 'DECAYED_STATE_PATH', str(tmp_path / 'state.json'))
+    monkeypatch.setattr(fe, 'CHECKPOINT_PATH', str(tmp_path / 'checkpoint.json'))
+    monkeypatch.setattr(fe, 'write_store', lambda frame, granularity: None)
+
+    features = fe.build_features(backend=backend)
+    assert loads == [fe.DECAYED_FIELDS if backend == 'mongo' else fe.POST_FIELDS]
+    assert set(features) == set(GRANULARITIES)
+    assert features['daily']['decayed_sentiment'].notna().all()
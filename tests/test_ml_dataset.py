@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import ml_baseline as mlb
+from ml_dataset import FEATURES, build_dataset, feature, next_bar_labels, rule_scores
+
+
+def legacy_label(prices):
+    """ml_baseline.get_label before vectorizing (labels are now built by ml_dataset)."""
+    diff = prices.shift(-1) - prices
+    return diff.apply(lambda x: 1 if x > 0.5 else (-1 if x < -0.5 else 0))
+
+
+def _features(n_tickers=5, n=60, seed=0):
+    rng = np.random.default_rng(seed)
+    n_rows = n_tickers * n
+    close = 50 + np.cumsum(rng.choice([-1.0, -0.5, 0.0, 0.5, 0.7, 1.0], n_rows))  # Exact +-0.5 moves hold
+    close[rng.choice(n_rows, 10, replace=False)] = np.nan
+    return pd.DataFrame({
+        'tickers': np.repeat([f'T{i}' for i in range(n_tickers)], n),
+        'date': np.tile(pd.date_range('2024-01-01', periods=n), n_tickers),
+        'Close': close,
+        'avg_sentiment': rng.uniform(-1, 1, n_rows),
+        'sentiment_volatility': rng.uniform(0, 1, n_rows),
+        'post_volume': rng.integers(0, 50, n_rows),
+        'sentiment_change': np.where(rng.random(n_rows) < 0.1, np.nan, rng.normal(0, 1, n_rows)),
+    })
+
+
+def test_labels_match_the_apply_version():
+    df = _features()
+    expected = df.groupby('tickers')['Close'].transform(legacy_label).to_numpy()
+    np.testing.assert_array_equal(next_bar_labels(df['Close'], df['tickers']), expected)
+
+
+@pytest.mark.parametrize('shuffle', [False, True])
+def test_build_dataset_sorts_once_into_float32(shuffle):
+    df = _features()
+    source = df.sample(frac=1, random_state=0) if shuffle else df
+    data = build_dataset(source)
+    assert data.X.dtype == np.float32 and data.X.flags.c_contiguous and data.X.shape == (len(df), len(FEATURES))
+    np.testing.assert_array_equal(data.X, df[FEATURES].to_numpy(dtype=np.float32))
+    pd.testing.assert_frame_equal(data.frame[['tickers', 'date', 'Close']], df[['tickers', 'date', 'Close']],
+                                  check_dtype=False)
+    np.testing.assert_array_equal(data.y, df.groupby('tickers')['Close'].transform(legacy_label).to_numpy())
+    np.testing.assert_array_equal(data.frame['label'], data.y)
+
+
+def test_rule_scores_match_rule_based_strategy():
+    df = _features()
+    data = build_dataset(df)
+    assert np.shares_memory(feature(data, 'avg_sentiment'), data.X)
+    expected = df.apply(mlb.rule_based_strategy, axis=1).to_numpy()
+    np.testing.assert_array_equal(rule_scores(data), expected)
+
+
+def test_rule_holds_exactly_on_its_thresholds():
+    # VADER compounds have 4 decimals, so buckets at exactly +-0.2 occur;
+    # as float32 they would round past the thresholds
+    df = _features(n=4).head(4).assign(avg_sentiment=[0.2, -0.2, 0.2001, -0.2001])
+    data = build_dataset(df)
+    assert feature(data, 'avg_sentiment')[0] > np.float64(0.2)  # What X holds is past the threshold
+    expected = df.apply(mlb.rule_based_strategy, axis=1).to_numpy()
+    np.testing.assert_array_equal(expected, [0, 0, 1, -1])
+    np.testing.assert_array_equal(rule_scores(data), expected)
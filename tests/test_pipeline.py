@@ -0,0 +1,115 @@
+import importlib
+import sys
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from pipeline import Pipeline, Stage, fingerprint
+
+
+def _toy_pipeline(tmp_path, source, calls, **kwargs):
+    def run_load(p):
+        calls.append('load')
+        return source.copy()
+
+    def run_double(p):
+        calls.append('double')
+        return p.output('load').assign(x=lambda f: f['x'] * p.params['factor'])
+
+    stages = [
+        Stage('load', run_load, lambda p: [source]),
+        Stage('double', run_double, lambda p: [p.output('load'), p.params['factor']]),
+    ]
+    return Pipeline(stages, {'factor': 2}, cache_dir=str(tmp_path / 'cache'), log_path=str(tmp_path / 'runs.jsonl'), **kwargs)
+
+
+def test_unchanged_stages_are_served_from_cache(tmp_path):
+    source, calls = pd.DataFrame({'x': [1, 2, 3]}), []
+    first = _toy_pipeline(tmp_path, source, calls)
+    first.run()
+    second = _toy_pipeline(tmp_path, source, calls)
+    second.run()
+    assert calls == ['load', 'double']
+    assert [m['status'] for m in second.metrics] == ['cached', 'cached']
+    pd.testing.assert_frame_equal(second.outputs['double'], pd.DataFrame({'x': [2, 4, 6]}))
+
+
+def test_changed_input_reruns_downstream_and_force_reruns_one_stage(tmp_path):
+    calls = []
+    _toy_pipeline(tmp_path, pd.DataFrame({'x': [1, 2, 3]}), calls).run()
+    _toy_pipeline(tmp_path, pd.DataFrame({'x': [1, 2, 4]}), calls).run()
+    assert calls == ['load', 'double', 'load', 'double']
+    calls.clear()
+    _toy_pipeline(tmp_path, pd.DataFrame({'x': [1, 2, 4]}), calls, force=['double']).run()
+    assert calls == ['double']
+
+
+def test_metrics_are_recorded_and_logged(tmp_path):
+    pipeline = _toy_pipeline(tmp_path, pd.DataFrame({'x': [1]}), [])
+    pipeline.run()
+    assert [m['stage'] for m in pipeline.metrics] == ['load', 'double']
+    assert all(m['seconds'] >= 0 and m['peak_rss_mb'] > 0 for m in pipeline.metrics)
+    assert len((tmp_path / 'runs.jsonl').read_text().splitlines()) == 2
+    assert 'double' in pipeline.report()
+
+
+def test_unreadable_rss_is_logged_as_null(tmp_path, monkeypatch):
+    import json
+    monkeypatch.setattr('pipeline.rss_mb', lambda: None)
+    pipeline = _toy_pipeline(tmp_path, pd.DataFrame({'x': [1]}), [])
+    pipeline.run()
+    # Strict JSON: a NaN would be written as the invalid token NaN
+    lines = (tmp_path / 'runs.jsonl').read_text().splitlines()
+    records = [json.loads(line, parse_constant=pytest.fail) for line in lines]
+    assert [r['rss_mb'] for r in records] == [None, None]
+    assert 'double' in pipeline.report()
+
+
+def test_peak_rss_is_bytes_on_macos(monkeypatch):
+    import pipeline
+    monkeypatch.setattr(pipeline.resource, 'getrusage', lambda who: SimpleNamespace(ru_maxrss=2**30))
+    monkeypatch.setattr(pipeline.sys, 'platform', 'darwin')
+    assert pipeline.peak_rss_mb() == 1024
+    monkeypatch.setattr(pipeline.sys, 'platform', 'linux')
+    assert pipeline.peak_rss_mb() == 2**20
+
+
+def test_stage_without_output_stops_the_run(tmp_path):
+    calls = []
+    stages = [
+        Stage('empty', lambda p: calls.append('empty'), lambda p: ['v1']),
+        Stage('after', lambda p: calls.append('after'), lambda p: ['v1']),
+    ]
+    Pipeline(stages, cache_dir=str(tmp_path), log_path=None).run()
+    assert calls == ['empty']
+
+
+def test_fingerprint_depends_on_frame_contents_and_params():
+    frame = pd.DataFrame({'x': [1.0, 2.0]})
+    assert fingerprint(frame, {'hourly': False}) == fingerprint(frame.copy(), {'hourly': False})
+    assert fingerprint(frame, {'hourly': False}) != fingerprint(frame, {'hourly': True})
+    assert fingerprint(frame) != fingerprint(frame.assign(x=[1.0, 2.5]))
+    assert fingerprint(frame) != fingerprint(frame.rename(columns={'x': 'y'}))
+
+
+def test_module_fingerprint_covers_the_repo_modules_it_imports(tmp_path, monkeypatch):
+    (tmp_path / 'fp_stage.py').write_text('import fp_io\nfrom fp_logic import step\n')
+    (tmp_path / 'fp_io.py').write_text('import json\n')
+    (tmp_path / 'fp_logic.py').write_text('from fp_util import helper\n\ndef step():\n    return helper()\n')
+    (tmp_path / 'fp_util.py').write_text('def helper():\n    return 1\n')
+    monkeypatch.syspath_prepend(str(tmp_path))
+    for name in ['fp_stage', 'fp_io', 'fp_logic', 'fp_util']:
+        monkeypatch.delitem(sys.modules, name, raising=False)
+    stage = importlib.import_module('fp_stage')
+    before = fingerprint(stage)
+    # An edit two imports away still invalidates the stage
+    (tmp_path / 'fp_util.py').write_text('def helper():\n    return 2\n')
+    assert fingerprint(stage) != before
+
+
+def test_backtest_fingerprint_covers_the_engine():
+    import backtest_engine
+    from pipeline import backtest_fingerprint
+    fake = SimpleNamespace(output=lambda name: pd.DataFrame({'x': [1.0]}))
+    assert backtest_engine in backtest_fingerprint(fake)
@@ -0,0 +1,129 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from price_store import BAR_COLUMNS, FetchError, PriceStore, download_bars, missing_ranges
+
+
+class FakeFetcher:
+    """Local stand-in for yfinance: one deterministic bar per business day, records every request."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, tickers, start, end, interval):
+        self.calls.append((tuple(tickers), start, end, interval))
+        days = pd.bdate_range(start, end, inclusive='left', tz='UTC')
+        frames = []
+        for ticker in tickers:
+            close = np.array([d.toordinal() % 97 + len(ticker) for d in days.date], dtype=float)
+            frames.append(pd.DataFrame({'tickers': ticker, 'timestamp': days + pd.Timedelta(hours=21), 'Open': close,
+                                        'High': close + 1, 'Low': close - 1, 'Close': close, 'Volume': 1000}))
+        return pd.concat(frames, ignore_index=True)[BAR_COLUMNS] if frames else pd.DataFrame(columns=BAR_COLUMNS)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PriceStore(str(tmp_path), fetcher=FakeFetcher(), clock=lambda: date(2024, 6, 1))
+
+
+def test_missing_ranges():
+    covered = [(date(2024, 1, 10), date(2024, 1, 20)), (date(2024, 1, 15), date(2024, 1, 25))]
+    assert missing_ranges(covered, date(2024, 1, 1), date(2024, 2, 1)) == [
+        (date(2024, 1, 1), date(2024, 1, 10)), (date(2024, 1, 25), date(2024, 2, 1))]
+    assert missing_ranges(covered, date(2024, 1, 12), date(2024, 1, 22)) == []
+
+
+def test_tickers_with_the_same_gap_share_one_request(store):
+    bars = store.get_bars(['AAPL', 'GME', 'TSLA'], '2024-01-01', '2024-02-01')
+    assert len(store.fetcher.calls) == 1
+    assert store.fetcher.calls[0][0] == ('AAPL', 'GME', 'TSLA')
+    assert set(bars['tickers']) == {'AAPL', 'GME', 'TSLA'}
+    assert len(bars) == 3 * len(pd.bdate_range('2024-01-01', '2024-01-31'))
+
+
+def test_rerun_without_new_dates_makes_no_requests(store, tmp_path):
+    first = store.get_bars(['AAPL', 'GME'], '2024-01-01', '2024-02-01')
+    # A fresh store on the same directory must trust what is on disk
+    reopened = PriceStore(str(tmp_path), fetcher=FakeFetcher(), clock=store.clock)
+    again = reopened.get_bars(['AAPL', 'GME'], '2024-01-01', '2024-02-01')
+    assert reopened.fetcher.calls == []
+    pd.testing.assert_frame_equal(again, first)
+
+
+def test_only_gaps_are_fetched(store):
+    store.get_bars(['AAPL'], '2024-01-10', '2024-01-20')
+    store.get_bars(['AAPL', 'GME'], '2024-01-01', '2024-02-01')
+    assert store.fetcher.calls[1:] == [
+        (('AAPL',), date(2024, 1, 1), date(2024, 1, 10), '1d'),
+        (('GME',), date(2024, 1, 1), date(2024, 2, 1), '1d'),
+        (('AAPL',), date(2024, 1, 20), date(2024, 2, 1), '1d'),
+    ]
+    bars = store.get_bars(['AAPL'], '2024-01-01', '2024-02-01')
+    assert bars['timestamp'].is_monotonic_increasing and not bars['timestamp'].duplicated().any()
+
+
+def test_today_is_refetched_until_it_is_in_the_past(store):
+    store.get_bars(['AAPL'], '2024-05-20', '2024-06-02')
+    store.get_bars(['AAPL'], '2024-05-20', '2024-06-02')
+    assert [call[1:3] for call in store.fetcher.calls] == [
+        (date(2024, 5, 20), date(2024, 6, 2)), (date(2024, 6, 1), date(2024, 6, 2))]
+
+
+def test_intervals_are_cached_separately(store):
+    store.get_bars(['AAPL'], '2024-01-01', '2024-01-10', interval='1d')
+    store.get_bars(['AAPL'], '2024-01-01', '2024-01-10', interval='1h')
+    assert [call[3] for call in store.fetcher.calls] == ['1d', '1h']
+
+
+def test_tickers_a_fetch_drops_are_fetched_again(tmp_path):
+    class DroppingFetcher(FakeFetcher):
+        def __call__(self, tickers, start, end, interval):
+            bars = super().__call__(tickers, start, end, interval)
+            return bars[bars['tickers'] != 'GME'] if len(self.calls) == 1 else bars
+
+    store = PriceStore(str(tmp_path), fetcher=DroppingFetcher(), clock=lambda: date(2024, 6, 1))
+    assert set(store.get_bars(['AAPL', 'GME'], '2024-01-01', '2024-02-01')['tickers']) == {'AAPL'}
+    assert store.covered('GME', '1d') == []
+    bars = store.get_bars(['AAPL', 'GME'], '2024-01-01', '2024-02-01')
+    assert store.fetcher.calls[1][0] == ('GME',)
+    assert set(bars['tickers']) == {'AAPL', 'GME'}
+
+
+def test_failed_requests_are_not_recorded_as_covered(tmp_path):
+    class FailingFetcher(FakeFetcher):
+        def __call__(self, tickers, start, end, interval):
+            super().__call__(tickers, start, end, interval)
+            raise FetchError('rate limited')
+
+    store = PriceStore(str(tmp_path), fetcher=FailingFetcher(), clock=lambda: date(2024, 6, 1))
+    assert store.get_bars(['AAPL'], '2024-01-01', '2024-02-01').empty
+    assert store.covered('AAPL', '1d') == []
+
+
+def test_download_bars_leaves_out_reported_failures():
+    days = pd.bdate_range('2024-01-02', periods=3, tz='America/New_York')
+    columns = pd.MultiIndex.from_product([['AAPL', 'GME'], ['Open', 'High', 'Low', 'Close', 'Volume']])
+    raw = pd.DataFrame(1.0, index=days, columns=columns)
+    raw['GME'] = np.nan  # What yf.download returns for a ticker it failed on
+    bars = download_bars(raw, ['AAPL', 'GME'], errors={'GME': 'rate limited'})
+    assert set(bars['tickers']) == {'AAPL'} and len(bars) == 3
+    with pytest.raises(FetchError):
+        download_bars(raw, ['AAPL', 'GME'], errors={'AAPL': 'timeout', 'GME': 'timeout'})
+
+
+def test_naive_daily_bars_are_exchange_session_dates():
+    from asof_join import bar_available_at
+    # yf.download's daily default (ignore_tz=True): naive midnights, across the March DST switch
+    days = pd.DatetimeIndex(['2024-03-04', '2024-03-08', '2024-03-11'])
+    raw = pd.DataFrame(1.0, index=days, columns=['Open', 'High', 'Low', 'Close', 'Volume'])
+    bars = download_bars(raw, ['AAPL'])
+    assert bars['timestamp'].tolist() == [pd.Timestamp('2024-03-04 05:00', tz='UTC'),
+                                          pd.Timestamp('2024-03-08 05:00', tz='UTC'),
+                                          pd.Timestamp('2024-03-11 04:00', tz='UTC')]
+    # Each day's close is available at that day's 16:00 New York, not the evening before
+    available = bar_available_at(bars, '1d').dt.tz_convert('America/New_York')
+    assert available.tolist() == [pd.Timestamp(f'{d} 16:00', tz='America/New_York')
+                                  for d in ['2024-03-04', '2024-03-08', '2024-03-11']]
@@ -0,0 +1,114 @@
+import importlib
+import sys
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+import storage
+
+
+class FakeCollection:
+    """The subset of a pymongo collection reddit_scraper uses, keyed like its unique indexes."""
+
+    def __init__(self, key):
+        self.key = key
+        self.docs = {}
+
+    def find_one(self, query):
+        return self.docs.get(query[self.key])
+
+    def update_one(self, query, update, upsert=False):
+        doc = self.docs.get(query[self.key])
+        if doc is None:
+            if not upsert:
+                return
+            doc = self.docs[query[self.key]] = {**query, **update.get('$setOnInsert', {})}
+        doc.update(update.get('$set', {}))
+
+    def bulk_write(self, ops, ordered=True):
+        upserted = 0
+        for op in ops:
+            upserted += op._filter[self.key] not in self.docs
+            self.update_one(op._filter, op._doc, upsert=op._upsert)
+        return SimpleNamespace(upserted_count=upserted)
+
+
+class FakeSource:
+    """A /new listing, newest first, that counts how far the scraper paged."""
+
+    def __init__(self, posts):
+        self.posts = posts
+        self.read = 0
+
+    def listing(self, subreddit_name, kind, limit=None, time_filter='day'):
+        for post in self.posts:
+            self.read += 1
+            yield post
+
+
+def _submission(i, created_utc, score=0):
+    return SimpleNamespace(id=f'p{i}', title=f'post {i} about GME', selftext='',
+                           created_utc=created_utc.replace(tzinfo=timezone.utc).timestamp(), score=score,
+                           num_comments=0, permalink=f'/r/stocks/{i}', url=f'https://example.com/{i}')
+
+
+def _listing(ids, start):
+    # One post a minute; higher ids are newer
+    return [_submission(i, start + timedelta(minutes=i)) for i in sorted(ids, reverse=True)]
+
+
+@pytest.fixture
+def scraper(monkeypatch):
+    monkeypatch.setitem(sys.modules, 'config', SimpleNamespace(client_id='id', client_secret='secret'))
+    monkeypatch.delitem(sys.modules, 'reddit_scraper', raising=False)
+    module = importlib.import_module('reddit_scraper')
+    monkeypatch.setattr(module, 'collection', FakeCollection('id'))
+    monkeypatch.setattr(module, 'checkpoints', FakeCollection('_id'))
+    return module
+
+
+def test_reseen_post_updates_only_mutable_fields(scraper):
+    post = scraper._post_data(_submission(1, datetime(2024, 1, 1), score=5), 'stocks', datetime(2024, 1, 1),
+                              scraper.get_matcher(['GME']))
+    assert scraper.upsert_posts([post]) == 1
+    stored = scraper.collection.docs['p1']
+    assert stored[storage.PENDING_FIELD] is True
+    # Scored since: the pending flag is gone and sentiment is set
+    del stored[storage.PENDING_FIELD]
+    stored['sentiment'] = {'compound': 0.4}
+
+    assert scraper.upsert_posts([{**post, 'score': 50, 'num_comments': 7, 'title': 'edited'}]) == 0
+    assert stored['score'] == 50 and stored['num_comments'] == 7
+    assert stored['title'] == 'post 1 about GME'
+    assert stored['sentiment'] == {'compound': 0.4}
+    assert storage.PENDING_FIELD not in stored
+
+
+def test_checkpoint_round_trip(scraper):
+    newest = {'newest_id': 'p9', 'newest_created_utc': datetime(2024, 1, 1, 12)}
+    assert scraper.load_checkpoint('stocks') is None
+    scraper.save_checkpoint('stocks', newest)
+    assert scraper.load_checkpoint('stocks').items() >= newest.items()
+    scraper.save_checkpoint('stocks', {'newest_id': 'p12', 'newest_created_utc': datetime(2024, 1, 1, 13)})
+    assert scraper.load_checkpoint('stocks')['newest_id'] == 'p12'
+    assert scraper.load_checkpoint('investing') is None
+
+
+@pytest.mark.parametrize('checkpoint_deleted', [False, True])
+def test_incremental_scrape_stops_at_checkpoint(scraper, checkpoint_deleted):
+    start = datetime.utcnow().replace(microsecond=0) - timedelta(hours=1)
+    first = FakeSource(_listing(range(10), start))
+    assert scraper.scrape_listing('stocks', 'new', ['GME'], incremental=True, source=first) == (10, 10)
+    assert scraper.load_checkpoint('stocks')['newest_id'] == 'p9'
+
+    # Three newer posts; if the checkpointed post was deleted, paging must
+    # still stop at its created_utc instead of reading the whole listing
+    ids = [i for i in range(13) if not (checkpoint_deleted and i == 9)]
+    second = FakeSource(_listing(ids, start))
+    assert scraper.scrape_listing('stocks', 'new', ['GME'], incremental=True, source=second) == (3, 3)
+    assert second.read == 4  # The new posts, then the first one at or before the checkpoint
+    checkpoint = scraper.load_checkpoint('stocks')
+    assert checkpoint['newest_id'] == 'p12'
+    assert checkpoint['newest_created_utc'] == start + timedelta(minutes=12)
+    assert len(scraper.collection.docs) == 13
@@ -0,0 +1,92 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from reddit_sources import HttpJsonSource, TokenBucket
+
+POSTS_PER_SUB = 250
+
+
+def _fake_listing(subreddit, after, limit):
+    start = int(after.split('_')[1]) + 1 if after else 0
+    end = min(start + limit, POSTS_PER_SUB)
+    children = [{'kind': 't3', 'data': {
+        'id': f'{subreddit}{i}', 'title': f'post {i} about GME', 'selftext': '',
+        'created_utc': 1_700_000_000 - i * 60, 'score': i, 'num_comments': 0,
+        'permalink': f'/r/{subreddit}/{i}', 'url': f'https://example.com/{i}',
+    }} for i in range(start, end)]
+    return {'data': {'children': children, 'after': f't3_{end - 1}' if end < POSTS_PER_SUB else None}}
+
+
+@pytest.fixture
+def fake_reddit():
+    requests = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            subreddit = url.path.split('/')[2]
+            query = parse_qs(url.query)
+            requests.append(url.path)
+            body = json.dumps(_fake_listing(subreddit, query.get('after', [None])[0], int(query['limit'][0]))).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}', requests
+    server.shutdown()
+
+
+def test_http_source_pages_until_exhausted(fake_reddit):
+    base_url, requests = fake_reddit
+    source = HttpJsonSource(base_url, limiter=TokenBucket(1000, 1000))
+    posts = list(source.listing('stocks', 'new'))
+    assert len(posts) == POSTS_PER_SUB
+    assert posts[0].id == 'stocks0' and posts[-1].id == f'stocks{POSTS_PER_SUB - 1}'
+    assert len(requests) == 3  # 100 + 100 + 50
+
+
+def test_http_source_stops_paging_when_consumer_stops(fake_reddit):
+    base_url, requests = fake_reddit
+    source = HttpJsonSource(base_url, limiter=TokenBucket(1000, 1000))
+    for i, _ in enumerate(source.listing('stocks', 'new')):
+        if i == 10:
+            break
+    assert len(requests) == 1
+
+
+def test_shared_bucket_counts_every_request_across_threads(fake_reddit):
+    base_url, requests = fake_reddit
+    limiter = TokenBucket(1000, 1000)
+    source = HttpJsonSource(base_url, limiter=limiter)
+    threads = [threading.Thread(target=lambda s=s: list(source.listing(s, 'hot'))) for s in ('a', 'b', 'c', 'd')]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert limiter.acquired == len(requests) == 12
+
+
+def test_token_bucket_waits_for_refill():
+    now = [0.0]
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    bucket = TokenBucket(rate_per_sec=2, capacity=2, clock=lambda: now[0], sleep=sleep)
+    for _ in range(6):
+        bucket.acquire()
+    # Burst of 2, then one token every 0.5s
+    assert now[0] == pytest.approx(2.0)
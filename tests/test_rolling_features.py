@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+
+from rolling_features import LEGACY_FEATURES, Feature, add_features, column_names, lookback
+
+
+def _buckets(n_tickers=5, n_rows=40, seed=0):
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({
+        'tickers': np.repeat([f'T{i}' for i in range(n_tickers)], n_rows),
+        'bucket': np.tile(np.arange(n_rows), n_tickers),
+        'avg_sentiment': rng.uniform(-1, 1, n_tickers * n_rows),
+    })
+    # Uneven history per ticker
+    return frame.sample(frac=0.8, random_state=seed).sort_values(['tickers', 'bucket']).reset_index(drop=True)
+
+
+def _legacy_loop(grouped, momentum_col):
+    # The per-ticker loop feature_engineering.py used before the library
+    grouped['sentiment_change'] = grouped.groupby('tickers')['avg_sentiment'].diff()
+    for ticker, group in grouped.groupby('tickers'):
+        idx = group.index
+        grouped.loc[idx, 'rolling_avg_sentiment'] = group['avg_sentiment'].rolling(window=3, min_periods=1).mean().values
+        grouped.loc[idx, momentum_col] = group['avg_sentiment'].diff(periods=3).values
+    return grouped
+
+
+@pytest.mark.parametrize('unit', ['d', 'h'])
+def test_legacy_features_match_per_ticker_loop(unit):
+    frame = _buckets()
+    expected = _legacy_loop(frame.copy(), f'momentum_3{unit}')
+    pdt.assert_frame_equal(add_features(frame, LEGACY_FEATURES, unit), expected)
+    assert column_names(LEGACY_FEATURES, unit) == ['sentiment_change', 'rolling_avg_sentiment', f'momentum_3{unit}']
+
+
+def test_window_kinds_match_per_ticker_pandas():
+    features = [
+        Feature('std_{window}', 'std', 5, min_periods=2),
+        Feature('ewm_{window}', 'ewm', 4),
+        Feature('z_{window}', 'zscore', 6, min_periods=3),
+    ]
+    # Non-contiguous index: results must align on labels, not positions
+    frame = _buckets(seed=1)
+    frame.index = frame.index * 3 + 7
+    out = add_features(frame.copy(), features, 'd')
+    for _, group in frame.groupby('tickers'):
+        series = group['avg_sentiment']
+        window = series.rolling(6, min_periods=3)
+        pdt.assert_series_equal(out.loc[group.index, 'std_5'], series.rolling(5, min_periods=2).std(), check_names=False)
+        pdt.assert_series_equal(out.loc[group.index, 'ewm_4'], series.ewm(span=4).mean(), check_names=False)
+        pdt.assert_series_equal(out.loc[group.index, 'z_6'], (series - window.mean()) / window.std(), check_names=False)
+
+
+def test_lookback():
+    assert lookback(LEGACY_FEATURES) == 3
+    assert lookback([Feature('m', 'mean', 24)]) == 23
+    assert lookback([*LEGACY_FEATURES, Feature('e', 'ewm', 12)]) is None
+
+
+def test_unknown_kind_raises():
+    with pytest.raises(ValueError):
+        add_features(_buckets(), [Feature('x', 'median', 3)], 'd')
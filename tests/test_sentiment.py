@@ -31,4 +31,42 @@ def test_finbert_score_keys(monkeypatch):
     # Mock the actual model call for speed
     monkeypatch.setattr('sentiment_analysis.finbert_score', lambda text: {'finbert_positive': 0.1, 'finbert_neutral': 0.8, 'finbert_negative': 0.1})
     result = finbert_score("The market is stable.")
-    assert set(result.keys()) == {'finbert_positive', 'finbert_neutral', 'finbert_negative'}
\ No newline at end of file
+    assert set(result.keys()) == {'finbert_positive', 'finbert_neutral', 'finbert_negative'}
+
+def test_finbert_score_batch_preserves_input_order(monkeypatch):
+    # Fake batch scorer tags each result with its text so reordering is visible
+    monkeypatch.setattr('sentiment_analysis._finbert_batch', lambda texts, model=None: [{'text': t} for t in texts])
+    from sentiment_analysis import finbert_score_batch
+    texts = ['a much longer post body here', 'short', 'medium length', 'x']
+    results = finbert_score_batch(texts, batch_size=2)
+    assert [r['text'] for r in results] == texts
+
+
+def test_import_does_not_load_heavy_resources():
+    # Run in a fresh interpreter so other tests' warm resources don't leak in
+    import subprocess
+    import sys
+    code = (
+        "import sys, sentiment_analysis as sa; "
+        "assert 'torch' not in sys.modules and 'transformers' not in sys.modules; "
+        "assert not any(r.is_loaded for r in (sa.STOPWORDS, sa.sia, sa.finbert_model, sa.collection))"
+    )
+    subprocess.run([sys.executable, '-c', code], check=True)
+
+
+def test_clean_texts_matches_clean_text_byte_for_byte():
+    import pandas as pd
+    from sentiment_analysis import clean_texts, clean_text
+    texts = [
+        "Check out http://example.com this is amazing!",
+        "The quick brown fox.",
+        "",
+        "   leading and trailing   ",
+        "Tabs\tnew\nlines\r\x0bvertical\x0cfeed\x1cfile-sep",
+        "Unicode: café, naïve, ＧＭＥ, non\xa0breaking space",
+        "I don't think $GME can't go higher!!! https://t.co/abc?x=1",
+        "ALL CAPS ARE THE BEST",
+    ]
+    expected = [clean_text(t) for t in texts]
+    assert clean_texts(texts) == expected
+    assert clean_texts(pd.Series(texts, index=range(10, 10 + len(texts)))) == expected
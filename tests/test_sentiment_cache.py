@@ -0,0 +1,59 @@
+from sentiment_cache import SentimentCache, cache_key
+
+
+def test_cache_key_depends_on_text_and_model():
+    assert cache_key('buy gme', 'vader+finbert') == cache_key('buy gme', 'vader+finbert')
+    assert cache_key('buy gme', 'vader+finbert') != cache_key('buy gme', 'vader+finbert-int8')
+    assert cache_key('buy gme', 'vader+finbert') != cache_key('sell gme', 'vader+finbert')
+
+
+def test_memory_then_disk_hits(tmp_path):
+    path = tmp_path / 'cache.sqlite'
+    cache = SentimentCache(path, memory_max_entries=10)
+    assert cache.get('buy gme', 'm') is None
+    cache.put('buy gme', 'm', {'sentiment': {'compound': 0.5}})
+    assert cache.get('buy gme', 'm') == {'sentiment': {'compound': 0.5}}
+    assert cache.stats['misses'] == 1 and cache.stats['memory_hits'] == 1
+    cache.close()
+    # A fresh process only has the disk tier
+    reopened = SentimentCache(path)
+    assert reopened.get('buy gme', 'm') == {'sentiment': {'compound': 0.5}}
+    assert reopened.stats['disk_hits'] == 1
+
+
+def test_size_bounded_eviction(tmp_path):
+    cache = SentimentCache(tmp_path / 'cache.sqlite', memory_max_entries=2, disk_max_entries=3)
+    for i in range(5):
+        cache.put(f'text {i}', 'm', {'i': i})
+    assert len(cache._memory) == 2
+    assert cache.stats['evictions'] == 2
+    # Oldest entries are gone from both tiers, newest survive
+    assert cache.get('text 0', 'm') is None
+    assert cache.get('text 4', 'm') == {'i': 4}
+
+
+def test_memory_hits_protect_entries_from_disk_eviction(tmp_path):
+    cache = SentimentCache(tmp_path / 'cache.sqlite', memory_max_entries=10, disk_max_entries=3)
+    for i in range(3):
+        cache.put(f'text {i}', 'm', {'i': i})
+    assert cache.get('text 0', 'm') == {'i': 0}  # Memory hit: oldest put, most recently used
+    cache.put('text 3', 'm', {'i': 3})
+    cache.close()
+
+    reopened = SentimentCache(tmp_path / 'cache.sqlite')
+    assert reopened.get('text 0', 'm') == {'i': 0}
+    assert reopened.get('text 1', 'm') is None
+
+
+def test_disk_bound_holds_across_processes_sharing_the_file(tmp_path):
+    path = tmp_path / 'cache.sqlite'
+    # Both open an empty file, as two workers starting together
+    first = SentimentCache(path, disk_max_entries=4, recount_every=1)
+    second = SentimentCache(path, disk_max_entries=4, recount_every=1)
+    for i in range(3):
+        first.put(f'first {i}', 'm', {'i': i})
+        second.put(f'second {i}', 'm', {'i': i})
+    (count,) = first._conn.execute('SELECT COUNT(*) FROM sentiment_cache').fetchone()
+    assert count == 4
+    first.close()
+    second.close()
@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from sentiment_workers import claim_batch, complete_batch, release_batch
+
+
+@pytest.fixture
+def posts(mongo_db):
+    collection = mongo_db['posts']
+    collection.insert_many([{'id': f'p{i}', 'title': f'post {i}', 'selftext': '', 'sentiment_pending': True} for i in range(100)])
+    return collection
+
+
+def test_concurrent_claims_are_disjoint(posts):
+    _, first = claim_batch(posts, 'w1', batch_size=60)
+    _, second = claim_batch(posts, 'w2', batch_size=60)
+    first_ids = {p['_id'] for p in first}
+    second_ids = {p['_id'] for p in second}
+    assert len(first_ids) == 60
+    assert not first_ids & second_ids
+    assert len(first_ids | second_ids) == 100
+
+
+def test_complete_writes_and_releases(posts):
+    token, batch = claim_batch(posts, 'w1', batch_size=10)
+    results = [{'sentiment': {'compound': 0.1}} for _ in batch]
+    assert complete_batch(posts, token, batch, results) == 10
+    assert posts.count_documents({'sentiment': {'$exists': True}, 'lease_owner': {'$exists': False}}) == 10
+    assert posts.count_documents({'sentiment_pending': True}) == 90
+
+
+def test_expired_lease_is_reclaimed_and_stale_owner_cannot_write(posts):
+    token, batch = claim_batch(posts, 'crashed', batch_size=100)
+    posts.update_many({'lease_owner': token}, {'$set': {'lease_expires': datetime.utcnow() - timedelta(seconds=1)}})
+    new_token, reclaimed = claim_batch(posts, 'w2', batch_size=100)
+    assert len(reclaimed) == 100
+    # The crashed worker comes back late: its writes must not land
+    assert complete_batch(posts, token, batch, [{'sentiment': {}}] * len(batch)) == 0
+    release_batch(posts, new_token)
+    assert posts.count_documents({'lease_owner': {'$exists': True}}) == 0
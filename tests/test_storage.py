@@ -0,0 +1,98 @@
+from datetime import datetime, timedelta
+
+import pymongo
+import pytest
+
+import storage
+
+N_POSTS = 20_000
+N_UNSCORED = 50
+
+
+@pytest.fixture
+def posts(mongo_db):
+    collection = mongo_db['posts']
+    start = datetime(2024, 1, 1)
+    docs = []
+    for i in range(N_POSTS):
+        doc = {'id': f'p{i}', 'tickers': [['AAPL', 'GME', 'TSLA'][i % 3]], 'created_utc': start + timedelta(minutes=i)}
+        # Legacy documents: scored ones have sentiment, unscored ones have no flag yet
+        if i >= N_UNSCORED:
+            doc['sentiment'] = {'compound': 0.0}
+            doc['scored_at'] = start + timedelta(minutes=i)
+        docs.append(doc)
+    collection.insert_many(docs)
+    storage.setup(collection)
+    return collection
+
+
+def _explain(cursor):
+    plan = cursor.explain()
+    return storage.plan_stages(plan), plan.get('executionStats', {})
+
+
+def test_setup_creates_and_verifies_indexes(posts):
+    assert storage.verify_indexes(posts) == []
+    posts.drop_index('scored_at')
+    assert storage.verify_indexes(posts) == ['scored_at']
+    storage.setup(posts)
+    assert storage.verify_indexes(posts) == []
+
+
+def test_migration_flags_legacy_unscored_posts_once(posts):
+    assert posts.count_documents(storage.UNSCORED_QUERY) == N_UNSCORED
+    posts.insert_one({'id': 'late'})
+    assert storage.migrate_pending_flag(posts) == 0
+    assert posts.count_documents(storage.UNSCORED_QUERY) == N_UNSCORED
+
+
+def test_concurrent_migrations_do_not_collide(posts, monkeypatch):
+    migrations = posts.database[storage.MIGRATIONS_COLLECTION_NAME]
+    migrations.delete_many({})
+    # Two jobs that both checked before either recorded the marker
+    monkeypatch.setattr(type(migrations), 'find_one', lambda self, *args, **kwargs: None)
+    storage.migrate_pending_flag(posts)
+    storage.migrate_pending_flag(posts)
+    assert migrations.count_documents({'_id': storage.PENDING_FIELD}) == 1
+
+
+def test_backlog_scan_uses_partial_index(posts):
+    stages, stats = _explain(posts.find(storage.UNSCORED_QUERY, {'_id': 1}).sort('_id', 1).limit(1000))
+    assert ('IXSCAN', 'pending_by_id') in stages
+    assert ('COLLSCAN', None) not in stages and ('SORT', None) not in stages
+    # Only the unscored posts are ever touched, however many scored posts there are
+    assert stats['totalDocsExamined'] <= N_UNSCORED
+
+
+def test_id_lookup_and_duplicate_ids(posts):
+    stages, stats = _explain(posts.find({'id': 'p123'}))
+    assert ('IXSCAN', 'id_unique') in stages and stats['totalDocsExamined'] == 1
+    with pytest.raises(pymongo.errors.DuplicateKeyError):
+        posts.insert_one({'id': 'p123'})
+
+
+def test_windowed_feature_query_uses_compound_index(posts):
+    window = {'tickers': {'$in': ['GME']}, 'created_utc': {'$gte': datetime(2024, 1, 2), '$lt': datetime(2024, 1, 3)}}
+    stages, stats = _explain(posts.find({**storage.SCORED_QUERY, **window}))
+    assert ('IXSCAN', 'tickers_created_utc') in stages
+    assert stats['totalDocsExamined'] == 24 * 60 // 3
+
+
+def test_dedupe_keeps_the_scored_copy(posts):
+    posts.drop_index('id_unique')
+    posts.insert_one({'id': 'p100', 'tickers': ['AAPL']})
+    posts.insert_one({'id': 'p0', 'tickers': ['AAPL'], 'sentiment': {'compound': 0.5}})
+    with pytest.raises(RuntimeError, match='--dedupe'):
+        storage.ensure_indexes(posts)
+    assert storage.dedupe_posts(posts) == 2
+    assert posts.find_one({'id': 'p100'})['sentiment'] == {'compound': 0.0}
+    assert posts.find_one({'id': 'p0'})['sentiment'] == {'compound': 0.5}
+    storage.ensure_indexes(posts)
+
+
+def test_indexes_from_before_storage_are_replaced(posts):
+    posts.drop_index('scored_at')
+    posts.create_index('scored_at')
+    storage.setup(posts)
+    assert 'scored_at_1' not in posts.index_information()
+    assert storage.verify_indexes(posts) == []
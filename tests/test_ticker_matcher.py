@@ -0,0 +1,46 @@
+import re
+
+import pytest
+
+from ticker_matcher import TickerMatcher, get_matcher
+
+TICKERS = ['AAPL', 'TSLA', 'GME', 'AMC', 'NVDA', 'MSFT', 'SPY']
+
+
+@pytest.mark.parametrize("text", [
+    "AAPL to the moon",
+    "bought some tsla and gme today",
+    "GMEs squeeze is over",
+    "$NVDA calls, $msft puts",
+    "SPY/AMC (AAPL), TSLA!",
+    "nothing here SPYGLASS",
+    "ÉAAPL is not a mention",
+])
+def test_matches_old_word_boundary_search(text):
+    # The scraper used one \b-regex per ticker on upper-cased text
+    upper = text.upper()
+    expected = [t for t in TICKERS if re.search(rf'\b{t}\b', upper)]
+    assert TickerMatcher(TICKERS).match(text) == expected
+
+
+def test_cashtags_and_cashtag_only_symbols():
+    matcher = TickerMatcher(TICKERS + ['A', 'ALL'], cashtag_only=['A', 'ALL'])
+    assert matcher.match("a great day for ALL of us") == []
+    assert matcher.match("loading up on $A and $ALL") == ['A', 'ALL']
+    mention = matcher.find_mentions("$gme")[0]
+    assert mention.ticker == 'GME' and mention.cashtag and (mention.start, mention.end) == (1, 4)
+
+
+def test_multi_token_symbols_and_aliases():
+    matcher = TickerMatcher(['BRK.B', 'BAC', 'AAPL'], aliases={'Bank of America': 'BAC', 'Apple': 'AAPL'})
+    assert matcher.match("Bank   of america and brk.b beat apple") == ['BRK.B', 'BAC', 'AAPL']
+    assert matcher.match("BRK B and bank-of-america") == []
+
+
+def test_get_matcher_compiles_once():
+    assert get_matcher(TICKERS) is get_matcher(list(TICKERS))
+
+
+def test_unknown_alias_target_rejected():
+    with pytest.raises(ValueError):
+        TickerMatcher(['AAPL'], aliases={'Tesla': 'TSLA'})
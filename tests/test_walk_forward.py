@@ -0,0 +1,71 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+
+import walk_forward as wf
+
+
+def _features(n_tickers=4, n=90, seed=0):
+    rng = np.random.default_rng(seed)
+    frames = []
+    for i in range(n_tickers):
+        days = np.sort(rng.choice(n + 20, n, replace=False))  # Tickers with gaps between bars
+        frames.append(pd.DataFrame({
+            'tickers': f'T{i}',
+            'date': pd.Timestamp('2024-01-01') + pd.to_timedelta(days, unit='D'),
+            'Close': 50 + np.cumsum(rng.normal(0, 1, n)),
+            'avg_sentiment': rng.uniform(-1, 1, n),
+            'sentiment_volatility': rng.uniform(0, 1, n),
+            'post_volume': rng.integers(0, 50, n),
+            'sentiment_change': rng.normal(0, 1, n),
+        }))
+    return pd.concat(frames, ignore_index=True).sort_values(['tickers', 'date'])
+
+
+@pytest.mark.parametrize('window', [None, 15])
+def test_folds_never_train_on_labels_from_the_test_block(window):
+    df = _features().sort_values(['tickers', 'date']).reset_index(drop=True)
+    folds = wf.make_folds(df, min_train=30, test_size=10, window=window)
+    times = wf.bucket_times(df)
+    label_times = df.groupby('tickers')['date'].shift(-1).to_numpy()
+    tested = np.concatenate([fold.test for fold in folds])
+    assert len(tested) == len(np.unique(tested))  # Test blocks don't overlap
+    for fold in folds:
+        start = times[fold.test].min()
+        assert (label_times[fold.train] < start).all()  # NaT (unknown label) compares False
+        if window:
+            assert times[fold.train].min() >= start - np.timedelta64(window, 'D')
+
+
+def test_predictions_are_out_of_sample_and_cached(tmp_path, monkeypatch, capsys):
+    monkeypatch.setitem(wf.MODEL_PARAMS, 'rf', {'n_estimators': 10, 'random_state': 0})
+    df = _features()
+    kwargs = dict(models=['rf'], min_train=30, test_size=20, n_jobs=1, cache_dir=str(tmp_path), save=False)
+    first = wf.walk_forward(df, **kwargs)
+    assert first.loc[first['fold'] < 0, 'rf_pred'].isna().all()
+    assert first.loc[first['fold'] >= 0, 'rf_pred'].notna().all()
+    n_models = len(os.listdir(tmp_path))
+    assert n_models == first['fold'].max() + 1
+
+    capsys.readouterr()
+    pdt.assert_frame_equal(wf.walk_forward(df, **kwargs), first)
+    assert f'0 fitted, {n_models} from cache' in capsys.readouterr().out
+
+    # Changed rows only refit the folds that train on them (here: only the last one)
+    changed = df.sort_values(['tickers', 'date']).reset_index(drop=True)
+    *_, previous, last = wf.make_folds(changed, min_train=30, test_size=20)
+    changed.loc[np.setdiff1d(last.train, previous.train), 'avg_sentiment'] = 0.0
+    capsys.readouterr()
+    wf.walk_forward(changed, **kwargs)
+    assert f'1 fitted, {n_models - 1} from cache' in capsys.readouterr().out
+
+
+def test_parallel_folds_match_serial(tmp_path):
+    df = _features(n_tickers=3, n=70, seed=1)
+    kwargs = dict(models=['rf'], min_train=30, test_size=20, save=False)
+    serial = wf.walk_forward(df, n_jobs=1, cache_dir=str(tmp_path / 'serial'), **kwargs)
+    parallel = wf.walk_forward(df, n_jobs=2, cache_dir=str(tmp_path / 'parallel'), **kwargs)
+    pdt.assert_frame_equal(parallel, serial)
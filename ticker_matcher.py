@@ -0,0 +1,126 @@
+import csv
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+# Same notion of a "word" as the \b boundaries the scrapers used to rely on
+TOKEN_PATTERN = re.compile(r'\w+')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+Mention = namedtuple('Mention', ['ticker', 'start', 'end', 'cashtag'])
+
+
+class _Node:
+    __slots__ = ('children', 'terminals')
+
+    def __init__(self):
+        self.children = {}
+        self.terminals = []
+
+
+class TickerMatcher:
+    """
+    Finds ticker mentions in one pass over the text.
+
+    The universe (symbols plus optional aliases such as company names) is
+    compiled once into a token trie. Text is split into word tokens, and each
+    token is looked up in a dict, so matching costs O(text length) no matter
+    how many symbols are tracked. Multi-token keys ("BRK.B", "BANK OF
+    AMERICA") walk the trie and must be joined by the same separator.
+
+    Matching is case-insensitive, like the old ``\\bTICKER\\b`` search on
+    upper-cased text. ``$AAPL`` is reported as a cashtag mention. Symbols in
+    ``cashtag_only`` (ambiguous words such as "A", "IT" or "ALL") only match
+    in their ``$`` form.
+    """
+
+    def __init__(self, tickers, aliases=None, cashtag_only=()):
+        self.tickers = list(dict.fromkeys(t.upper() for t in tickers))
+        self._order = {t: i for i, t in enumerate(self.tickers)}
+        self.cashtag_only = {t.upper() for t in cashtag_only}
+        self._root = {}
+        for ticker in self.tickers:
+            self._add(ticker, ticker, is_alias=False)
+        for alias, ticker in (aliases or {}).items():
+            ticker = ticker.upper()
+            if ticker not in self._order:
+                raise ValueError(f'Alias {alias!r} points to unknown ticker {ticker!r}')
+            self._add(alias, ticker, is_alias=True)
+
+    @classmethod
+    def from_file(cls, path, cashtag_only=()):
+        """Load a universe CSV: ``symbol[,alias1|alias2...]``; ``#`` lines are comments."""
+        tickers, aliases = [], {}
+        with open(path, newline='') as f:
+            for row in csv.reader(f):
+                if not row or not row[0].strip() or row[0].startswith('#'):
+                    continue
+                symbol = row[0].strip()
+                tickers.append(symbol)
+                if len(row) > 1:
+                    for alias in row[1].split('|'):
+                        if alias.strip():
+                            aliases[alias.strip()] = symbol
+        return cls(tickers, aliases=aliases, cashtag_only=cashtag_only)
+
+    def __len__(self):
+        return len(self.tickers)
+
+    # --- COMPILATION ---
+    def _add(self, key, ticker, is_alias):
+        key = key.upper()
+        tokens = [(m.start(), m.end(), m.group()) for m in TOKEN_PATTERN.finditer(key)]
+        if not tokens:
+            return
+        node = self._root.setdefault(tokens[0][2], _Node())
+        for (_, prev_end, _), (start, _, token) in zip(tokens, tokens[1:]):
+            sep = self._normalize_sep(key[prev_end:start])
+            node = node.children.setdefault((sep, token), _Node())
+        node.terminals.append((ticker, is_alias))
+
+    @staticmethod
+    def _normalize_sep(sep):
+        return WHITESPACE_PATTERN.sub(' ', sep)
+
+    # --- MATCHING ---
+    def find_mentions(self, text):
+        """All mentions in text order, including repeats."""
+        text = text.upper()
+        tokens = [(m.start(), m.end(), m.group()) for m in TOKEN_PATTERN.finditer(text)]
+        mentions = []
+        for i, (start, end, token) in enumerate(tokens):
+            node = self._root.get(token)
+            if node is None:
+                continue
+            cashtag = start > 0 and text[start - 1] == '$'
+            j = i
+            while True:
+                for ticker, is_alias in node.terminals:
+                    if cashtag or is_alias or ticker not in self.cashtag_only:
+                        mentions.append(Mention(ticker, start, end, cashtag))
+                j += 1
+                if not node.children or j >= len(tokens):
+                    break
+                next_start, next_end, next_token = tokens[j]
+                node = node.children.get((self._normalize_sep(text[end:next_start]), next_token))
+                if node is None:
+                    break
+                end = next_end
+        return mentions
+
+    def match(self, text):
+        """Distinct tickers mentioned in the text, in universe order."""
+        found = {mention.ticker for mention in self.find_mentions(text)}
+        return sorted(found, key=self._order.__getitem__)
+
+
+@lru_cache(maxsize=16)
+def _cached_matcher(tickers):
+    return TickerMatcher(tickers)
+
+
+def get_matcher(tickers):
+    """Shared matcher for a ticker list, compiled once per distinct universe."""
+    if isinstance(tickers, TickerMatcher):
+        return tickers
+    return _cached_matcher(tuple(tickers))
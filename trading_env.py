@@ -1,6 +1,6 @@
 import gymnasium as gym
 import numpy as np
-import pandas as pd
+from dataset_io import read_dataset
 
 class TradingEnv(gym.Env):
     """
@@ -11,10 +11,10 @@ class TradingEnv(gym.Env):
     """
     metadata = {'render.modes': ['human']}
 
-    def __init__(self, data_csv, initial_cash=10000, transaction_cost=0.001, slippage=0.001):
+    def __init__(self, dataset='merged_features_daily', initial_cash=10000, transaction_cost=0.001, slippage=0.001):
         super(TradingEnv, self).__init__()
-        self.data = pd.read_csv(data_csv)
         self.features = ['avg_sentiment', 'sentiment_volatility', 'post_volume', 'sentiment_change', 'Close']
+        self.data = read_dataset(dataset, columns=['tickers', 'date'] + self.features)
         self.n_steps = len(self.data)
         self.initial_cash = initial_cash
         self.transaction_cost = transaction_cost
@@ -77,7 +77,7 @@ class TradingEnv(gym.Env):
         pass
 
 # Example usage:
-# env = TradingEnv('merged_features_daily.csv')
+# env = TradingEnv('merged_features_daily')
 # obs, _ = env.reset()
 # for _ in range(100):
 #     action = env.action_space.sample()
@@ -1,43 +1,17 @@
-import pandas as pd
 import matplotlib.pyplot as plt
+from backtest_engine import ACTION_NAMES, run_backtest, threshold_signals
+from dataset_io import read_dataset
 
-INPUT_CSV = 'merged_features.csv'
+INPUT_DATASET = 'merged_features_daily'
 INITIAL_CASH = 10000
 POSITION_SIZE = 1  # Number of shares per trade (for simplicity)
 
 # --- LOAD DATA ---
-df = pd.read_csv(INPUT_CSV)
-df = df.sort_values(['tickers', 'date'])
+df = read_dataset(INPUT_DATASET, columns=['tickers', 'date', 'Close', 'avg_sentiment'])  # sorted by tickers, date
 
-results = []
-for ticker in df['tickers'].unique():
-    tdf = df[df['tickers'] == ticker].reset_index(drop=True)
-    cash = INITIAL_CASH
-    position = 0
-    portfolio_values = []
-    actions = []
-    for i, row in tdf.iterrows():
-        price = row['Close']
-        sentiment = row['avg_sentiment']
-        # Simple rule: buy if sentiment > 0.2, sell if < -0.2, else hold
-        if sentiment > 0.2 and cash >= price:
-            position += POSITION_SIZE
-            cash -= price * POSITION_SIZE
-            action = 'buy'
-        elif sentiment < -0.2 and position > 0:
-            cash += price * position
-            position = 0
-            action = 'sell'
-        else:
-            action = 'hold'
-        portfolio_value = cash + position * price
-        portfolio_values.append(portfolio_value)
-        actions.append(action)
-    tdf['portfolio_value'] = portfolio_values
-    tdf['action'] = actions
-    results.append(tdf)
-
-final_df = pd.concat(results)
+# Simple rule: buy if sentiment > 0.2, sell if < -0.2, else hold
+result = run_backtest(df, threshold_signals(df['avg_sentiment'], 0.2, -0.2), INITIAL_CASH, POSITION_SIZE)
+final_df = df.assign(portfolio_value=result.portfolio_value, action=ACTION_NAMES[result.executed + 1])
 
 # --- PLOT RESULTS ---
 for ticker in final_df['tickers'].unique():
@@ -0,0 +1,176 @@
+import argparse
+import hashlib
+import os
+from collections import namedtuple
+
+import joblib
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from dataset_io import read_dataset
+from ml_dataset import FEATURES, build_dataset, rule_scores
+from pipeline import fingerprint
+
+# --- CONFIGURATION ---
+INPUT_DATASET = 'merged_features_daily'
+PREDICTIONS_CSV = 'walk_forward_predictions.csv'
+MODEL_CACHE_DIR = 'model_cache'
+MIN_TRAIN_BUCKETS = 120  # Buckets (days or hours) before the first test fold
+TEST_BUCKETS = 20  # Buckets per test fold
+MODELS = ['rf', 'xgb']
+MODEL_PARAMS = {
+    'rf': {'n_estimators': 100, 'random_state': 42},
+    'xgb': {'n_estimators': 100, 'random_state': 42, 'eval_metric': 'mlogloss'},
+}
+
+# Folds split the time buckets, not rows, so every ticker shares the same
+# boundaries. Fold k tests on TEST_BUCKETS buckets and trains on rows whose
+# label was already known when the test block starts: a label looks at the
+# ticker's next bar, so a row is used only if that bar is before the test
+# block (the last bar of each ticker, whose label is unknown, is never
+# trained on). Expanding folds train on everything before; rolling folds on
+# the last `window` buckets. Boundaries are anchored at the first bucket,
+# so appending data leaves earlier folds, and their cached models, unchanged.
+
+Fold = namedtuple('Fold', ['index', 'train', 'test'])
+
+
+# --- FOLDS ---
+def bucket_times(df):
+    times = pd.to_datetime(df['date'])
+    if 'hour' in df:
+        times = times + pd.to_timedelta(df['hour'], unit='h')
+    return times.to_numpy()
+
+
+def make_folds(df, min_train=MIN_TRAIN_BUCKETS, test_size=TEST_BUCKETS, window=None):
+    """Folds over df (sorted by tickers, then time) as row positions."""
+    times = bucket_times(df)
+    buckets = np.unique(times)
+    codes = np.searchsorted(buckets, times)
+    # Bucket of the bar each row's label looks at; rows without one never train
+    label_codes = pd.Series(codes).groupby(df['tickers'].to_numpy(), sort=False).shift(-1)
+    label_codes = label_codes.fillna(len(buckets)).to_numpy(dtype=np.int64)
+    folds = []
+    for start in range(min_train, len(buckets), test_size):
+        test = np.flatnonzero((codes >= start) & (codes < start + test_size))
+        train_mask = label_codes < start
+        if window:
+            train_mask &= codes >= start - window
+        train = np.flatnonzero(train_mask)
+        if len(train) and len(test):
+            folds.append(Fold(len(folds), train, test))
+    return folds
+
+
+# --- MODELS ---
+def build_model(name, n_jobs=1):
+    if name == 'rf':
+        from sklearn.ensemble import RandomForestClassifier
+        return RandomForestClassifier(**MODEL_PARAMS[name], n_jobs=n_jobs)
+    if name == 'xgb':
+        from xgboost import XGBClassifier
+        return XGBClassifier(**MODEL_PARAMS[name], n_jobs=n_jobs)
+    raise ValueError(f'Unknown model: {name}')
+
+
+def model_version(name):
+    if name == 'xgb':
+        import xgboost
+        return xgboost.__version__
+    import sklearn
+    return sklearn.__version__
+
+
+def fit_fold(name, X, y, train, test, path, n_jobs=1):
+    """
+    Predictions for the test rows from the model cached at path, fitting and
+    caching it first if needed. Returns (predictions, fitted).
+    """
+    if os.path.exists(path):
+        entry = joblib.load(path)
+        fitted = False
+    else:
+        # Labels are encoded as 0..k-1 (XGBoost requires it; -1/0/1 are not)
+        classes, encoded = np.unique(y[train], return_inverse=True)
+        model = build_model(name, n_jobs)
+        model.fit(X[train], encoded)
+        entry = {'model': model, 'classes': classes}
+        tmp = f'{path}.{os.getpid()}.tmp'
+        joblib.dump(entry, tmp)
+        os.replace(tmp, path)
+        fitted = True
+    entry['model'].set_params(n_jobs=n_jobs)
+    return entry['classes'][entry['model'].predict(X[test])], fitted
+
+
+# --- WALK FORWARD ---
+def walk_forward(df, features=None, models=MODELS, min_train=MIN_TRAIN_BUCKETS, test_size=TEST_BUCKETS,
+                 window=None, n_jobs=None, cache_dir=MODEL_CACHE_DIR, save=True):
+    """
+    Out-of-sample predictions from walk-forward training on merged feature
+    rows (labels and X from ml_dataset.build_dataset). Fold models train in
+    parallel and are cached in cache_dir under a fingerprint of their
+    training rows and configuration, so a rerun only fits folds whose data
+    or parameters changed. Returns the ml_baseline prediction columns
+    ({model}_pred, rule_pred) plus the fold of each row; rows before the
+    first test fold have no model predictions.
+    """
+    data = build_dataset(df, features or FEATURES)
+    frame, X, y = data.frame, data.X, data.y
+    keys = [k for k in ['tickers', 'date', 'hour'] if k in frame]
+    folds = make_folds(frame, min_train, test_size, window)
+    # One hash per row; a fold's data fingerprint hashes its training rows' hashes
+    row_hashes = (pd.util.hash_pandas_object(frame[keys + ['label']], index=False).to_numpy()
+                  ^ pd.util.hash_pandas_object(pd.DataFrame(X, copy=False), index=False).to_numpy())
+    os.makedirs(cache_dir, exist_ok=True)
+
+    jobs = []
+    for fold in folds:
+        digest = hashlib.sha256(row_hashes[fold.train].tobytes()).hexdigest()
+        for name in models:
+            fp = fingerprint('walk_forward', name, MODEL_PARAMS[name], model_version(name), data.features, digest)
+            jobs.append((fold, name, os.path.join(cache_dir, f'{name}-{fp}.joblib')))
+    cores = os.cpu_count() or 1
+    workers = max(1, min(n_jobs or cores, len(jobs)))
+    # Folds run in worker processes (X is memory-mapped into them); each
+    # model uses the cores left over per worker
+    results = Parallel(n_jobs=workers)(
+        delayed(fit_fold)(name, X, y, fold.train, fold.test, path, max(1, cores // workers))
+        for fold, name, path in jobs
+    )
+
+    out = frame[keys + ['Close', 'label']].astype({'label': int})
+    out['fold'] = -1
+    for fold in folds:
+        out.loc[fold.test, 'fold'] = fold.index
+    out['rule_pred'] = rule_scores(data).astype(int)
+    for name in models:
+        out[f'{name}_pred'] = np.nan
+    for (fold, name, _), (predictions, _) in zip(jobs, results):
+        out.loc[fold.test, f'{name}_pred'] = predictions
+    fitted = sum(f for _, f in results)
+    print(f"{len(folds)} folds x {len(models)} models: {fitted} fitted, {len(jobs) - fitted} from cache")
+
+    tested = out['fold'] >= 0
+    for column in ['rule_pred'] + [f'{name}_pred' for name in models]:
+        accuracy = (out.loc[tested, column] == out.loc[tested, 'label']).mean()
+        print(f"{column:<12} out-of-sample accuracy {accuracy:.3f} ({tested.sum()} rows)")
+    if save:
+        out.to_csv(PREDICTIONS_CSV, index=False)
+        print(f'Predictions saved to {PREDICTIONS_CSV}')
+    return out
+
+
+# --- MAIN ---
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Walk-forward training with out-of-sample predictions.')
+    parser.add_argument('--input', default=INPUT_DATASET)
+    parser.add_argument('--models', nargs='+', choices=list(MODEL_PARAMS), default=MODELS)
+    parser.add_argument('--min-train', type=int, default=MIN_TRAIN_BUCKETS, help='Buckets before the first test fold')
+    parser.add_argument('--test-size', type=int, default=TEST_BUCKETS, help='Buckets per test fold')
+    parser.add_argument('--rolling', type=int, help='Train on only the last N buckets (default: expanding window)')
+    parser.add_argument('--n-jobs', type=int, help='Folds trained in parallel (default: all cores)')
+    args = parser.parse_args()
+    walk_forward(read_dataset(args.input), models=args.models, min_train=args.min_train,
+                 test_size=args.test_size, window=args.rolling, n_jobs=args.n_jobs)